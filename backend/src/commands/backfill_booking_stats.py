@@ -0,0 +1,21 @@
+"""
+Пересчёт таблиц booking_daily_stats и place_stats по всем броням и отзывам
+
+Запуск: poetry run python -m src.commands.backfill_booking_stats
+"""
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db import get_engine
+from src.repo.stats import BookingStatsRepository
+
+
+async def backfill_booking_stats() -> None:
+    async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+        await BookingStatsRepository(session).backfill()
+        await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_booking_stats())
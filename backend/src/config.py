@@ -26,6 +26,24 @@ class Settings(BaseSettings):
     smtp_port: int = 587
     smtp_user: str = ""
     smtp_password: str = ""
+    smtp_idle_timeout: float = 60
+
+    # Отправка писем из email_outbox: пачки, опрос очереди, повторы с удвоением задержки
+    email_outbox_batch_size: int = 50
+    email_outbox_poll_interval: float = 10
+    email_outbox_max_attempts: int = 8
+    email_outbox_backoff: float = 30
+    email_outbox_max_backoff: float = 3600
+    email_outbox_lease: float = 300
+
+    # Напоминания о бронях и отметка неявок, выполняются одним воркером под advisory-блокировкой
+    scheduler_interval: float = 60
+    scheduler_batch_size: int = 200
+    scheduler_lock_key: int = 4901
+    reminder_lead_minutes: int = 60
+    no_show_after_minutes: int = 30
+    # Через сколько минут после начала неотмеченная бронь укорачивается и место освобождается, None - не освобождать
+    no_show_release_after_minutes: int | None = 60
 
     super_user_email: str = "admin@gmail.com"
     super_user_password: str = "admin"
@@ -35,6 +53,31 @@ class Settings(BaseSettings):
 
     host_url: str = "http://localhost:8000"
 
+    metrics_cache_ttl: int = 30
+    export_batch_size: int = 5000
+
+    row_count_estimate_threshold: int = 100000
+    row_count_cache_ttl: float = 60
+
+    client_import_max_rows: int = 50000
+
+    geo_index_cell_size: float = 0.1
+    geo_index_max_buildings: int = 100000
+    map_cluster_max_zoom: int = 15
+    map_cluster_cells_per_tile: int = 4
+
+    scheme_cache_ttl: float = 5
+    scheme_cache_max_size: int = 1000
+    # Как часто реестр текущих посещений перечитывается из БД, чтобы учесть отметки из других воркеров
+    occupancy_sync_interval: float = 10
+    # События бронирований раздаются через Postgres LISTEN/NOTIFY, поток SSE пингуется при простое
+    events_channel: str = "bookit_events"
+    events_queue_size: int = 100
+    events_heartbeat_interval: float = 15
+    events_reconnect_delay: float = 3
+    # Большие списки собираются в JSON на стороне Postgres, без ORM-объектов и DTO
+    render_json_in_db: bool = False
+
     @property
     def database_url(self):
         return f"postgresql+asyncpg://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
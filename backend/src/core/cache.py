@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+
+__all__ = ("StaleWhileRevalidateCache", "VersionedCache")
+
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache(Generic[T]):
+    """
+    Кэш одного значения в памяти воркера.
+    Пока значение свежее (младше `ttl` секунд), отдаётся без обращения к загрузчику.
+    Устаревшее значение отдаётся сразу, а обновление запускается в фоне, не более одного одновременно
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[T]], ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self._value: T | None = None
+        self._updated_at: float | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def age(self) -> float:
+        if self._updated_at is None:
+            return 0
+        return time.monotonic() - self._updated_at
+
+    async def _load(self) -> None:
+        value = await self.loader()
+        self._value = value
+        self._updated_at = time.monotonic()
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.error("Cache refresh failed", exc_info=task.exception())
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    async def get(self) -> tuple[T, float]:
+        """
+        Возвращает значение и его возраст в секундах
+        """
+        if self._updated_at is None:
+            await asyncio.shield(self._ensure_refresh())
+        elif self.age >= self.ttl:
+            self._ensure_refresh()
+        return self._value, self.age
+
+    def invalidate(self) -> None:
+        self._value = None
+        self._updated_at = None
+
+
+class VersionedCache(Generic[K, T]):
+    """
+    Кэш значений по ключу в памяти воркера, не более `max_size` последних использованных ключей.
+    Значение младше `ttl` секунд отдаётся без проверок. Более старое сверяется с версией из источника
+    и загружается заново, только если версия изменилась.
+    Изменения в этом воркере сбрасывают ключ через `invalidate`, изменения из других воркеров видны не позже чем через `ttl`
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[K, tuple[Any, T, float]] = OrderedDict()
+        self._invalidations = 0
+
+    async def get(
+        self,
+        key: K,
+        get_version: Callable[[], Awaitable[Any]],
+        loader: Callable[[Any], Awaitable[T]]
+    ) -> T | None:
+        """
+        Значение по ключу, `None` если источник вернул версию `None`
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[2] < self.ttl:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        invalidations = self._invalidations
+        version = await get_version()
+        if version is None:
+            self._entries.pop(key, None)
+            return None
+        if entry is not None and entry[0] == version:
+            value = entry[1]
+        else:
+            value = await loader(version)
+        # Ключ сбросили, пока шла загрузка: значение могло устареть, поэтому не сохраняется
+        if invalidations != self._invalidations:
+            return value
+        self._entries[key] = (version, value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: K) -> None:
+        self._invalidations += 1
+        self._entries.pop(key, None)
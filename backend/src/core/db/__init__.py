@@ -1,2 +1,3 @@
 from .engine import *
-from .metadata import *
\ No newline at end of file
+from .metadata import *
+from .lock import *
\ No newline at end of file
@@ -1,14 +1,15 @@
-from typing import Annotated
+from typing import Annotated, Callable
 
 from fastapi.params import Depends
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession, create_async_engine)
+from sqlalchemy.orm import Session, SessionTransaction
 
 from src.config import settings
 from src.core.exc import HTTPError
 
 
-__all__ = ("ping_db", "SessionDep", "get_session", "get_engine")
+__all__ = ("ping_db", "SessionDep", "get_session", "get_engine", "after_commit")
 
 engine: AsyncEngine = create_async_engine(
     settings.database_url,
@@ -45,3 +46,30 @@ async def ping_db(session: AsyncSession) -> None:
 
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        callback()
+
+
+def _drop_after_commit(session: Session, previous_transaction: SessionTransaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Вызов `callback` после коммита текущей транзакции сессии, при откате вызов отменяется
+    """
+    sync_session = session.sync_session
+    if not sync_session.in_transaction():
+        # Откат без начатой транзакции ничего не делает, поэтому вызов привязывается к новой транзакции
+        sync_session.begin()
+    if not event.contains(sync_session, "after_commit", _run_after_commit):
+        event.listen(sync_session, "after_commit", _run_after_commit)
+        event.listen(sync_session, "after_soft_rollback", _drop_after_commit)
+    sync_session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
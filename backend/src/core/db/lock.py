@@ -0,0 +1,74 @@
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+__all__ = ("LeaderLock",)
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Выбор одного экземпляра фоновой задачи среди воркеров через сессионную advisory-блокировку Postgres.
+    Блокировка держится на отдельном соединении, пока оно живо: если воркер упадёт или соединение оборвётся,
+    Postgres снимет её, и лидером станет другой воркер
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self._connection: AsyncConnection | None = None
+
+    @property
+    def is_held(self) -> bool:
+        return self._connection is not None
+
+    async def acquire(self, engine: AsyncEngine) -> bool:
+        """
+        Попытка стать лидером, для лидера - проверка, что соединение с блокировкой живо
+        """
+        if self._connection is not None:
+            try:
+                await self._connection.scalar(select(True))
+                await self._connection.commit()
+                return True
+            except Exception:
+                logger.warning("Leader lock %d connection lost", self.key)
+                await self._drop()
+
+        connection = await engine.connect()
+        try:
+            locked = await connection.scalar(select(func.pg_try_advisory_lock(self.key)))
+            # Сессионная блокировка переживает коммит, а открытая транзакция не держит снимок
+            await connection.commit()
+        except BaseException:
+            await connection.close()
+            raise
+        if not locked:
+            await connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    async def _drop(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            await connection.invalidate()
+        except Exception:
+            pass
+
+    async def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            await self._connection.scalar(select(func.pg_advisory_unlock(self.key)))
+            await self._connection.commit()
+            await self._connection.close()
+            self._connection = None
+        except Exception:
+            # Закрытие соединения без возврата в пул снимает блокировку
+            await self._drop()
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from typing import Annotated, Any
+
+from fastapi import Depends, Request, Response
+
+
+__all__ = ("make_etag", "ConditionalRequest", "ConditionalDep")
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Слабый ETag по версиям сущностей, из которых собирается ответ
+    """
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:24]}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+class ConditionalRequest:
+    """
+    Проверка `If-None-Match` до загрузки и сериализации ответа
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+
+    def matches(self, etag: str) -> bool:
+        header = self.request.headers.get("If-None-Match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+    @staticmethod
+    def _headers(etag: str) -> dict[str, str]:
+        return {"ETag": etag, "Cache-Control": "no-cache"}
+
+    def check(self, *parts: Any) -> Response | None:
+        """
+        Возвращает ответ `304`, если версия у клиента актуальна, иначе проставляет ETag в ответ
+        """
+        etag = make_etag(*parts)
+        if self.matches(etag):
+            return Response(status_code=304, headers=self._headers(etag))
+        self.response.headers.update(self._headers(etag))
+        return None
+
+    def respond(
+        self,
+        etag: str,
+        body: bytes,
+        media_type: str = "application/json",
+        headers: dict[str, str] | None = None
+    ) -> Response:
+        """
+        Ответ из заранее сериализованного тела, `304` если версия у клиента актуальна
+        """
+        headers = {**self._headers(etag), **(headers or {})}
+        if self.matches(etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
+
+
+ConditionalDep = Annotated[ConditionalRequest, Depends()]
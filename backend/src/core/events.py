@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import asyncpg
+import orjson
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+
+
+__all__ = ("EVENT_STREAM_MEDIA_TYPE", "Subscription", "EventBroker", "event_broker")
+
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Очередь событий одного подписчика. При переполнении очередь закрывается, и клиент переподключается
+    """
+
+    def __init__(self, topics: tuple[str, ...], max_size: int):
+        self.topics = topics
+        self.queue: asyncio.Queue[tuple[str, dict[str, Any]] | None] = asyncio.Queue(max_size)
+        self.closed = False
+
+    def put(self, event: str, data: dict[str, Any]) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self) -> None:
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """
+    Публикация событий через Postgres `NOTIFY` и раздача их подписчикам воркера.
+    Каждый воркер слушает канал на отдельном соединении вне пула, поэтому событие из любого воркера
+    получают подписчики всех воркеров, причём только после коммита транзакции, в которой оно опубликовано
+    """
+
+    def __init__(self, channel: str, queue_size: int, heartbeat_interval: float, reconnect_delay: float):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_delay = reconnect_delay
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _payload(topics: list[str], event: str, data: dict[str, Any]) -> str:
+        return orjson.dumps({"topics": topics, "event": event, "data": data}).decode()
+
+    async def publish(self, session: AsyncSession, topics: list[str], event: str, data: dict[str, Any]) -> None:
+        await session.execute(select(func.pg_notify(self.channel, self._payload(topics, event, data))))
+
+    async def publish_many(self, session: AsyncSession, messages: list[tuple[list[str], str, dict[str, Any]]]) -> None:
+        """
+        Публикация нескольких событий одним запросом
+        """
+        if not messages:
+            return
+        payloads = func.unnest(
+            literal([self._payload(topics, event, data) for topics, event, data in messages], ARRAY(String))
+        ).table_valued("payload").render_derived()
+        await session.execute(select(func.pg_notify(self.channel, payloads.c.payload)))
+
+    def dispatch(self, payload: str) -> None:
+        message = orjson.loads(payload)
+        subscriptions = set().union(*(self._subscriptions.get(topic, ()) for topic in message["topics"]))
+        for subscription in subscriptions:
+            subscription.put(message["event"], message["data"])
+
+    def broadcast(self, event: str, data: dict[str, Any]) -> None:
+        for subscription in set().union(*self._subscriptions.values()):
+            subscription.put(event, data)
+
+    @asynccontextmanager
+    async def subscribe(self, *topics: str) -> AsyncIterator[Subscription]:
+        subscription = Subscription(topics, self.queue_size)
+        for topic in topics:
+            self._subscriptions[topic].add(subscription)
+        try:
+            yield subscription
+        finally:
+            for topic in topics:
+                self._subscriptions[topic].discard(subscription)
+                if not self._subscriptions[topic]:
+                    del self._subscriptions[topic]
+
+    async def stream(self, *topics: str) -> AsyncIterator[bytes]:
+        """
+        События по темам в формате Server-Sent Events, с комментарием-пингом при простое
+        """
+        async with self.subscribe(*topics) as subscription:
+            yield f"retry: {int(self.reconnect_delay * 1000)}\n\n".encode()
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+    def _on_notify(self, _connection: asyncpg.Connection, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            self.dispatch(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Malformed event payload: %s", payload)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    host=settings.database_host,
+                    port=settings.database_port,
+                    user=settings.database_user,
+                    password=settings.database_password,
+                    database=settings.database_name
+                )
+                try:
+                    lost = asyncio.Event()
+                    connection.add_termination_listener(lambda _connection: lost.set())
+                    await connection.add_listener(self.channel, self._on_notify)
+                    # Пока соединения не было, события могли потеряться, клиенты перечитывают данные
+                    self.broadcast("resync", {})
+                    await lost.wait()
+                finally:
+                    if not connection.is_closed():
+                        await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener connection failed")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Открытые потоки завершаются, иначе остановка сервера ждёт их отключения
+        for subscription in set().union(*self._subscriptions.values()):
+            subscription.close()
+
+
+event_broker = EventBroker(
+    settings.events_channel,
+    settings.events_queue_size,
+    settings.events_heartbeat_interval,
+    settings.events_reconnect_delay
+)
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import Annotated, Any, TypeVar
+
+import msgpack
+import orjson
+from fastapi import Depends, Request, Response
+from pydantic import BaseModel, TypeAdapter
+
+
+__all__ = ("JSON_MEDIA_TYPE", "MSGPACK_MEDIA_TYPE", "construct", "dump", "ResponseEncoder", "EncoderDep")
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def construct(model: type[M], obj: Any, **values: Any) -> M:
+    """
+    DTO из атрибутов объекта без повторной валидации, для данных, уже проверенных при записи в БД.
+    Типы колонок должны совпадать с типами полей DTO: значения попадают в ответ как есть.
+    Поля, не являющиеся атрибутами объекта, передаются в `values`
+    """
+    fields = {name: getattr(obj, name) for name in model.model_fields if name not in values}
+    return model.model_construct(**fields, **values)
+
+
+@lru_cache
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def dump(value: Any, tp: Any) -> Any:
+    return _adapter(tp).dump_python(value, mode="json")
+
+
+class ResponseEncoder:
+    """
+    Сериализация ответа в JSON через orjson или в MessagePack, если клиент передал `Accept: application/msgpack`
+    """
+
+    def __init__(self, request: Request):
+        self.msgpack = MSGPACK_MEDIA_TYPE in request.headers.get("Accept", "")
+
+    @property
+    def media_type(self) -> str:
+        return MSGPACK_MEDIA_TYPE if self.msgpack else JSON_MEDIA_TYPE
+
+    def encode(self, payload: Any) -> bytes:
+        return msgpack.packb(payload) if self.msgpack else orjson.dumps(payload)
+
+    def __call__(self, value: Any, tp: Any, headers: dict[str, str] | None = None) -> Response:
+        """
+        Ответ из DTO (или списка DTO) типа `tp`
+        """
+        return Response(
+            self.encode(dump(value, tp)),
+            media_type=self.media_type,
+            headers={"Vary": "Accept", **(headers or {})}
+        )
+
+    def from_json(self, body: bytes, headers: dict[str, str] | None = None) -> Response:
+        """
+        Ответ из готового JSON, для MessagePack тело перекодируется
+        """
+        if self.msgpack:
+            body = msgpack.packb(orjson.loads(body))
+        return Response(body, media_type=self.media_type, headers={"Vary": "Accept", **(headers or {})})
+
+
+EncoderDep = Annotated[ResponseEncoder, Depends()]
@@ -1,3 +1,5 @@
 from .dates import *
+from .geo import *
+from .intervals import *
 from .jwt import *
 from .undefined import *
\ No newline at end of file
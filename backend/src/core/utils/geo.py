@@ -0,0 +1,197 @@
+import numpy as np
+
+
+__all__ = (
+    "EARTH_RADIUS_KM", "MERCATOR_MAX_LAT", "haversine_km", "bounding_box", "mercator", "GridIndex", "ClusterGrid"
+)
+
+
+EARTH_RADIUS_KM = 6371.0088
+MERCATOR_MAX_LAT = 85.05112878
+
+
+def haversine_km(x: np.ndarray | float, y: np.ndarray | float, to_x: float, to_y: float) -> np.ndarray:
+    """
+    Расстояние по поверхности Земли в километрах, `x` - долгота, `y` - широта в градусах
+    """
+    x, y, to_x, to_y = map(np.radians, (x, y, to_x, to_y))
+    a = np.sin((to_y - y) / 2) ** 2 + np.cos(y) * np.cos(to_y) * np.sin((to_x - x) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def bounding_box(x: float, y: float, radius_km: float) -> tuple[float, float, float, float]:
+    """
+    Прямоугольник (min_x, min_y, max_x, max_y), содержащий круг радиуса `radius_km`.
+    Если круг захватывает полюс или линию перемены дат, долгота не ограничивается
+    """
+    delta_y = np.degrees(radius_km / EARTH_RADIUS_KM)
+    min_y, max_y = y - delta_y, y + delta_y
+    if min_y <= -90 or max_y >= 90:
+        return -180.0, max(min_y, -90.0), 180.0, min(max_y, 90.0)
+
+    delta_x = np.degrees(np.arcsin(min(np.sin(radius_km / EARTH_RADIUS_KM) / np.cos(np.radians(y)), 1.0)))
+    if x - delta_x < -180 or x + delta_x > 180:
+        return -180.0, min_y, 180.0, max_y
+    return x - delta_x, min_y, x + delta_x, max_y
+
+
+def mercator(x: np.ndarray | float, y: np.ndarray | float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Координаты Web Mercator, нормированные на [0, 1], ось y направлена на юг
+    """
+    lat = np.radians(np.clip(y, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT))
+    mx = (np.asarray(x, dtype=np.float64) + 180) / 360
+    my = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+    return np.clip(mx, 0, 1), np.clip(my, 0, 1)
+
+
+class GridIndex:
+    """
+    Индекс точек по равномерной сетке с ячейками `cell_size` градусов
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell_size: float):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.cell_size = cell_size
+
+        cells = np.stack((self._cell(self.x), self._cell(self.y)), axis=1)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        self._order = order
+        keys, starts = np.unique(cells[order], axis=0, return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self._cells = {(int(cx), int(cy)): (s, e) for (cx, cy), s, e in zip(keys, starts, ends)}
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _cell(self, value):
+        return np.floor(np.asarray(value) / self.cell_size).astype(np.int64)
+
+    def in_box(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """
+        Индексы точек внутри прямоугольника
+        """
+        candidates = self._candidates(min_x, min_y, max_x, max_y)
+        x, y = self.x[candidates], self.y[candidates]
+        return np.sort(candidates[(x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y)])
+
+    def _candidates(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        x_from, x_to = int(self._cell(min_x)), int(self._cell(max_x))
+        y_from, y_to = int(self._cell(min_y)), int(self._cell(max_y))
+        if (x_to - x_from + 1) * (y_to - y_from + 1) > len(self._cells):
+            return np.arange(len(self.x))
+
+        parts = [
+            self._order[slice(*self._cells[(cx, cy)])]
+            for cx in range(x_from, x_to + 1)
+            for cy in range(y_from, y_to + 1)
+            if (cx, cy) in self._cells
+        ]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def query_radius(self, x: float, y: float, radius_km: float, limit: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Индексы не более `limit` ближайших точек в радиусе `radius_km` и расстояния до них, по возрастанию расстояния
+        """
+        candidates = self._candidates(*bounding_box(x, y, radius_km))
+        distances = haversine_km(self.x[candidates], self.y[candidates], x, y)
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+
+        order = np.argsort(distances, kind="stable")[:limit]
+        return candidates[order], distances[order]
+
+
+class ClusterGrid:
+    """
+    Предрассчитанная кластеризация точек по сетке Web Mercator для уровней масштаба от 0 до `max_zoom`.
+    На уровне `z` тайл карты делится на `cells_per_tile` x `cells_per_tile` ячеек.
+    Кластеры содержат только точки внутри запрошенного прямоугольника: ячейки на его границе пересчитываются
+    по точкам, остальные берутся из предрассчитанных
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, max_zoom: int, cells_per_tile: int):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+
+        mx, my = mercator(self.x, self.y)
+        self.levels = []
+        for zoom in range(max_zoom + 1):
+            size = self.grid_size(zoom)
+            keys = self._cell(mx, size) * size + self._cell(my, size)
+            order = np.argsort(keys, kind="stable")
+            cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+            if len(order):
+                sum_x = np.add.reduceat(self.x[order], starts)
+                sum_y = np.add.reduceat(self.y[order], starts)
+            else:
+                sum_x = sum_y = np.empty(0)
+            self.levels.append((cells // size, cells % size, counts, sum_x / counts, sum_y / counts, order, starts))
+
+    def grid_size(self, zoom: int) -> int:
+        return (2 ** zoom) * self.cells_per_tile
+
+    @staticmethod
+    def _cell(value: np.ndarray, size: int) -> np.ndarray:
+        return np.minimum(np.floor(value * size), size - 1).astype(np.int64)
+
+    def query(
+        self,
+        zoom: int,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Кластеры точек внутри прямоугольника: (количество, средние x, y, индекс первой точки).
+        Если `min_x > max_x`, прямоугольник пересекает линию перемены дат
+        """
+        cell_x, cell_y, counts, mean_x, mean_y, order, starts = self.levels[min(zoom, self.max_zoom)]
+        size = self.grid_size(min(zoom, self.max_zoom))
+        (x_from, x_to), (y_to, y_from) = (
+            self._cell(np.array(v), size) for v in mercator(np.array([min_x, max_x]), np.array([min_y, max_y]))
+        )
+
+        # Ячейки отсортированы по x, поэтому диапазон по x находится бинарным поиском
+        if x_from <= x_to:
+            ranges = [(x_from, x_to)]
+        else:
+            ranges = [(x_from, size - 1), (0, x_to)]
+        selected = np.concatenate([
+            np.arange(np.searchsorted(cell_x, a, side="left"), np.searchsorted(cell_x, b, side="right"))
+            for a, b in ranges
+        ]).astype(np.int64)
+        selected = selected[(cell_y[selected] >= y_from) & (cell_y[selected] <= y_to)]
+        counts, mean_x, mean_y, first = counts[selected], mean_x[selected], mean_y[selected], order[starts[selected]]
+
+        edge = np.flatnonzero(
+            np.isin(cell_x[selected], (x_from, x_to)) | np.isin(cell_y[selected], (y_from, y_to))
+        )
+        if len(edge):
+            # Точки граничных ячеек подряд: ячейка `i` занимает order[starts[i]:starts[i] + counts[i]]
+            lengths = counts[edge]
+            offsets = np.cumsum(lengths) - lengths
+            points = order[np.repeat(starts[selected[edge]] - offsets, lengths) + np.arange(lengths.sum())]
+            groups = np.repeat(np.arange(len(edge)), lengths)
+
+            x, y = self.x[points], self.y[points]
+            in_x = (x >= min_x) & (x <= max_x) if min_x <= max_x else (x >= min_x) | (x <= max_x)
+            inside = in_x & (y >= min_y) & (y <= max_y)
+            points, groups = points[inside], groups[inside]
+
+            edge_counts = np.bincount(groups, minlength=len(edge))
+            present = edge_counts > 0
+            # Внутри ячейки точки упорядочены по индексу, первая оставшаяся - с наименьшим
+            _, first_index = np.unique(groups, return_index=True)
+            counts[edge] = edge_counts
+            mean_x[edge[present]] = np.bincount(groups, self.x[points], len(edge))[present] / edge_counts[present]
+            mean_y[edge[present]] = np.bincount(groups, self.y[points], len(edge))[present] / edge_counts[present]
+            first[edge[present]] = points[first_index]
+
+            keep = counts > 0
+            counts, mean_x, mean_y, first = counts[keep], mean_x[keep], mean_y[keep], first[keep]
+        return counts, mean_x, mean_y, first
@@ -0,0 +1,93 @@
+import numpy as np
+
+
+__all__ = ("DAY_SECONDS", "slot_boundaries", "clip_to_open_hours", "open_seconds_by_slots", "coverage_by_slots")
+
+
+DAY_SECONDS = 24 * 3600
+
+
+def slot_boundaries(start: float, end: float, step: int) -> np.ndarray:
+    """
+    Границы слотов длиной `step` секунд, выровненных по UTC, обрезанные по [start, end]
+    """
+    first = np.floor(start / step) * step
+    inner = np.arange(first + step, end, step, dtype=np.float64)
+    return np.concatenate(([start], inner[inner > start], [end]))
+
+
+def clip_to_open_hours(
+    group: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    open_from: np.ndarray,
+    open_till: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Обрезает интервалы по рабочим часам (секунды от начала UTC дня) их дня.
+    Интервал разбивается на части по каждой полуночи, которую он пересекает
+    """
+    first_day = np.floor(start / DAY_SECONDS)
+    days = np.maximum(np.floor(end / DAY_SECONDS) - first_day, 0).astype(np.int64) + 1
+
+    # Части интервала `i` идут подряд: по одной на каждый день от дня начала до дня окончания
+    index = np.repeat(np.arange(len(start)), days)
+    offset = np.arange(len(index)) - np.repeat(np.cumsum(days) - days, days)
+    day = (first_day[index] + offset) * DAY_SECONDS
+
+    starts = np.maximum(start[index], day + open_from[index])
+    ends = np.minimum(np.minimum(end[index], day + DAY_SECONDS), day + open_till[index])
+    ends = np.maximum(ends, starts)
+    return group[index], starts, ends
+
+
+def open_seconds_by_slots(boundaries: np.ndarray, open_from: np.ndarray, open_till: np.ndarray) -> np.ndarray:
+    """
+    Количество рабочих секунд в каждом слоте, матрица (len(open_from), len(boundaries) - 1).
+    Слоты не должны пересекать границу UTC дня
+    """
+    slot_start = boundaries[:-1][None, :]
+    slot_end = boundaries[1:][None, :]
+    day = np.floor(slot_start / DAY_SECONDS) * DAY_SECONDS
+    return np.clip(
+        np.minimum(slot_end, day + open_till[:, None]) - np.maximum(slot_start, day + open_from[:, None]),
+        0,
+        None
+    )
+
+
+def _cumulative_length(group: np.ndarray, points: np.ndarray, n_groups: int, boundaries: np.ndarray) -> np.ndarray:
+    # F_g(B) = sum(B - p) по всем точкам p < B группы g, считается через сортировку и префиксные суммы
+    origin = boundaries[0]
+    span = boundaries[-1] - origin + 1
+    offsets = points - origin
+
+    order = np.lexsort((offsets, group))
+    keys = group[order] * span + offsets[order]
+    prefix = np.concatenate(([0.0], np.cumsum(offsets[order])))
+
+    group_base = np.arange(n_groups) * span
+    query = group_base[:, None] + (boundaries - origin)[None, :]
+    pos = np.searchsorted(keys, query, side="left")
+    base = np.searchsorted(keys, group_base, side="left")[:, None]
+
+    return (pos - base) * (boundaries - origin)[None, :] - (prefix[pos] - prefix[base])
+
+
+def coverage_by_slots(
+    group: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    n_groups: int,
+    boundaries: np.ndarray
+) -> np.ndarray:
+    """
+    Суммарная длина интервалов каждой группы внутри каждого слота, матрица (n_groups, len(boundaries) - 1)
+    """
+    start = np.clip(start, boundaries[0], boundaries[-1])
+    end = np.clip(end, boundaries[0], boundaries[-1])
+    covered = (
+        _cumulative_length(group, start, n_groups, boundaries) -
+        _cumulative_length(group, end, n_groups, boundaries)
+    )
+    return np.diff(covered, axis=1)
@@ -6,11 +6,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.core.application import create_app
 from src.core.db import get_engine
+from src.core.events import event_broker
 from src.enums import AccessLevel
 from src.models import Client
 from src.models.settings import ApplicationGlobalSettings
+from src.repo.client import ClientRepository
 from src.routers import (admin_router, auth_router, building_router, client_router,
                          files_router, place_router, system_router, visitor_router)
+from src.service.client import occupancy_registry
+from src.service.scheduler import booking_scheduler
+from src.service.smtp import email_dispatcher
 
 
 async def create_owner_startup_task():
@@ -55,6 +60,11 @@ async def init_application_settings():
             settings.application_settings[result.key] = result.value
 
 
+async def init_occupancy_registry():
+    async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+        await occupancy_registry.sync(ClientRepository(session))
+
+
 app = create_app(
     routers=[
         place_router,
@@ -69,8 +79,16 @@ app = create_app(
     startup_tasks=[
         create_owner_startup_task,
         init_application_settings,
+        init_occupancy_registry,
+        event_broker.start,
+        email_dispatcher.start,
+        booking_scheduler.start,
+    ],
+    shutdown_tasks=[
+        event_broker.stop,
+        booking_scheduler.stop,
+        email_dispatcher.stop,
     ],
-    shutdown_tasks=[],
     ignoring_log_endpoints=[
         ("/system/ping", "GET"),
         ("/metrics", "GET")
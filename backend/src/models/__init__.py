@@ -3,4 +3,8 @@ from .client import *
 from .place import *
 from .settings import *
 from .visit import *
-from .feedback import *
\ No newline at end of file
+from .feedback import *
+from .stats import *
+from .counters import *
+from .outbox import *
+from .versions import *
\ No newline at end of file
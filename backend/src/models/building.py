@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, Integer, String, func, ARRAY, ForeignKey
+from sqlalchemy import (DDL, BigInteger, Computed, DateTime, FetchedValue, Float, Index, Integer, String, event, func,
+                        ARRAY, ForeignKey)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,8 +12,26 @@ from src.core.db import Base
 __all__ = ("Building", "BuildingFloorImage")
 
 
+# Название и описание разбираются с русской морфологией, адрес - без неё, чтобы не искажались названия улиц
+BUILDING_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(address, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
+
 class Building(Base):
     __tablename__ = "buildings"
+    # Поиск коворкингов в прямоугольнике на карте, если индекс в памяти не используется
+    __table_args__ = (
+        Index("ix_buildings_y_x", "y", "x"),
+        # Полнотекстовый поиск и поиск с опечатками по названию и адресу
+        Index("ix_buildings_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_buildings_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index(
+            "ix_buildings_address_trgm", "address", postgresql_using="gin", postgresql_ops={"address": "gin_trgm_ops"}
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -28,13 +48,30 @@ class Building(Base):
     x: Mapped[float] = mapped_column(Float, nullable=False)
     y: Mapped[float] = mapped_column(Float, nullable=False)
     images_id: Mapped[list[str]] = mapped_column(MutableList.as_mutable(ARRAY(String)), nullable=False)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(BUILDING_SEARCH_VECTOR, persisted=True),
+        deferred=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Версия коворкинга с местами и этажами для ETag и кэша схем, увеличивается триггерами
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default="1",
+        server_onupdate=FetchedValue(),
+        nullable=False,
+        deferred=True
+    )
 
     places = relationship("Place", back_populates="building", cascade="all,delete")
     floors = relationship("BuildingFloorImage", back_populates="building", lazy="selectin", cascade="all,delete")
 
 
+# Операторы триграмм нужны индексам `buildings`, поэтому расширение создаётся до таблиц
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 class BuildingFloorImage(Base):
     __tablename__ = "floor_images"
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, Integer, String, func
+from sqlalchemy import DateTime, Enum, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.db import Base
@@ -12,6 +12,12 @@ __all__ = ("Client",)
 
 class Client(Base):
     __tablename__ = "clients"
+    # Индексы под постраничную выдачу по курсору (поле сортировки, id)
+    __table_args__ = (
+        Index("ix_clients_name_id", "name", "id"),
+        Index("ix_clients_created_at_id", "created_at", "id"),
+        Index("ix_clients_access_level_id", "access_level", "id"),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
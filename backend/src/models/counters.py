@@ -0,0 +1,66 @@
+from sqlalchemy import DDL, BigInteger, SmallInteger, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.db import Base
+
+
+__all__ = ("RowCounter", "ROW_COUNTER_SLOTS", "COUNTED_TABLES")
+
+
+# Счётчик каждой таблицы разбит на несколько строк, чтобы параллельные вставки не конфликтовали на одной строке
+ROW_COUNTER_SLOTS = 16
+COUNTED_TABLES = ("buildings", "clients", "places")
+
+
+class RowCounter(Base):
+    """
+    Количество строк в таблицах из `COUNTED_TABLES`, поддерживается триггерами.
+    Итоговое значение - сумма `row_count` по всем слотам таблицы
+    """
+    __tablename__ = "row_counters"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
+    slot: Mapped[int] = mapped_column(SmallInteger, primary_key=True, nullable=False)
+    row_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
+
+ROW_COUNTER_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION row_counters_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    delta bigint;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM row_counters WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT count(*) INTO delta FROM new_rows;
+    ELSE
+        SELECT -count(*) INTO delta FROM old_rows;
+    END IF;
+    IF delta <> 0 THEN
+        INSERT INTO row_counters (table_name, slot, row_count)
+        VALUES (TG_TABLE_NAME, mod(pg_backend_pid(), {ROW_COUNTER_SLOTS}), delta)
+        ON CONFLICT (table_name, slot) DO UPDATE SET row_count = row_counters.row_count + excluded.row_count;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def row_counter_triggers(table: str) -> list[str]:
+    return [
+        f"CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table} "
+        f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION row_counters_apply()",
+        f"CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION row_counters_apply()",
+        f"CREATE TRIGGER {table}_count_truncate AFTER TRUNCATE ON {table} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION row_counters_apply()",
+    ]
+
+
+# Триггеры создаются после всех таблиц, чтобы `create_all` давал ту же схему, что и миграции
+event.listen(Base.metadata, "after_create", DDL(ROW_COUNTER_FUNCTION))
+for _table in COUNTED_TABLES:
+    for _statement in row_counter_triggers(_table):
+        event.listen(Base.metadata, "after_create", DDL(_statement))
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.db import Base
+
+
+__all__ = ("EmailOutbox",)
+
+
+class EmailOutbox(Base):
+    """
+    Письма к отправке. Записываются в той же транзакции, что и изменения, из-за которых они отправляются,
+    и рассылаются фоновым диспетчером. Письмо отправлено, если заполнено `sent_at`, и отброшено после
+    исчерпания попыток, если заполнено `failed_at`
+    """
+    __tablename__ = "email_outbox"
+    # Очередь неотправленных писем по времени следующей попытки
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("sent_at IS NULL AND failed_at IS NULL")
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True, primary_key=True, nullable=False)
+    receiver: Mapped[str] = mapped_column(String, nullable=False)
+    subject: Mapped[str] = mapped_column(String, nullable=False)
+    body: Mapped[str] = mapped_column(String, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import ARRAY, DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy import (ARRAY, DDL, BigInteger, CheckConstraint, DateTime, Float, ForeignKey, Index, Integer,
+                        SmallInteger, String, event, func)
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -9,11 +10,36 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.core.db import Base
 
 
-__all__ = ("Place",)
+__all__ = ("Place", "PlaceFeature", "MAX_PLACE_FEATURES")
+
+
+# Каждой характеристике соответствует бит в `Place.features_mask`, знаковый bigint вмещает 63 бита
+MAX_PLACE_FEATURES = 63
+
+
+class PlaceFeature(Base):
+    """
+    Справочник характеристик мест, пополняется триггером при сохранении мест с новыми характеристиками
+    """
+    __tablename__ = "place_features"
+    __table_args__ = (
+        CheckConstraint(f"id BETWEEN 1 AND {MAX_PLACE_FEATURES}", name="id_range"),
+    )
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True, autoincrement=False, nullable=False)
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+
+    @property
+    def bit(self) -> int:
+        return 1 << (self.id - 1)
 
 
 class Place(Base, AsyncAttrs):
     __tablename__ = "places"
+    __table_args__ = (
+        Index("ix_places_building_id_floor", "building_id", "floor"),
+        Index("ix_places_features", "features", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -26,7 +52,9 @@ class Place(Base, AsyncAttrs):
     name: Mapped[str] = mapped_column(String, nullable=False)
     floor: Mapped[int] = mapped_column(Integer, nullable=False)
     features: Mapped[list[str]] = mapped_column(MutableList.as_mutable(ARRAY(String)))
-    size: Mapped[float] = mapped_column(Float, default=1)
+    # Биты характеристик из `place_features`, вычисляется триггером по `features`
+    features_mask: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False, deferred=True)
+    size: Mapped[int] = mapped_column(Integer, default=1)
     rotate: Mapped[int] = mapped_column(Integer, default=0)
     x: Mapped[Optional[float]] = mapped_column(Float, nullable=True, default=None)
     y: Mapped[Optional[float]] = mapped_column(Float, nullable=True, default=None)
@@ -35,4 +63,36 @@ class Place(Base, AsyncAttrs):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     building = relationship("Building", back_populates="places")
-    visits = relationship("PlaceVisit", back_populates="place", cascade="all,delete")
\ No newline at end of file
+    visits = relationship("PlaceVisit", back_populates="place", cascade="all,delete")
+
+
+# Новые характеристики получают следующий свободный id под блокировкой справочника,
+# чтобы номера битов шли подряд и не расходовались при конфликтах
+PLACE_FEATURES_FUNCTION = """
+CREATE OR REPLACE FUNCTION places_features_mask() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM unnest(NEW.features) AS f(name)
+        WHERE NOT EXISTS (SELECT 1 FROM place_features pf WHERE pf.name = f.name)
+    ) THEN
+        LOCK TABLE place_features IN SHARE ROW EXCLUSIVE MODE;
+        INSERT INTO place_features (id, name)
+        SELECT (SELECT coalesce(max(id), 0) FROM place_features) + row_number() OVER (ORDER BY f.name), f.name
+        FROM (SELECT DISTINCT name FROM unnest(NEW.features) AS u(name)) AS f
+        WHERE NOT EXISTS (SELECT 1 FROM place_features pf WHERE pf.name = f.name);
+    END IF;
+    NEW.features_mask := coalesce(
+        (SELECT bit_or(1::bigint << (pf.id - 1)) FROM place_features pf WHERE pf.name = ANY(NEW.features)),
+        0
+    );
+    RETURN NEW;
+END
+$$
+"""
+PLACE_FEATURES_TRIGGER = (
+    "CREATE TRIGGER places_features_mask BEFORE INSERT OR UPDATE OF features ON places "
+    "FOR EACH ROW EXECUTE FUNCTION places_features_mask()"
+)
+
+event.listen(Base.metadata, "after_create", DDL(PLACE_FEATURES_FUNCTION))
+event.listen(Base.metadata, "after_create", DDL(PLACE_FEATURES_TRIGGER))
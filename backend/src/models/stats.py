@@ -0,0 +1,67 @@
+from datetime import date
+
+from sqlalchemy import Date, Float, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.db import Base
+
+
+__all__ = ("BookingDailyStats", "PlaceStats", "RATINGS")
+
+
+RATINGS = range(1, 6)
+
+
+class BookingDailyStats(Base):
+    __tablename__ = "booking_daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True, nullable=False)
+    building_id: Mapped[int] = mapped_column(
+        ForeignKey("buildings.id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False
+    )
+    place_id: Mapped[int] = mapped_column(
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False
+    )
+
+    bookings_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    visited_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    feedback_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    booked_minutes: Mapped[float] = mapped_column(Float, default=0, server_default="0", nullable=False)
+    visited_minutes: Mapped[float] = mapped_column(Float, default=0, server_default="0", nullable=False)
+
+
+class PlaceStats(Base):
+    """
+    Накопительные счётчики по месту за всё время, обновляются в той же транзакции, что и брони и отзывы.
+    Распределение оценок хранится в колонках `rating_1` ... `rating_5`
+    """
+    __tablename__ = "place_stats"
+    # Самые популярные места для дашборда
+    __table_args__ = (
+        Index("ix_place_stats_bookings_count", "bookings_count"),
+    )
+
+    place_id: Mapped[int] = mapped_column(
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False
+    )
+    building_id: Mapped[int] = mapped_column(
+        ForeignKey("buildings.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False
+    )
+
+    bookings_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    visited_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    feedback_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_1: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_2: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_3: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_4: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    rating_5: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
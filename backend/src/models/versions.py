@@ -0,0 +1,99 @@
+from sqlalchemy import DDL, BigInteger, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.db import Base
+
+
+__all__ = ("DataVersion", "BUILDINGS_LIST_VERSION")
+
+
+BUILDINGS_LIST_VERSION = "buildings"
+
+
+class DataVersion(Base):
+    """
+    Версии наборов данных для ETag и кэшей воркеров, увеличиваются триггерами в транзакции изменения.
+    Строка версии блокируется до коммита, поэтому закоммиченные версии растут в порядке коммитов,
+    в отличие от `now()`, которое возвращает время начала транзакции
+    """
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True, nullable=False)
+    version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
+
+# Версия коворкинга растёт при изменении его полей. Генерируемые колонки в BEFORE-триггере ещё не вычислены,
+# поэтому не сравниваются
+BUILDING_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION buildings_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'version' - 'search_vector') IS DISTINCT FROM (to_jsonb(OLD) - 'version' - 'search_vector')
+    THEN
+        NEW.version := OLD.version + 1;
+    END IF;
+    RETURN NEW;
+END
+$$
+"""
+
+# Версия списка коворкингов растёт при добавлении, удалении и изменении полей, но не при смене одной версии
+BUILDINGS_LIST_VERSION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION buildings_list_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NOT EXISTS (
+            SELECT 1 FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (to_jsonb(n) - 'version') IS DISTINCT FROM (to_jsonb(o) - 'version')
+        ) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO data_versions (name, version) VALUES ('{BUILDINGS_LIST_VERSION}', 1)
+    ON CONFLICT (name) DO UPDATE SET version = data_versions.version + 1;
+    RETURN NULL;
+END
+$$
+"""
+
+# Изменение мест и этажей увеличивает версию их коворкинга, по ней проверяется схема
+BUILDING_TOUCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION buildings_touch_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE buildings SET version = version + 1 WHERE id IN (SELECT building_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE buildings SET version = version + 1 WHERE id IN (SELECT building_id FROM old_rows);
+    ELSE
+        UPDATE buildings SET version = version + 1
+        WHERE id IN (SELECT building_id FROM old_rows UNION SELECT building_id FROM new_rows);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def statement_triggers(table: str, name: str, function: str) -> list[str]:
+    return [
+        f"CREATE TRIGGER {table}_{name}_insert AFTER INSERT ON {table} "
+        f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        f"CREATE TRIGGER {table}_{name}_update AFTER UPDATE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        f"CREATE TRIGGER {table}_{name}_delete AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+    ]
+
+
+VERSION_TRIGGERS = [
+    "CREATE TRIGGER buildings_version BEFORE UPDATE ON buildings FOR EACH ROW EXECUTE FUNCTION buildings_version()",
+    *statement_triggers("buildings", "list_version", "buildings_list_version"),
+    *statement_triggers("places", "building_version", "buildings_touch_version"),
+    *statement_triggers("floor_images", "building_version", "buildings_touch_version"),
+]
+
+
+VERSION_FUNCTIONS = [BUILDING_VERSION_FUNCTION, BUILDINGS_LIST_VERSION_FUNCTION, BUILDING_TOUCH_FUNCTION]
+
+# Триггеры создаются после всех таблиц, чтобы `create_all` давал ту же схему, что и миграции
+for _statement in (*VERSION_FUNCTIONS, *VERSION_TRIGGERS):
+    event.listen(Base.metadata, "after_create", DDL(_statement))
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, func, Boolean
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, func, text, Boolean
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,22 @@ __all__ = ("PlaceVisit",)
 
 class PlaceVisit(Base, AsyncAttrs):
     __tablename__ = "visitors"
+    __table_args__ = (
+        # Текущие посещения для реестра заполненности коворкингов
+        Index("ix_visitors_visited_till", "visit_till", postgresql_where=text("is_visited")),
+        # История броней клиента с постраничным выводом по (visit_from, id)
+        Index("ix_visitors_client_id_visit_from", "client_id", "visit_from", "id"),
+        # Брони по времени начала для напоминаний
+        Index("ix_visitors_visit_from", "visit_from", "id"),
+        # Неотмеченные брони без флага неявки для поиска неявок
+        Index(
+            "ix_visitors_unmarked_visit_from",
+            "visit_from",
+            postgresql_where=text("NOT is_visited AND NOT is_no_show")
+        ),
+        # Неотмеченные брони, которые ещё не закончились, для освобождения мест при неявке
+        Index("ix_visitors_not_visited_till", "visit_till", postgresql_where=text("NOT is_visited")),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -30,6 +46,11 @@ class PlaceVisit(Base, AsyncAttrs):
 
     is_visited: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_feedbacked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Клиент не пришёл: бронь не отмечена спустя `no_show_after` минут после начала
+    is_no_show: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false", nullable=False)
+    # Время постановки напоминания в очередь писем, брони без него попадают в рассылку,
+    # даже если созданы незадолго до начала
+    reminded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     client = relationship("Client", lazy="selectin")
     place = relationship("Place")
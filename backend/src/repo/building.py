@@ -1,15 +1,21 @@
 from typing import Annotated, List
 
 from fastapi import Depends
-from sqlalchemy import select
+import math
+import re
+
+from sqlalchemy import Row, and_, func, literal, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql.functions import func
 
 from src.core.db import SessionDep
-from src.models import Building
+from src.core.utils import MERCATOR_MAX_LAT
+from src.models import BUILDINGS_LIST_VERSION, Building, DataVersion
+from src.repo.counting import CounterRowCount
+from src.repo.pagination import keyset_page
 
 
 class BuildingRepository:
+    row_count = CounterRowCount(Building)
 
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -31,11 +37,105 @@ class BuildingRepository:
     async def find_all(self, limit: int, offset: int) -> (List[Building], int):
         query = select(Building).limit(limit).offset(offset)
         result = await self.session.scalars(query)
-        count_query = select(func.count()).select_from(Building)
-        cnt = await self.session.execute(count_query)
-        total_count = cnt.scalar()
+        total_count = await self.row_count.count(self.session)
         return list(result.all()), total_count
 
+    async def find_page(self, limit: int, cursor: str | None = None) -> tuple[list[Building], str | None]:
+        return await keyset_page(self.session, select(Building), Building.id, Building.id, limit, cursor)
+
+    async def count(self) -> int:
+        return await self.row_count.count(self.session)
+
+    async def get_by_ids(self, building_ids: list[int]) -> list[Building]:
+        return list(await self.session.scalars(
+            select(Building).filter(Building.id.in_(building_ids))
+        ))
+
+    async def get_coordinates(self) -> list[Row]:
+        # По возрастанию id, чтобы первая точка кластера в памяти совпадала с `min(id)` в `cluster_in_box`
+        return list(await self.session.execute(select(Building.id, Building.x, Building.y).order_by(Building.id)))
+
+    @staticmethod
+    def _in_box(min_x: float, min_y: float, max_x: float, max_y: float):
+        # min_x > max_x означает, что прямоугольник пересекает линию перемены дат
+        x_filter = Building.x.between(min_x, max_x) if min_x <= max_x else or_(Building.x >= min_x, Building.x <= max_x)
+        return and_(Building.y.between(min_y, max_y), x_filter)
+
+    async def find_in_box(self, min_x: float, min_y: float, max_x: float, max_y: float) -> list[Building]:
+        return list(await self.session.scalars(
+            select(Building).filter(self._in_box(min_x, min_y, max_x, max_y))
+        ))
+
+    async def cluster_in_box(
+        self,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float,
+        grid_size: int
+    ) -> list[Row]:
+        """
+        Кластеры коворкингов внутри прямоугольника по сетке Web Mercator `grid_size` x `grid_size`
+        """
+        lat = func.radians(func.least(func.greatest(Building.y, -MERCATOR_MAX_LAT), MERCATOR_MAX_LAT))
+        cell_x = func.least(func.floor((Building.x + 180) / 360 * grid_size), grid_size - 1)
+        cell_y = func.least(
+            func.floor((1 - func.ln(func.tan(lat) + 1 / func.cos(lat)) / math.pi) / 2 * grid_size),
+            grid_size - 1
+        )
+        return list(await self.session.execute(
+            select(
+                func.count().label("count"),
+                func.avg(Building.x).label("x"),
+                func.avg(Building.y).label("y"),
+                func.min(Building.id).label("building_id"),
+            )
+            .filter(self._in_box(min_x, min_y, max_x, max_y))
+            .group_by(cell_x, cell_y)
+        ))
+
+    async def search(self, text: str, limit: int) -> list[Building]:
+        """
+        Коворкинги, у которых название, адрес или описание совпадают с `text`, по убыванию релевантности.
+        Слова ищутся по префиксу, опечатки в названии и адресе находятся по триграммам
+        """
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+        prefix_query = " & ".join(f"{word}:*" for word in words)
+        ts_query = func.to_tsquery("russian", prefix_query).op("||")(func.to_tsquery("simple", prefix_query))
+        text = " ".join(words)
+
+        similarity = func.greatest(
+            func.word_similarity(text, Building.name),
+            func.word_similarity(text, Building.address)
+        )
+        rank = func.ts_rank(Building.search_vector, ts_query) + similarity
+        return list(await self.session.scalars(
+            select(Building)
+            .filter(or_(
+                Building.search_vector.op("@@")(ts_query),
+                literal(text).op("<%")(Building.name),
+                literal(text).op("<%")(Building.address),
+            ))
+            .order_by(rank.desc(), Building.id)
+            .limit(limit)
+        ))
+
+    async def get_version(self, building_id: int) -> int | None:
+        return await self.session.scalar(
+            select(Building.version).filter(Building.id == building_id)
+        )
+
+    async def get_list_version(self) -> tuple[int, int]:
+        """
+        Версия списка коворкингов и их количество
+        """
+        version = await self.session.scalar(
+            select(DataVersion.version).filter(DataVersion.name == BUILDINGS_LIST_VERSION)
+        )
+        return version or 0, await self.count()
+
 
 async def create_building_repository(session: SessionDep) -> BuildingRepository:
     return BuildingRepository(session)
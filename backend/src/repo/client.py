@@ -1,25 +1,38 @@
-from datetime import datetime
 from typing import Annotated, Optional
 
 from fastapi import Depends
-from sqlalchemy import desc, select, update
-from sqlalchemy import and_, desc, select
+from sqlalchemy import Integer, Row, String, cast, column, func, literal_column, select, table, text, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from src.core.db import SessionDep
+from src.core.exc import BadRequestError
+from src.core.responses import construct
 from src.enums import AccessLevel
-from src.models import Client, PlaceVisit
+from src.models import Client, Place, PlaceVisit
+from src.repo.counting import CounterRowCount
+from src.repo.pagination import keyset_page
 
 
-__all__ = ("ClientRepository", "ClientRepoDep")
+__all__ = ("ClientRepository", "ClientRepoDep", "CLIENT_SORT_FIELDS")
 
 from src.schemes import PlaceDTO
 from src.schemes.client import ClientCurrentVisitDTO
 
 
+CLIENT_SORT_FIELDS = ("id", "name", "email", "created_at")
+
+_client_import = table(
+    "client_import",
+    column("line", Integer),
+    column("email", String),
+    column("name", String),
+    column("access_level", String)
+)
+
+
 class ClientRepository:
+    row_count = CounterRowCount(Client)
 
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -66,24 +79,69 @@ class ClientRepository:
         ).returning(Client)
         return await self.session.scalar(stmt)
 
-    async def find_all(self, limit: int = 100, offset: int = 0, order_by: str = "id") -> list[Client]:
-        query = select(Client)
+    async def bulk_upsert(self, clients: list[tuple[str, str, AccessLevel]]) -> list[Row]:
+        """
+        Загрузка клиентов через `COPY` во временную таблицу и слияние с `clients` одним запросом.
+        У существующего клиента имя обновляется, только если оно задано в файле, пароль, в отличие от `insert`,
+        не меняется, а уровень доступа только повышается. Для повторяющихся email берётся последняя строка.
+        Возвращает email, признак новой записи и признак того, что клиент ещё не зарегистрировался
+        """
+        await self.session.execute(text(
+            "CREATE TEMPORARY TABLE client_import "
+            "(line integer, email text, name text, access_level text) ON COMMIT DROP"
+        ))
+        connection = await (await self.session.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            _client_import.name,
+            records=[(line, email, name, level.name) for line, (email, name, level) in enumerate(clients)],
+            columns=[column.name for column in _client_import.columns]
+        )
 
-        if order_by.startswith("-"):
-            field_name = order_by[1:]
-            if hasattr(Client, field_name):
-                query = query.order_by(desc(getattr(Client, field_name)))
-        else:
-            if hasattr(Client, order_by):
-                query = query.order_by(getattr(Client, order_by))
+        staged = _client_import.c
+        rows = (
+            select(staged.email, staged.name, cast(staged.access_level, Client.access_level.type))
+            .distinct(staged.email)
+            .order_by(staged.email, staged.line.desc())
+        )
+        stmt = insert(Client).from_select(["email", "name", "access_level"], rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Client.email],
+            set_={
+                "name": func.coalesce(func.nullif(stmt.excluded.name, ""), Client.name),
+                "access_level": func.greatest(Client.access_level, stmt.excluded.access_level)
+            }
+        ).returning(
+            Client.email,
+            literal_column("xmax = 0").label("is_created"),
+            Client.password.is_(None).label("is_invited")
+        )
+        return list(await self.session.execute(stmt))
 
-        query = query.limit(limit).offset(offset)
+    async def find_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        order_by: str = "id",
+        access_level: AccessLevel | None = None
+    ) -> tuple[list[Client], str | None]:
+        """
+        Страница клиентов по курсору, `order_by` - поле из `CLIENT_SORT_FIELDS`, с `-` для обратного порядка
+        """
+        descending = order_by.startswith("-")
+        field_name = order_by.removeprefix("-")
+        if field_name not in CLIENT_SORT_FIELDS:
+            raise BadRequestError(f"Unknown sort field {field_name}")
 
-        result = await self.session.scalars(query)
-        return list(result.all())
+        query = select(Client)
+        if access_level is not None:
+            query = query.filter(Client.access_level == access_level)
+        sort_column = getattr(Client, field_name)
+        # email уникален, поэтому id для однозначного порядка не нужен и хватает уникального индекса
+        id_column = Client.email if field_name == "email" else Client.id
+        return await keyset_page(self.session, query, sort_column, id_column, limit, cursor, descending=descending)
 
     async def find_all_access_level_filter(self, access_level: AccessLevel) -> list[Client]:
-        query = select(Client).where(Client.access_level == access_level)
+        query = select(Client).where(Client.access_level == access_level).order_by(Client.id)
         result = await self.session.scalars(query)
         return list(result.all())
 
@@ -98,41 +156,34 @@ class ClientRepository:
         )
 
     async def get_currently_visiting_clients_with_places(self) -> list[ClientCurrentVisitDTO]:
-        now = datetime.now()
-
+        """
+        Посещения, которые идут сейчас, упорядоченные по коворкингу, этажу и брони.
+        Использует частичный индекс `ix_visitors_visited_till`
+        """
+        now = func.now()
         query = (
-            select(Client, PlaceVisit)
-            .join(PlaceVisit, Client.id == PlaceVisit.client_id)
-            .options(selectinload(PlaceVisit.place))
-            .where(
-                and_(
-                    PlaceVisit.is_visited == True,
-                    PlaceVisit.visit_from <= now,
-                    PlaceVisit.visit_till >= now
-                )
+            select(PlaceVisit, Client.name, Place)
+            .join(Client, Client.id == PlaceVisit.client_id)
+            .join(Place, Place.id == PlaceVisit.place_id)
+            .filter(
+                PlaceVisit.is_visited == True,
+                PlaceVisit.visit_till >= now,
+                PlaceVisit.visit_from <= now
             )
+            .order_by(Place.building_id, Place.floor, PlaceVisit.id)
         )
-
-        result = await self.session.execute(query)
-        rows = result.all()
-
-        client_visits = []
-        for client, visit in rows:
-            dto = ClientCurrentVisitDTO(
-                id=client.id,
-                name=client.name,
+        return [
+            ClientCurrentVisitDTO(
+                id=visit.client_id,
+                name=name,
                 visit_id=visit.id,
                 visit_from=visit.visit_from,
                 visit_till=visit.visit_till,
                 is_feedbacked=visit.is_feedbacked,
-                place=PlaceDTO(
-                    id=visit.place.id,
-                    name=visit.place.name,
-                )
+                place=construct(PlaceDTO, place)
             )
-            client_visits.append(dto)
-
-        return client_visits
+            for visit, name, place in await self.session.execute(query)
+        ]
 
 
 def create_client_repository(session: SessionDep) -> ClientRepository:
@@ -0,0 +1,127 @@
+import time
+from abc import ABC, abstractmethod
+
+from sqlalchemy import BigInteger, ColumnElement, case, cast, column, func, literal, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+
+from src.models import RowCounter
+
+
+__all__ = ("RowCount", "QueryRowCount", "CounterRowCount", "EstimatedRowCount", "CachedRowCount")
+
+
+_pg_class = table("pg_class", column("oid"), column("reltuples"))
+
+
+class RowCount(ABC):
+    """
+    Стратегия подсчёта количества строк в таблице модели
+    """
+
+    def __init__(self, model: type[DeclarativeBase]):
+        self.model = model
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    @abstractmethod
+    def expression(self) -> ColumnElement[int]:
+        """
+        Скалярное SQL-выражение с количеством строк, позволяет получить несколько количеств одним запросом
+        """
+        ...
+
+    async def count(self, session: AsyncSession) -> int:
+        return await session.scalar(select(self.expression()))
+
+
+class QueryRowCount(RowCount):
+    """
+    Точный `count(*)` по всей таблице
+    """
+
+    def expression(self) -> ColumnElement[int]:
+        return select(func.count()).select_from(self.model).scalar_subquery()
+
+
+class CounterRowCount(RowCount):
+    """
+    Точное значение из `row_counters`, таблица должна быть в `COUNTED_TABLES`
+    """
+
+    def expression(self) -> ColumnElement[int]:
+        return (
+            select(cast(func.coalesce(func.sum(RowCounter.row_count), 0), BigInteger))
+            .filter(RowCounter.table_name == self.table_name)
+            .scalar_subquery()
+        )
+
+
+class EstimatedRowCount(RowCount):
+    """
+    Оценка планировщика из `pg_class.reltuples`.
+    Если таблица ещё не анализировалась или оценка меньше `threshold`, используется `fallback`
+    """
+
+    def __init__(self, model: type[DeclarativeBase], threshold: int, fallback: RowCount):
+        super().__init__(model)
+        self.threshold = threshold
+        self.fallback = fallback
+
+    def _estimate(self) -> ColumnElement[float]:
+        return (
+            select(_pg_class.c.reltuples)
+            .filter(_pg_class.c.oid == func.to_regclass(self.table_name))
+            .scalar_subquery()
+        )
+
+    def expression(self) -> ColumnElement[int]:
+        # Подзапрос `fallback` в ветке CASE выполняется, только если до неё дошло
+        estimate = self._estimate()
+        return case(
+            (estimate >= self.threshold, cast(estimate, BigInteger)),
+            else_=self.fallback.expression()
+        )
+
+    async def count(self, session: AsyncSession) -> int:
+        estimate = await session.scalar(select(self._estimate()))
+        if estimate is None or estimate < self.threshold:
+            return await self.fallback.count(session)
+        return int(estimate)
+
+
+class CachedRowCount(RowCount):
+    """
+    Значение `inner`, закэшированное в памяти воркера на `ttl` секунд.
+    Пока значение свежее, `expression` подставляет его в запрос константой; значение, полученное
+    из запроса с `inner.expression()`, сохраняется через `store`
+    """
+
+    def __init__(self, inner: RowCount, ttl: float):
+        super().__init__(inner.model)
+        self.inner = inner
+        self.ttl = ttl
+        self._value: int | None = None
+        self._updated_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return self._value is not None and time.monotonic() - self._updated_at < self.ttl
+
+    def expression(self) -> ColumnElement[int]:
+        if self._is_fresh():
+            return literal(self._value, BigInteger)
+        return self.inner.expression()
+
+    def store(self, value: int) -> None:
+        self._value = int(value)
+        self._updated_at = time.monotonic()
+
+    async def count(self, session: AsyncSession) -> int:
+        if not self._is_fresh():
+            self.store(await self.inner.count(session))
+        return self._value
+
+    def invalidate(self) -> None:
+        self._value = None
@@ -0,0 +1,69 @@
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Building, Client, Feedback, Place, PlaceVisit
+
+
+__all__ = ("ExportRepository",)
+
+
+class ExportRepository:
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _stream(self, query: Select, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        result = await self.session.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions(batch_size):
+            yield partition
+
+    def stream_visits(self, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(
+                PlaceVisit.id,
+                PlaceVisit.client_id,
+                Client.name.label("client_name"),
+                Client.email.label("client_email"),
+                Place.building_id,
+                Building.name.label("building_name"),
+                PlaceVisit.place_id,
+                Place.name.label("place_name"),
+                Place.floor,
+                PlaceVisit.visit_from,
+                PlaceVisit.visit_till,
+                PlaceVisit.created_at,
+                PlaceVisit.is_visited,
+                PlaceVisit.is_feedbacked,
+            )
+            .join(Client, PlaceVisit.client_id == Client.id)
+            .join(Place, PlaceVisit.place_id == Place.id)
+            .join(Building, Place.building_id == Building.id)
+            .order_by(PlaceVisit.id)
+        )
+        return self._stream(query, batch_size)
+
+    def stream_feedbacks(self, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(
+                Feedback.id,
+                Feedback.visit_id,
+                PlaceVisit.client_id,
+                Client.name.label("client_name"),
+                Client.email.label("client_email"),
+                Place.building_id,
+                Building.name.label("building_name"),
+                PlaceVisit.place_id,
+                Place.name.label("place_name"),
+                Feedback.rating,
+                Feedback.text,
+                Feedback.created_at,
+            )
+            .join(PlaceVisit, Feedback.visit_id == PlaceVisit.id)
+            .join(Client, PlaceVisit.client_id == Client.id)
+            .join(Place, PlaceVisit.place_id == Place.id)
+            .join(Building, Place.building_id == Building.id)
+            .order_by(Feedback.id)
+        )
+        return self._stream(query, batch_size)
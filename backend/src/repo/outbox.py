@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import EmailOutbox
+
+
+__all__ = ("EmailOutboxRepository",)
+
+
+class EmailOutboxRepository:
+    """
+    Очередь писем. Письмо выдаётся диспетчеру с арендой на `lease`: если воркер упадёт во время отправки,
+    после окончания аренды письмо выдастся снова, поэтому доставка - «хотя бы один раз»
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(self, messages: list[tuple[str, str, str]]) -> None:
+        """
+        Постановка писем (получатель, тема, тело) в очередь в текущей транзакции
+        """
+        if messages:
+            await self.session.execute(
+                insert(EmailOutbox),
+                [{"receiver": receiver, "subject": subject, "body": body} for receiver, subject, body in messages]
+            )
+
+    async def claim(self, limit: int, lease: timedelta) -> list[EmailOutbox]:
+        """
+        Выдача до `limit` писем, время отправки которых наступило. Письма, взятые другими воркерами, пропускаются
+        """
+        pending = (
+            select(EmailOutbox.id)
+            .filter(
+                EmailOutbox.sent_at.is_(None),
+                EmailOutbox.failed_at.is_(None),
+                EmailOutbox.next_attempt_at <= func.now()
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(await self.session.scalars(
+            update(EmailOutbox)
+            .filter(EmailOutbox.id.in_(pending.scalar_subquery()))
+            .values(next_attempt_at=func.now() + lease, attempts=EmailOutbox.attempts + 1)
+            .returning(EmailOutbox)
+            .execution_options(populate_existing=True)
+        ))
+
+    async def mark_sent(self, ids: list[int]) -> None:
+        if ids:
+            await self.session.execute(
+                update(EmailOutbox).filter(EmailOutbox.id.in_(ids)).values(sent_at=func.now(), last_error=None)
+            )
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: timedelta | None) -> None:
+        """
+        Неудачная попытка: следующая через `retry_in`, либо письмо отбрасывается, если `retry_in` не задан
+        """
+        values = {"last_error": error}
+        if retry_in is None:
+            values["failed_at"] = func.now()
+        else:
+            values["next_attempt_at"] = func.now() + retry_in
+        await self.session.execute(update(EmailOutbox).filter(EmailOutbox.id == message_id).values(**values))
@@ -0,0 +1,77 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, TypeVar
+
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.core.exc import BadRequestError
+
+
+__all__ = ("encode_cursor", "decode_cursor", "keyset_page")
+
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: list[Any]) -> str:
+    raw = json.dumps(values, default=lambda v: v.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise BadRequestError("Invalid cursor")
+    if not isinstance(values, list):
+        raise BadRequestError("Invalid cursor")
+    return values
+
+
+def _cursor_value(column: InstrumentedAttribute, value: Any):
+    if value is not None and column.type.python_type is datetime:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise BadRequestError("Invalid cursor")
+    return literal(value, column.type)
+
+
+async def keyset_page(
+    session: AsyncSession,
+    query: Select[tuple[T]],
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    limit: int,
+    cursor: str | None = None,
+    descending: bool = False
+) -> tuple[list[T], str | None]:
+    """
+    Страница выборки, упорядоченной по (`sort_column`, `id_column`), начиная после позиции из `cursor`.
+    Возвращает элементы и курсор следующей страницы, `None` если страница последняя.
+    Курсор хранит поле и направление сортировки и не принимается для другой сортировки.
+    Для быстрого поиска позиции нужен индекс по (`sort_column`, `id_column`)
+    """
+    keys = (sort_column,) if sort_column is id_column else (sort_column, id_column)
+    position = tuple_(*keys)
+
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys) + 2 or values[:2] != [sort_column.key, descending]:
+            raise BadRequestError("Invalid cursor")
+        after = tuple_(*(_cursor_value(column, value) for column, value in zip(keys, values[2:])))
+        query = query.filter(position < after if descending else position > after)
+
+    order = [column.desc() if descending else column for column in keys]
+    result = await session.execute(query.order_by(*order).limit(limit + 1))
+    # Для выборки одной сущности - объекты, для проекции нескольких колонок - строки
+    items = list(result.scalars() if len(query.column_descriptions) == 1 else result)
+
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor([sort_column.key, descending, *(getattr(items[-1], column.key) for column in keys)])
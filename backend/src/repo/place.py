@@ -2,18 +2,38 @@ from datetime import datetime
 from typing import Annotated, List
 
 from fastapi import Depends
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import ColumnElement, Row, and_, delete, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, lazyload
 
+from src.config import settings
 from src.core.db import SessionDep
 from src.core.exc import NotFoundError
-from src.models import BuildingFloorImage, Feedback, Place, PlaceVisit
+from src.models import Building, BuildingFloorImage, Client, Feedback, Place, PlaceFeature, PlaceVisit
+from src.schemes import VisitStatus
+from src.repo.counting import CachedRowCount, CounterRowCount, EstimatedRowCount, QueryRowCount
+from src.repo.pagination import keyset_page
+from src.repo.render import file_url, json_array, json_object, render_json
+from src.repo.stats import BookingStatsRepository
 
 
 class PlaceRepository:
+    place_count = CounterRowCount(Place)
+    # Брони - самая нагруженная на запись таблица, поэтому счётчик для неё не ведётся,
+    # а точный подсчёт ниже порога не повторяется чаще раза в `row_count_cache_ttl` секунд
+    visit_count = CachedRowCount(
+        EstimatedRowCount(
+            PlaceVisit,
+            threshold=settings.row_count_estimate_threshold,
+            fallback=QueryRowCount(PlaceVisit)
+        ),
+        ttl=settings.row_count_cache_ttl
+    )
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.stats = BookingStatsRepository(session)
 
     async def get_by_id(self, place_id: int) -> Place:
         return await self.session.scalar(
@@ -25,6 +45,65 @@ class PlaceRepository:
             select(Place).filter(Place.building_id == building_id)
         ))
 
+    async def get_floors_with_places(
+        self,
+        building_id: int,
+        floor: int | None = None
+    ) -> list[tuple[BuildingFloorImage, list[Place]]]:
+        """
+        Этажи коворкинга (или один этаж) вместе с местами на них, одним запросом, по возрастанию номера этажа
+        """
+        query = (
+            select(BuildingFloorImage, Place)
+            .outerjoin(Place, and_(
+                Place.building_id == BuildingFloorImage.building_id,
+                Place.floor == BuildingFloorImage.floor
+            ))
+            .filter(BuildingFloorImage.building_id == building_id)
+            .order_by(BuildingFloorImage.floor, Place.id)
+        )
+        if floor is not None:
+            query = query.filter(BuildingFloorImage.floor == floor)
+
+        # Строки упорядочены по этажу, поэтому группировка идёт за один проход
+        floors: list[tuple[BuildingFloorImage, list[Place]]] = []
+        for floor_image, place in await self.session.execute(query):
+            if not floors or floors[-1][0] is not floor_image:
+                floors.append((floor_image, []))
+            if place is not None:
+                floors[-1][1].append(place)
+        return floors
+
+    async def get_features(self) -> list[PlaceFeature]:
+        return list(await self.session.scalars(select(PlaceFeature).order_by(PlaceFeature.id)))
+
+    async def count_features(self) -> int:
+        return await self.session.scalar(select(func.count()).select_from(PlaceFeature))
+
+    async def get_feature_bits(self, names: list[str]) -> dict[str, int]:
+        features = await self.session.scalars(select(PlaceFeature).filter(PlaceFeature.name.in_(names)))
+        return {feature.name: feature.bit for feature in features}
+
+    async def search_by_features(
+        self,
+        required_mask: int,
+        excluded_mask: int,
+        building_id: int,
+        floor: int | None = None
+    ) -> list[Place]:
+        """
+        Места коворкинга (или его этажа), у которых есть все характеристики из `required_mask` и нет ни одной
+        из `excluded_mask`
+        """
+        query = select(Place).filter(Place.building_id == building_id)
+        if floor is not None:
+            query = query.filter(Place.floor == floor)
+        if required_mask:
+            query = query.filter(Place.features_mask.op("&")(required_mask) == required_mask)
+        if excluded_mask:
+            query = query.filter(Place.features_mask.op("&")(excluded_mask) == 0)
+        return list(await self.session.scalars(query.order_by(Place.id)))
+
     async def bulk_insert(self, places: List[Place]) -> List[Place]:
         self.session.add_all(places)
         await self.session.flush()
@@ -69,12 +148,71 @@ class PlaceRepository:
         self.session.add(v)
         await self.session.flush()
         await self.session.refresh(v)
+        await self.stats.add_booking(v)
         return v
 
+    async def mark_visit(self, visit: PlaceVisit) -> None:
+        if visit.is_visited:
+            return
+        visit.is_visited = True
+        visit.is_no_show = False
+        await self.stats.add_visited(visit)
+
     async def delete_visit(self, visit_id: int) -> None:
-        await self.session.execute(
-            delete(PlaceVisit).filter(PlaceVisit.id == visit_id)
+        ratings = list(await self.session.scalars(select(Feedback.rating).filter(Feedback.visit_id == visit_id)))
+        visit = (await self.session.execute(
+            delete(PlaceVisit)
+            .filter(PlaceVisit.id == visit_id)
+            .returning(PlaceVisit.place_id, PlaceVisit.visit_from, PlaceVisit.visit_till, PlaceVisit.is_visited)
+        )).one_or_none()
+        if visit:
+            await self.stats.remove_booking(
+                visit.place_id,
+                visit.visit_from,
+                visit.visit_till,
+                visit.is_visited,
+                ratings
+            )
+
+    async def release_no_shows(self, started_before: datetime, now: datetime, limit: int) -> list[Row]:
+        """
+        Укорачивает до `now` до `limit` неотмеченных броней, начавшихся раньше `started_before`, и помечает их неявками.
+        Брони, заблокированные другими транзакциями, пропускаются до следующего прохода.
+        Использует частичный индекс `ix_visitors_not_visited_till`
+        """
+        batch = (
+            select(PlaceVisit.id, PlaceVisit.visit_till, Place.building_id, Place.floor)
+            .join(Place, Place.id == PlaceVisit.place_id)
+            .filter(
+                PlaceVisit.is_visited == False,
+                PlaceVisit.visit_till > now,
+                PlaceVisit.visit_from <= started_before
+            )
+            .order_by(PlaceVisit.visit_till)
+            .limit(limit)
+            .with_for_update(of=PlaceVisit, skip_locked=True)
+            .cte("batch")
         )
+        released = list(await self.session.execute(
+            update(PlaceVisit)
+            .filter(PlaceVisit.id == batch.c.id)
+            .values(visit_till=now, is_no_show=True)
+            .returning(
+                PlaceVisit.id,
+                PlaceVisit.place_id,
+                PlaceVisit.visit_from,
+                PlaceVisit.visit_till,
+                batch.c.visit_till.label("booked_till"),
+                batch.c.building_id,
+                batch.c.floor
+            )
+            .execution_options(synchronize_session=False)
+        ))
+        await self.stats.truncate_bookings([
+            (visit.building_id, visit.place_id, visit.visit_from, (visit.booked_till - now).total_seconds() / 60)
+            for visit in released
+        ])
+        return released
 
     async def is_place_floor_exists(self, building_id: int, floor: int) -> bool:
         return await self.session.scalar(
@@ -87,9 +225,10 @@ class PlaceRepository:
         self.session.add(obj)
         await self.session.flush()
 
-    async def insert_feedback(self, feedback: Feedback) -> None:
+    async def insert_feedback(self, visit: PlaceVisit, feedback: Feedback) -> None:
         self.session.add(feedback)
         await self.session.flush()
+        await self.stats.add_feedback(visit, feedback.rating)
 
     async def delete_floor(self, building_id: int, floor: int) -> None:
         if not await self.is_place_floor_exists(building_id, floor):
@@ -140,6 +279,15 @@ class PlaceRepository:
             )
         )
 
+    async def get_scheme_version(self, building_id: int) -> Row | None:
+        """
+        Версия схемы коворкинга, `None` если коворкинга нет. Версия коворкинга увеличивается триггерами
+        при любом изменении его мест и этажей
+        """
+        return (await self.session.execute(
+            select(Building.version).filter(Building.id == building_id)
+        )).one_or_none()
+
     async def get_visits_by_building_id(self, building_id: int) -> List[PlaceVisit]:
         return list(await self.session.scalars(
             select(PlaceVisit).join(Place).filter(
@@ -148,20 +296,137 @@ class PlaceRepository:
             )
         ))
 
-    async def get_visits_by_client_id(self, client_id: int) -> List[PlaceVisit]:
-        return list(await self.session.scalars(
-            select(PlaceVisit).filter(PlaceVisit.client_id == client_id)
-        ))
+    async def find_visits_page_by_client_id(
+        self,
+        client_id: int,
+        limit: int,
+        cursor: str | None = None,
+        status: VisitStatus | None = None
+    ) -> tuple[list[PlaceVisit], str | None]:
+        """
+        Страница броней клиента с местом и коворкингом, загруженными тем же запросом.
+        Предстоящие и текущие брони идут от ближайших, прошедшие и все вместе - от последних
+        """
+        now = func.now()
+        query = (
+            select(PlaceVisit)
+            .join(PlaceVisit.place)
+            .join(Place.building)
+            .options(contains_eager(PlaceVisit.place).contains_eager(Place.building), lazyload(PlaceVisit.client))
+            .filter(PlaceVisit.client_id == client_id)
+        )
+        if status == "upcoming":
+            query = query.filter(PlaceVisit.visit_from > now)
+        elif status == "active":
+            query = query.filter(PlaceVisit.visit_from <= now, PlaceVisit.visit_till >= now)
+        elif status == "past":
+            query = query.filter(PlaceVisit.visit_till < now)
+        return await keyset_page(
+            self.session,
+            query,
+            PlaceVisit.visit_from,
+            PlaceVisit.id,
+            limit,
+            cursor,
+            descending=status not in ("upcoming", "active")
+        )
 
     async def delete(self, place: Place) -> None:
         await self.session.delete(place)
 
-    async def get_all_feedbacks(self) -> list[Feedback]:
-        return list(await self.session.scalars(select(Feedback)))
+    async def find_feedbacks_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        building_id: int | None = None,
+        place_id: int | None = None,
+        rating: int | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None
+    ) -> tuple[list[Row], str | None]:
+        """
+        Страница отзывов от новых к старым с именем клиента, одним запросом
+        """
+        query = (
+            select(
+                Feedback.id,
+                Client.name.label("client_name"),
+                Feedback.text,
+                Feedback.rating,
+                Feedback.created_at
+            )
+            .select_from(Feedback)
+            .join(PlaceVisit, PlaceVisit.id == Feedback.visit_id)
+            .join(Client, Client.id == PlaceVisit.client_id)
+        )
+        if building_id is not None:
+            query = query.join(Place, Place.id == PlaceVisit.place_id).filter(Place.building_id == building_id)
+        if place_id is not None:
+            query = query.filter(PlaceVisit.place_id == place_id)
+        if rating is not None:
+            query = query.filter(Feedback.rating == rating)
+        if date_from is not None:
+            query = query.filter(Feedback.created_at >= date_from)
+        if date_to is not None:
+            query = query.filter(Feedback.created_at < date_to)
+        return await keyset_page(self.session, query, Feedback.id, Feedback.id, limit, cursor, descending=True)
+
+    @staticmethod
+    def _place_json() -> ColumnElement:
+        # Поля и их порядок совпадают с `PlaceDTO`
+        return json_object(
+            name=Place.name,
+            features=Place.features,
+            size=Place.size,
+            rotate=Place.rotate,
+            x=Place.x,
+            y=Place.y,
+            image_id=Place.image_id,
+            id=Place.id,
+            building_id=Place.building_id,
+            floor=Place.floor,
+            image_url=file_url(Place.image_id),
+        )
+
+    async def render_scheme(self, building_id: int) -> bytes:
+        """
+        Схема этажей коворкинга в формате `dict[int, BuildingFloor]`, собранная в Postgres
+        """
+        places = (
+            select(json_array(self._place_json(), Place.id))
+            .filter(Place.building_id == BuildingFloorImage.building_id, Place.floor == BuildingFloorImage.floor)
+            .scalar_subquery()
+        )
+        floor = json_object(
+            floor=BuildingFloorImage.floor,
+            image_id=BuildingFloorImage.image_id,
+            places=places,
+            image_url=file_url(BuildingFloorImage.image_id),
+        )
+        return await render_json(self.session, (
+            select(func.coalesce(
+                func.json_object_agg(BuildingFloorImage.floor, aggregate_order_by(floor, BuildingFloorImage.floor)),
+                literal_column("'{}'::json")
+            ))
+            .filter(BuildingFloorImage.building_id == building_id)
+        ))
 
-    async def get_all_feedbacks_by_building_id(self, building_id: int) -> list[Feedback]:
-        return list(await self.session.scalars(
-            select(Feedback).join(PlaceVisit).join(Place).filter(Place.building_id == building_id)
+    async def render_visits_by_building_id(self, building_id: int) -> bytes:
+        """
+        Активные брони коворкинга в формате `list[VisitorDTO]`, собранные в Postgres
+        """
+        visit = json_object(
+            visit_from=PlaceVisit.visit_from,
+            visit_till=PlaceVisit.visit_till,
+            place_id=PlaceVisit.place_id,
+            client_name=Client.name,
+        )
+        return await render_json(self.session, (
+            select(json_array(visit, PlaceVisit.visit_from, PlaceVisit.id))
+            .select_from(PlaceVisit)
+            .join(Place, Place.id == PlaceVisit.place_id)
+            .join(Client, Client.id == PlaceVisit.client_id)
+            .filter(Place.building_id == building_id, PlaceVisit.visit_till >= func.now())
         ))
 
 
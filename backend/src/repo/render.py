@@ -0,0 +1,40 @@
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select, String, Text, cast, func, literal, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+
+
+__all__ = ("json_object", "json_array", "file_url", "render_json")
+
+
+def json_object(**fields: Any) -> ColumnElement:
+    """
+    `json_build_object` с ключами в порядке аргументов
+    """
+    return func.json_build_object(*chain.from_iterable((literal(key, String), value) for key, value in fields.items()))
+
+
+def json_array(value: ColumnElement, *order_by: ColumnElement) -> ColumnElement:
+    """
+    JSON-массив значений группы в порядке `order_by`, пустой массив вместо `NULL`
+    """
+    aggregated = func.json_agg(aggregate_order_by(value, *order_by) if order_by else value)
+    return func.coalesce(aggregated, literal_column("'[]'::json"))
+
+
+def file_url(image_id: ColumnElement) -> ColumnElement:
+    """
+    Ссылка на файл, как в `image_url` DTO: `NULL` для пустого идентификатора
+    """
+    return literal(f"{settings.api_url}/files/", String) + func.nullif(image_id, "")
+
+
+async def render_json(session: AsyncSession, query: Select) -> bytes:
+    """
+    Готовое тело ответа из запроса, возвращающего один JSON-документ
+    """
+    return (await session.scalar(query.with_only_columns(cast(query.selected_columns[0], Text)))).encode()
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from sqlalchemy import Row, Select, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Building, Client, Place, PlaceVisit
+
+
+__all__ = ("SchedulerRepository",)
+
+
+class SchedulerRepository:
+    """
+    Выбор броней для фоновых задач по флагам самих броней: обработанная бронь помечается
+    в одной транзакции с письмами, поэтому письма не повторяются, а брони, созданные в любой момент, не пропускаются
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _visits_query(since: datetime, till: datetime, limit: int) -> Select:
+        """
+        Брони с началом в [`since`, `till`] по возрастанию (visit_from, id) вместе с данными для письма клиенту.
+        Выбранные брони блокируются до конца транзакции, занятые другой транзакцией пропускаются
+        """
+        return (
+            select(
+                PlaceVisit.id,
+                PlaceVisit.visit_from,
+                PlaceVisit.visit_till,
+                Client.email,
+                Client.name.label("client_name"),
+                Place.name.label("place_name"),
+                Building.name.label("building_name"),
+                Building.address.label("building_address")
+            )
+            .join(Client, Client.id == PlaceVisit.client_id)
+            .join(Place, Place.id == PlaceVisit.place_id)
+            .join(Building, Building.id == Place.building_id)
+            .filter(PlaceVisit.visit_from.between(since, till))
+            .order_by(PlaceVisit.visit_from, PlaceVisit.id)
+            .limit(limit)
+            .with_for_update(of=PlaceVisit, skip_locked=True)
+        )
+
+    async def find_unreminded(self, since: datetime, till: datetime, limit: int) -> list[Row]:
+        return list(await self.session.execute(
+            self._visits_query(since, till, limit).filter(PlaceVisit.reminded_at.is_(None))
+        ))
+
+    async def set_reminded(self, ids: list[int]) -> None:
+        if ids:
+            await self.session.execute(
+                update(PlaceVisit)
+                .filter(PlaceVisit.id.in_(ids))
+                .values(reminded_at=func.now())
+            )
+
+    async def find_no_shows(self, since: datetime, till: datetime, limit: int) -> list[Row]:
+        return list(await self.session.execute(
+            self._visits_query(since, till, limit)
+            .filter(PlaceVisit.is_visited == False, PlaceVisit.is_no_show == False)
+        ))
+
+    async def flag_no_shows(self, ids: list[int]) -> None:
+        if ids:
+            await self.session.execute(
+                update(PlaceVisit)
+                .filter(PlaceVisit.id.in_(ids), PlaceVisit.is_visited == False)
+                .values(is_no_show=True)
+            )
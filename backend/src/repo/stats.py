@@ -0,0 +1,232 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Sequence
+
+import pytz
+from sqlalchemy import Date, Row, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import extract
+
+from src.models import RATINGS, BookingDailyStats, Feedback, Place, PlaceStats, PlaceVisit
+
+
+__all__ = ("BookingStatsRepository",)
+
+
+def _duration_minutes(visit_from: datetime, visit_till: datetime) -> float:
+    return (visit_till - visit_from).total_seconds() / 60
+
+
+def _rating_deltas(ratings: Sequence[int], sign: int = 1) -> dict[str, int]:
+    deltas = {"feedback_count": sign * len(ratings), "rating_sum": sign * sum(ratings)}
+    for rating in ratings:
+        deltas[f"rating_{rating}"] = deltas.get(f"rating_{rating}", 0) + sign
+    return deltas
+
+
+class BookingStatsRepository:
+    """
+    Агрегаты по броням в разрезе (день, коворкинг, место) и накопительные счётчики по местам.
+    Обновляются в той же транзакции, что и сами брони
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _apply(self, place_id: int, visit_from: datetime, **deltas: Any) -> None:
+        stmt = insert(BookingDailyStats).values(
+            day=visit_from.astimezone(pytz.UTC).date(),
+            building_id=select(Place.building_id).filter(Place.id == place_id).scalar_subquery(),
+            place_id=place_id,
+            **deltas
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BookingDailyStats.day, BookingDailyStats.building_id, BookingDailyStats.place_id],
+            set_={k: getattr(BookingDailyStats, k) + stmt.excluded[k] for k in deltas}
+        )
+        await self.session.execute(stmt)
+
+    async def _apply_place(self, place_id: int, **deltas: int) -> None:
+        stmt = insert(PlaceStats).values(
+            place_id=place_id,
+            building_id=select(Place.building_id).filter(Place.id == place_id).scalar_subquery(),
+            **deltas
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlaceStats.place_id],
+            set_={k: getattr(PlaceStats, k) + stmt.excluded[k] for k in deltas}
+        )
+        await self.session.execute(stmt)
+
+    async def add_booking(self, visit: PlaceVisit) -> None:
+        await self._apply(
+            visit.place_id,
+            visit.visit_from,
+            bookings_count=1,
+            booked_minutes=_duration_minutes(visit.visit_from, visit.visit_till)
+        )
+        await self._apply_place(visit.place_id, bookings_count=1)
+
+    async def add_visited(self, visit: PlaceVisit) -> None:
+        await self._apply(
+            visit.place_id,
+            visit.visit_from,
+            visited_count=1,
+            visited_minutes=_duration_minutes(visit.visit_from, visit.visit_till)
+        )
+        await self._apply_place(visit.place_id, visited_count=1)
+
+    async def add_feedback(self, visit: PlaceVisit, rating: int) -> None:
+        await self._apply(visit.place_id, visit.visit_from, feedback_count=1)
+        await self._apply_place(visit.place_id, **_rating_deltas([rating]))
+
+    async def remove_booking(
+        self,
+        place_id: int,
+        visit_from: datetime,
+        visit_till: datetime,
+        is_visited: bool,
+        ratings: Sequence[int] = ()
+    ) -> None:
+        """
+        Вычитает бронь и её отзывы с оценками `ratings`
+        """
+        duration = _duration_minutes(visit_from, visit_till)
+        await self._apply(
+            place_id,
+            visit_from,
+            bookings_count=-1,
+            booked_minutes=-duration,
+            visited_count=-1 if is_visited else 0,
+            visited_minutes=-duration if is_visited else 0,
+            feedback_count=-len(ratings)
+        )
+        await self._apply_place(
+            place_id,
+            bookings_count=-1,
+            visited_count=-1 if is_visited else 0,
+            **_rating_deltas(ratings, sign=-1)
+        )
+
+    async def truncate_bookings(self, bookings: Sequence[tuple[int, int, datetime, float]]) -> None:
+        """
+        Вычитает освободившиеся минуты укороченных броней (коворкинг, место, начало, минуты) одной вставкой
+        """
+        deltas: dict[tuple, float] = defaultdict(float)
+        for building_id, place_id, visit_from, minutes in bookings:
+            deltas[(visit_from.astimezone(pytz.UTC).date(), building_id, place_id)] -= minutes
+        if not deltas:
+            return
+        stmt = insert(BookingDailyStats).values([
+            {"day": day, "building_id": building_id, "place_id": place_id, "booked_minutes": minutes}
+            for (day, building_id, place_id), minutes in deltas.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BookingDailyStats.day, BookingDailyStats.building_id, BookingDailyStats.place_id],
+            set_={"booked_minutes": BookingDailyStats.booked_minutes + stmt.excluded.booked_minutes}
+        )
+        await self.session.execute(stmt)
+
+    async def get_rating(self, place_id: int | None = None, building_id: int | None = None) -> Row:
+        """
+        Количество отзывов, сумма и распределение оценок по месту или по всем местам коворкинга
+        """
+        counters = ["feedback_count", "rating_sum", *(f"rating_{rating}" for rating in RATINGS)]
+        query = select(*(func.coalesce(func.sum(getattr(PlaceStats, name)), 0).label(name) for name in counters))
+        if place_id is not None:
+            query = query.filter(PlaceStats.place_id == place_id)
+        if building_id is not None:
+            query = query.filter(PlaceStats.building_id == building_id)
+        return (await self.session.execute(query)).one()
+
+    async def backfill(self) -> None:
+        """
+        Полный пересчёт агрегатов по таблице броней
+        """
+        duration = extract("epoch", PlaceVisit.visit_till - PlaceVisit.visit_from) / 60
+        feedbacks = (
+            select(Feedback.visit_id, func.count().label("cnt"))
+            .group_by(Feedback.visit_id)
+            .subquery()
+        )
+        day = cast(func.timezone("UTC", PlaceVisit.visit_from), Date)
+
+        query = (
+            select(
+                day,
+                Place.building_id,
+                PlaceVisit.place_id,
+                func.count(),
+                func.count().filter(PlaceVisit.is_visited == True),
+                func.coalesce(func.sum(feedbacks.c.cnt), 0),
+                func.sum(duration),
+                func.coalesce(func.sum(duration).filter(PlaceVisit.is_visited == True), 0),
+            )
+            .join(Place, PlaceVisit.place_id == Place.id)
+            .outerjoin(feedbacks, feedbacks.c.visit_id == PlaceVisit.id)
+            .group_by(day, Place.building_id, PlaceVisit.place_id)
+        )
+
+        await self.session.execute(delete(BookingDailyStats))
+        await self.session.execute(
+            insert(BookingDailyStats).from_select(
+                [
+                    BookingDailyStats.day,
+                    BookingDailyStats.building_id,
+                    BookingDailyStats.place_id,
+                    BookingDailyStats.bookings_count,
+                    BookingDailyStats.visited_count,
+                    BookingDailyStats.feedback_count,
+                    BookingDailyStats.booked_minutes,
+                    BookingDailyStats.visited_minutes,
+                ],
+                query
+            )
+        )
+        await self.backfill_places()
+
+    async def backfill_places(self) -> None:
+        """
+        Полный пересчёт счётчиков по местам
+        """
+        visits = (
+            select(
+                PlaceVisit.place_id,
+                func.count().label("bookings_count"),
+                func.count().filter(PlaceVisit.is_visited == True).label("visited_count"),
+            )
+            .group_by(PlaceVisit.place_id)
+            .subquery()
+        )
+        feedbacks = (
+            select(
+                PlaceVisit.place_id,
+                func.count().label("feedback_count"),
+                func.sum(Feedback.rating).label("rating_sum"),
+                *(func.count().filter(Feedback.rating == rating).label(f"rating_{rating}") for rating in RATINGS),
+            )
+            .join(PlaceVisit, PlaceVisit.id == Feedback.visit_id)
+            .group_by(PlaceVisit.place_id)
+            .subquery()
+        )
+        counters = ["feedback_count", "rating_sum", *(f"rating_{rating}" for rating in RATINGS)]
+        query = (
+            select(
+                Place.id,
+                Place.building_id,
+                visits.c.bookings_count,
+                visits.c.visited_count,
+                *(func.coalesce(feedbacks.c[name], 0) for name in counters),
+            )
+            .join(visits, visits.c.place_id == Place.id)
+            .outerjoin(feedbacks, feedbacks.c.place_id == Place.id)
+        )
+
+        await self.session.execute(delete(PlaceStats))
+        await self.session.execute(
+            insert(PlaceStats).from_select(
+                ["place_id", "building_id", "bookings_count", "visited_count", *counters],
+                query
+            )
+        )
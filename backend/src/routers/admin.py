@@ -1,8 +1,8 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, File, Query, Response
 
 from src.core.exc import HTTPErrorModel
 from src.core.utils import create_token
-from src.schemes import AuthResponse, ClientDTO, CreateAdminDTO, CreateClientDTO
+from src.schemes import AuthResponse, ClientDTO, ClientImportResultDTO, CreateAdminDTO, CreateClientDTO, ImportFormat
 from src.service.client import AdminDep, ClientServiceDep, OwnerDep
 
 
@@ -12,6 +12,10 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 @router.get(
     "",
     responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор"
+        },
         403: {
             "model": HTTPErrorModel,
             "description": "Недостаточно прав"
@@ -19,14 +23,25 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
     }
 )
 async def get_all_admins(
+    response: Response,
     _owner: OwnerDep,
     service: ClientServiceDep,
+    limit: int | None = Query(None, ge=1, le=100),
+    cursor: str | None = Query(None),
 ) -> list[ClientDTO]:
     """
-    Получение списка всех администраторов<br>
+    Получение списка администраторов<br>
+    Без `limit` и `cursor` возвращаются все администраторы, иначе - страница из `limit` (по умолчанию 100)<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`<br>
+    Возвращает `400` если курсор некорректен<br>
     Возвращает `403` если пользователь не является владельцем
     """
-    result = await service.get_all_admins()
+    if limit is None and cursor is None:
+        result = await service.get_all_admins()
+    else:
+        result, next_cursor = await service.get_admins_page(limit or 100, cursor)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
     return [ClientDTO(**client.__dict__) for client in result]
 
 
@@ -43,14 +58,43 @@ async def get_all_admins(
 async def add_admin(
     data: CreateAdminDTO,
     service: ClientServiceDep,
-    background_tasks: BackgroundTasks,
     _admin: AdminDep,
 ):
     """
     Создание нового администратора<br>
     Возвращает `403` если пользователь не является владельцем
     """
-    await service.create_admin(data, background_tasks)
+    await service.create_admin(data)
+
+
+@router.post(
+    "/import",
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный файл"
+        },
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def import_clients(
+    service: ClientServiceDep,
+    _admin: AdminDep,
+    file: bytes = File(...),
+    fmt: ImportFormat = Query("csv", alias="format")
+) -> ClientImportResultDTO:
+    """
+    Загрузка списка клиентов организации из CSV с заголовком или JSONL с полями `email`, `name`, `access_level`<br>
+    `access_level` - `USER` или `ADMIN`, по умолчанию `USER`<br>
+    У существующих клиентов обновляется имя, а уровень доступа только повышается<br>
+    Незарегистрированным клиентам отправляются приглашения<br>
+    Возвращает `400` если в файле есть неверные строки, файл не загружается<br>
+    Возвращает `403` если у клиента недостаточно прав
+    """
+    return await service.import_clients(file, fmt)
 
 
 @router.post("/create_for_tests", include_in_schema=False)
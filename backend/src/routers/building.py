@@ -1,11 +1,15 @@
+from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Query, Response
 
-from src.core.exc import HTTPErrorModel
-from src.schemes import BuildingDTO, CreateBuildingDTO, FeedbackDTO, UpdateBuildingDTO
+from src.core.etag import ConditionalDep
+from src.core.exc import BadRequestError, HTTPErrorModel, NotFoundError
+from src.core.responses import EncoderDep, construct
+from src.schemes import (BuildingDTO, CreateBuildingDTO, FeedbackDTO, FloorOccupancyDTO, MapClusterDTO,
+                         NearbyBuildingDTO, RatingDTO, UpdateBuildingDTO)
 from src.service.building import BuildingDep, BuildingServiceDep
-from src.service.client import AdminDep
+from src.service.client import AdminDep, ClientServiceDep
 from src.service.place import PlaceServiceDep
 
 
@@ -14,22 +18,107 @@ router = APIRouter(prefix="/buildings", tags=["Buildings"])
 
 @router.get(
     "",
-    response_model=List[BuildingDTO]
+    response_model=List[BuildingDTO],
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор"
+        }
+    }
 )
 async def get_all(
     response: Response,
     service: BuildingServiceDep,
+    conditional: ConditionalDep,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
 ) -> List[BuildingDTO]:
     """
-    Получение списка всех коворкингов
+    Получение списка всех коворкингов<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`, при наличии `cursor` параметр `offset` игнорируется<br>
+    Поддерживает `If-None-Match`, возвращает `304` если список не изменился<br>
+    Возвращает `400` если курсор некорректен
     """
-    res, cnt = await service.get_all(limit=limit, offset=offset)
+    version = await service.get_list_version()
+    if (not_modified := conditional.check("buildings", *version, limit, offset, cursor)) is not None:
+        return not_modified
+
+    if cursor is not None or offset == 0:
+        res, cnt, next_cursor = await service.get_page(limit=limit, cursor=cursor)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+    else:
+        res, cnt = await service.get_all(limit=limit, offset=offset)
     response.headers["X-Total-Count"] = str(cnt)
     return [BuildingDTO(**building.__dict__) for building in res]
 
 
+@router.get(
+    "/search",
+    response_model=List[BuildingDTO]
+)
+async def search(
+    service: BuildingServiceDep,
+    q: str = Query(min_length=1, max_length=200, description="Поисковый запрос"),
+    limit: int = Query(10, ge=1, le=100),
+) -> List[BuildingDTO]:
+    """
+    Поиск коворкингов по названию, адресу и описанию, по убыванию релевантности<br>
+    Слова запроса ищутся по префиксу, небольшие опечатки в названии и адресе допускаются
+    """
+    return [BuildingDTO(**building.__dict__) for building in await service.search(q, limit)]
+
+
+@router.get(
+    "/nearby",
+    response_model=List[NearbyBuildingDTO]
+)
+async def get_nearby(
+    service: BuildingServiceDep,
+    x: float = Query(ge=-180, le=180, description="Долгота"),
+    y: float = Query(ge=-90, le=90, description="Широта"),
+    radius: float = Query(10, gt=0, le=20000, description="Радиус поиска в километрах"),
+    limit: int = Query(10, ge=1, le=100),
+) -> List[NearbyBuildingDTO]:
+    """
+    Поиск ближайших коворкингов в радиусе от точки, по возрастанию расстояния
+    """
+    return [
+        NearbyBuildingDTO(**building.__dict__, distance_km=round(distance, 3))
+        for building, distance in await service.get_nearby(x, y, radius, limit)
+    ]
+
+
+@router.get(
+    "/clusters",
+    response_model=List[MapClusterDTO],
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Неверная область карты"
+        }
+    }
+)
+async def get_clusters(
+    service: BuildingServiceDep,
+    bbox: str = Query(description="Видимая область `min_x,min_y,max_x,max_y` в градусах"),
+    zoom: int = Query(ge=0, le=23),
+) -> List[MapClusterDTO]:
+    """
+    Коворкинги в видимой области карты, сгруппированные в кластеры по сетке текущего масштаба<br>
+    На крупных масштабах возвращаются отдельные коворкинги с `count` = 1 и заполненным `building_id`<br>
+    Возвращает `400` если область карты задана неверно
+    """
+    try:
+        min_x, min_y, max_x, max_y = map(float, bbox.split(","))
+    except ValueError:
+        raise BadRequestError("Invalid bbox")
+    if not (-180 <= min_x <= 180 and -180 <= max_x <= 180 and -90 <= min_y <= max_y <= 90):
+        raise BadRequestError("Invalid bbox")
+    return await service.get_clusters(zoom, min_x, min_y, max_x, max_y)
+
+
 @router.get(
     "/{building_id}",
     response_model=BuildingDTO,
@@ -40,11 +129,19 @@ async def get_all(
         }
     }
 )
-async def get_by_id(building: BuildingDep) -> BuildingDTO:
+async def get_by_id(building_id: int, service: BuildingServiceDep, conditional: ConditionalDep) -> BuildingDTO:
     """
     Получение коворкинга по id<br>
+    Поддерживает `If-None-Match`, возвращает `304` если коворкинг не изменился<br>
     Возвращает `404` если коворкинг не найден
     """
+    version = await service.get_version(building_id)
+    if version is None:
+        raise NotFoundError("Building not found")
+    if (not_modified := conditional.check("building", building_id, version)) is not None:
+        return not_modified
+
+    building = await service.get_by_id(building_id)
     return BuildingDTO(**building.__dict__)
 
 
@@ -129,22 +226,92 @@ async def delete_building(building: BuildingDep, service: BuildingServiceDep, _a
     await service.delete(building)
 
 
+@router.get(
+    "/{building_id}/occupancy",
+    response_model=List[FloorOccupancyDTO],
+    responses={
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        },
+        404: {
+            "model": HTTPErrorModel,
+            "description": "Коворкинг не найден"
+        }
+    }
+)
+async def get_occupancy(
+    building: BuildingDep,
+    service: ClientServiceDep,
+    _admin: AdminDep
+) -> List[FloorOccupancyDTO]:
+    """
+    Текущая заполненность коворкинга по этажам (для администраторов)<br>
+    Этажи без посетителей не возвращаются<br>
+    Возвращает `403` если у клиента недостаточно прав<br>
+    Возвращает `404` если коворкинг не найден
+    """
+    return await service.get_occupancy(building.id)
+
+
+@router.get(
+    "/{building_id}/rating",
+    response_model=RatingDTO,
+    responses={
+        404: {
+            "model": HTTPErrorModel,
+            "description": "Коворкинг не найден"
+        }
+    }
+)
+async def get_rating(building: BuildingDep, service: PlaceServiceDep) -> RatingDTO:
+    """
+    Средняя оценка и распределение оценок по всем местам коворкинга<br>
+    Возвращает `404` если коворкинг не найден
+    """
+    return await service.get_rating(building_id=building.id)
+
+
 @router.get(
     "/{building_id}/feedbacks",
     response_model=list[FeedbackDTO],
     responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор или период"
+        },
         404: {
             "model": HTTPErrorModel,
             "description": "Коворкинг не найден"
         }
     }
 )
-async def get_feedbacks(building: BuildingDep, service: PlaceServiceDep) -> list[FeedbackDTO]:
+async def get_feedbacks(
+    building: BuildingDep,
+    service: PlaceServiceDep,
+    encoder: EncoderDep,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None),
+    place_id: int | None = Query(None),
+    rating: int | None = Query(None, ge=1, le=5),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None),
+) -> list[FeedbackDTO]:
     """
-    Получение отзывов о коворкинге<br>
+    Получение отзывов о коворкинге от новых к старым с фильтрами по месту, оценке и периоду<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`<br>
+    Поддерживает `Accept: application/msgpack`<br>
+    Возвращает `400` если курсор некорректен или `date_from` не меньше `date_to`<br>
     Возвращает `404` если коворкинг не найден
     """
-    feedbacks = await service.get_all_feedbacks_by_building_id(building.id)
-    for i in feedbacks:
-        await i.awaitable_attrs.client
-    return [FeedbackDTO.from_db(i) for i in feedbacks]
+    feedbacks, next_cursor = await service.get_feedbacks_page(
+        limit,
+        cursor,
+        building_id=building.id,
+        place_id=place_id,
+        rating=rating,
+        date_from=date_from,
+        date_to=date_to
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return encoder([construct(FeedbackDTO, row) for row in feedbacks], list[FeedbackDTO], headers)
@@ -1,10 +1,11 @@
 from typing import List, Literal
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
 
 from src.core.exc import ForbiddenError, HTTPErrorModel, NotFoundError
+from src.core.responses import EncoderDep, construct
 from src.enums import AccessLevel
-from src.schemes import ClientDTO, PlaceDTO, PlaceVisitDTO, UpdateClientDTO
+from src.schemes import ClientDTO, ClientVisitDTO, PlaceDTO, UpdateClientDTO, VisitStatus
 from src.schemes.client import ClientCurrentVisitDTO
 from src.service.client import AdminDep, ClientDep, ClientServiceDep
 from src.service.place import PlaceServiceDep
@@ -12,23 +13,111 @@ from src.service.place import PlaceServiceDep
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
+ClientSortField = Literal["id", "-id", "name", "-name", "email", "-email", "created_at", "-created_at"]
 
-# @router.get("", response_model=List[ClientDTO])
-# async def get_clients() -> List[ClientDTO]:
-#     ...
 
-@router.get("/visits", response_model=list[PlaceVisitDTO])
-async def get_visits(client: ClientDep, service: PlaceServiceDep) -> list[PlaceVisitDTO]:
+@router.get(
+    "",
+    response_model=List[ClientDTO],
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор"
+        },
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def get_clients(
+    response: Response,
+    _admin: AdminDep,
+    service: ClientServiceDep,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None),
+    order_by: ClientSortField = Query("id"),
+) -> List[ClientDTO]:
+    """
+    Получение списка клиентов, `order_by` с `-` сортирует в обратном порядке<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`, курсор действителен только для того же `order_by`<br>
+    Возвращает `400` если курсор некорректен<br>
+    Возвращает `403` если пользователь не является администратором
     """
-    Получение броней клиента
+    result, next_cursor = await service.get_page(limit, cursor, order_by=order_by)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [ClientDTO(**client.__dict__) for client in result]
+
+
+@router.get(
+    "/visits",
+    response_model=list[ClientVisitDTO],
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор"
+        }
+    }
+)
+async def get_visits(
+    client: ClientDep,
+    service: PlaceServiceDep,
+    encoder: EncoderDep,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None),
+    status: VisitStatus | None = Query(None)
+) -> list[ClientVisitDTO]:
+    """
+    Получение броней клиента с местом и коворкингом<br>
+    `upcoming` и `active` возвращаются от ближайших к дальним, `past` и все брони без фильтра - от последних<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`<br>
+    Поддерживает `Accept: application/msgpack`<br>
+    Возвращает `400` если курсор некорректен
     """
-    res = []
-    for visit in await service.get_visits_by_client_id(client.id):
-        await visit.awaitable_attrs.place
-        data = visit.__dict__.copy()
-        data["place"] = PlaceDTO(**visit.place.__dict__)
-        res.append(PlaceVisitDTO(**data))
-    return res
+    visits, next_cursor = await service.get_visits_page_by_client_id(client.id, limit, cursor, status)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return encoder(
+        [
+            construct(
+                ClientVisitDTO,
+                visit,
+                place=construct(PlaceDTO, visit.place),
+                building_name=visit.place.building.name,
+                building_address=visit.place.building.address
+            )
+            for visit in visits
+        ],
+        list[ClientVisitDTO],
+        headers
+    )
+
+
+@router.get(
+    "/currently_visiting",
+    response_model=List[ClientCurrentVisitDTO],
+    responses={
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def get_currently_visiting_clients_with_places(
+    _admin: AdminDep,
+    service: ClientServiceDep,
+    encoder: EncoderDep,
+    building_id: int | None = Query(None)
+) -> List[ClientCurrentVisitDTO]:
+    """
+    Клиенты, которые сейчас находятся в коворкингах, по коворкингам и этажам (для администраторов)<br>
+    Отдаётся из реестра текущих посещений в памяти, отметки из других воркеров видны с задержкой до
+    `occupancy_sync_interval` секунд<br>
+    Поддерживает `Accept: application/msgpack`<br>
+    Возвращает `403` если у клиента недостаточно прав
+    """
+    visits = await service.get_currently_visiting_clients_with_places(building_id)
+    return encoder(visits, List[ClientCurrentVisitDTO])
 
 
 @router.get(
@@ -93,15 +182,3 @@ async def update_client(
         await service.update(client, data)
         return ClientDTO(**target.__dict__)
     raise ForbiddenError
-
-
-@router.get(
-    "/currently_visiting",
-    response_model=List[ClientCurrentVisitDTO],
-)
-async def get_currently_visiting_clients_with_places(
-    _admin: AdminDep,
-    service: ClientServiceDep,
-) -> List[ClientCurrentVisitDTO]:
-    print("LDKMFDLKNFDSLFNLJDNFDS")
-    return await service.get_currently_visiting_clients_with_places()
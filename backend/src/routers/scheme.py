@@ -1,14 +1,19 @@
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 
-from src.core.exc import HTTPErrorModel
-from src.schemes import CreatePlaceDTO, PlaceDTO, UpdatePlaceDTO, UpdateSchemeDTO, VisitorDTO
+from src.config import settings
+from src.core.etag import ConditionalDep
+from src.core.events import EVENT_STREAM_MEDIA_TYPE, event_broker
+from src.core.exc import HTTPErrorModel, NotFoundError
+from src.core.responses import EncoderDep, construct
+from src.schemes import CreatePlaceDTO, PlaceDTO, RatingDTO, UpdatePlaceDTO, UpdateSchemeDTO, VisitorDTO
 from src.schemes.building import BuildingFloor
 from src.schemes.scheme import CreateSchemeDTO
 from src.service.building import BuildingDep
 from src.service.client import AdminDep
-from src.service.place import PlaceDep, PlaceServiceDep
+from src.service.place import PlaceDep, PlaceServiceDep, building_topic
 
 
 router = APIRouter(prefix="/buildings/{building_id}/schemes", tags=["Schemes"])
@@ -48,20 +53,44 @@ router = APIRouter(prefix="/buildings/{building_id}/schemes", tags=["Schemes"])
         }
     }
 )
-async def get_floors(building: BuildingDep, service: PlaceServiceDep) -> dict[int, BuildingFloor]:
+async def get_floors(
+    building_id: int,
+    service: PlaceServiceDep,
+    conditional: ConditionalDep,
+    encoder: EncoderDep
+) -> dict[int, BuildingFloor]:
     """
     Получение списка всех этажей в коворкинге<br>
+    Поддерживает `If-None-Match`, возвращает `304` если схема не изменилась<br>
+    Поддерживает `Accept: application/msgpack`<br>
     Возвращает `404` если коворкинг не найден
     """
-    places = await service.get_all_by_building_id(building.id)
-    res = {floor.floor: BuildingFloor(
-        floor=floor.floor,
-        image_id=floor.image_id,
-        places=[]
-    ) for floor in building.floors}
-    for place in places:
-        res[place.floor].places.append(PlaceDTO(**place.__dict__))
-    return res
+    scheme = await service.get_scheme(building_id)
+    if scheme is None:
+        raise NotFoundError("Building not found")
+    body = scheme.msgpack if encoder.msgpack else scheme.body
+    return conditional.respond(scheme.etag, body, encoder.media_type, {"Vary": "Accept"})
+
+
+@router.get(
+    "/places",
+    response_model=List[PlaceDTO]
+)
+async def search_places(
+    building_id: int,
+    service: PlaceServiceDep,
+    encoder: EncoderDep,
+    floor: int | None = Query(None),
+    features: List[str] = Query([], description="Характеристики, которые должны быть у места"),
+    exclude: List[str] = Query([], description="Характеристики, которых не должно быть у места"),
+) -> List[PlaceDTO]:
+    """
+    Поиск мест коворкинга или этажа по характеристикам<br>
+    Место подходит, если у него есть все характеристики из `features` и нет ни одной из `exclude`<br>
+    Поддерживает `Accept: application/msgpack`
+    """
+    places = await service.search_by_features(building_id, floor, features, exclude)
+    return encoder([construct(PlaceDTO, place) for place in places], list[PlaceDTO])
 
 
 @router.get(
@@ -76,16 +105,51 @@ async def get_floors(building: BuildingDep, service: PlaceServiceDep) -> dict[in
 )
 async def get_all_visits_by_building(
     building: BuildingDep,
-    service: PlaceServiceDep
+    service: PlaceServiceDep,
+    encoder: EncoderDep
 ) -> List[VisitorDTO]:
     """
     Получение списка всех активных броней в коворкинге<br>
+    Поддерживает `Accept: application/msgpack`<br>
     Возвращает `404` если коворкинг не найден
     """
-    return [
-        VisitorDTO.from_db(visit)
-        for visit in await service.get_visits_by_building_id(building.id)
-    ]
+    if settings.render_json_in_db:
+        return encoder.from_json(await service.render_visits_by_building_id(building.id))
+    visits = await service.get_visits_by_building_id(building.id)
+    return encoder(
+        [construct(VisitorDTO, visit, client_name=visit.client.name) for visit in visits],
+        list[VisitorDTO]
+    )
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {EVENT_STREAM_MEDIA_TYPE: {}},
+            "description": (
+                "Поток событий `booking_created`, `booking_cancelled`, `booking_released`, `visited` и `resync`"
+            )
+        },
+        404: {
+            "model": HTTPErrorModel,
+            "description": "Коворкинг не найден"
+        }
+    }
+)
+async def stream_events(building: BuildingDep, floor: int | None = Query(None)) -> StreamingResponse:
+    """
+    Поток Server-Sent Events о создании, отмене и посещении броней коворкинга или одного этажа<br>
+    Данные события: `visit_id`, `place_id`, `floor`, `visit_from`, `visit_till`<br>
+    После `resync` события могли быть пропущены, и данные нужно перечитать<br>
+    Возвращает `404` если коворкинг не найден
+    """
+    return StreamingResponse(
+        event_broker.stream(building_topic(building.id, floor)),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.delete(
@@ -134,6 +198,24 @@ async def get_place_by_id(place: PlaceDep) -> PlaceDTO:
     return PlaceDTO(**place.__dict__)
 
 
+@router.get(
+    "/places/{place_id}/rating",
+    response_model=RatingDTO,
+    responses={
+        404: {
+            "model": HTTPErrorModel,
+            "description": "Место не найдено"
+        }
+    }
+)
+async def get_place_rating(place: PlaceDep, service: PlaceServiceDep) -> RatingDTO:
+    """
+    Средняя оценка и распределение оценок места<br>
+    Возвращает `404` если место не найдено
+    """
+    return await service.get_rating(place_id=place.id)
+
+
 @router.patch(
     "/{floor}",
     responses={
@@ -221,6 +303,10 @@ async def create_scheme(
         404: {
             "model": HTTPErrorModel,
             "description": "Этаж не найден"
+        },
+        409: {
+            "model": HTTPErrorModel,
+            "description": "Слишком много разных характеристик мест"
         }
     }
 )
@@ -235,7 +321,8 @@ async def create_place(
     Создание нового места на этаже<br>
     Возвращает `400` если передано неверное изображение<br>
     Возвращает `403` если пользователь не администратор<br>
-    Возвращает `404` если этаж не найден
+    Возвращает `404` если этаж не найден<br>
+    Возвращает `409` если характеристика новая, а справочник характеристик заполнен
     """
     place = await service.create_place(building_id, floor, data)
     return PlaceDTO(**place.__dict__)
@@ -248,6 +335,10 @@ async def create_place(
         403: {
             "model": HTTPErrorModel,
             "description": "Недостаточно прав"
+        },
+        409: {
+            "model": HTTPErrorModel,
+            "description": "Слишком много разных характеристик мест"
         }
     }
 )
@@ -260,6 +351,7 @@ async def update_place(
     """
     Обновление информации о месте<br>
     Возвращает `403` если пользователь не администратор<br>
+    Возвращает `409` если характеристика новая, а справочник характеристик заполнен
     """
     await service.update(place, data)
     return PlaceDTO(**place.__dict__)
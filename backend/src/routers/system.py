@@ -1,14 +1,19 @@
+from datetime import datetime
 from typing import Literal
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
 
 from src.config import settings
+from src.core.etag import ConditionalDep
 from src.core.db import SessionDep, ping_db
 from src.core.exc import HTTPErrorModel
-from src.schemes import FeedbackDTO, MetricsDTO, SettingsDTO
+from src.core.responses import EncoderDep, construct
+from src.schemes import FeedbackDTO, MetricsDTO, PlaceFeatureDTO, SettingsDTO, UtilizationReportDTO
 from src.service.application_settings import ApplicationSettingsDep
 from src.service.client import AdminDep, OwnerDep
-from src.service.metrics import MetricsServiceDep
+from src.service.export import EXPORT_MEDIA_TYPES, ExportFormat, ExportServiceDep
+from src.service.metrics import MetricsServiceDep, dashboard_metrics_cache
 from src.service.place import PlaceServiceDep
 
 
@@ -22,10 +27,14 @@ async def ping(session: SessionDep) -> Literal[True]:
 
 
 @router.get("/settings")
-async def get_settings() -> SettingsDTO:
+async def get_settings(conditional: ConditionalDep) -> SettingsDTO:
     """
-    Получение текущих настроек
+    Получение текущих настроек<br>
+    Поддерживает `If-None-Match`, возвращает `304` если настройки не изменились
     """
+    # Настройки хранятся в памяти процесса, версией служит их содержимое
+    if (not_modified := conditional.check("settings", sorted(settings.application_settings.items()))) is not None:
+        return not_modified
     return SettingsDTO(**settings.application_settings)
 
 
@@ -56,32 +65,161 @@ async def update_settings(
     }
 )
 async def get_metrics(
-    service: MetricsServiceDep,
+    response: Response,
     _admin: AdminDep
 ) -> MetricsDTO:
     """
     Получение статистики по организации<br>
+    Данные кэшируются, их возраст в секундах передаётся в заголовке `Age`<br>
     Возвращает `403` если пользователь не является администратором
     """
-    return await service.get_dashboard_metrics()
+    metrics, age = await dashboard_metrics_cache.get()
+    response.headers["Age"] = str(int(age))
+    return metrics
+
+
+@router.get(
+    "/metrics/utilization",
+    response_model=UtilizationReportDTO,
+    responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Неверный период"
+        },
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def get_utilization(
+    service: MetricsServiceDep,
+    _admin: AdminDep,
+    date_from: datetime = Query(alias="from"),
+    date_to: datetime = Query(alias="to"),
+    building_id: int | None = Query(None),
+    granularity: Literal["hour", "day"] = Query("day"),
+) -> UtilizationReportDTO:
+    """
+    Загруженность мест, этажей и коворкингов за период в процентах от рабочего времени<br>
+    Для этажей и коворкингов возвращаются ряды по слотам длиной `granularity`<br>
+    Возвращает `400` если период задан неверно или слишком велик для выбранной гранулярности<br>
+    Возвращает `403` если пользователь не является администратором
+    """
+    return await service.get_utilization(date_from, date_to, granularity, building_id)
 
 
 @router.get(
     "/feedbacks",
     response_model=list[FeedbackDTO],
     responses={
+        400: {
+            "model": HTTPErrorModel,
+            "description": "Некорректный курсор или период"
+        },
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def get_feedbacks(
+    service: PlaceServiceDep,
+    encoder: EncoderDep,
+    _admin: AdminDep,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None),
+    building_id: int | None = Query(None),
+    place_id: int | None = Query(None),
+    rating: int | None = Query(None, ge=1, le=5),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None),
+) -> list[FeedbackDTO]:
+    """
+    Получение отзывов от новых к старым с фильтрами по коворкингу, месту, оценке и периоду<br>
+    Курсор следующей страницы передаётся в заголовке `X-Next-Cursor`<br>
+    Поддерживает `Accept: application/msgpack`<br>
+    Возвращает `400` если курсор некорректен или `date_from` не меньше `date_to`<br>
+    Возвращает `403` если пользователь не является администратором
+    """
+    feedbacks, next_cursor = await service.get_feedbacks_page(
+        limit,
+        cursor,
+        building_id=building_id,
+        place_id=place_id,
+        rating=rating,
+        date_from=date_from,
+        date_to=date_to
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return encoder([construct(FeedbackDTO, row) for row in feedbacks], list[FeedbackDTO], headers)
+
+
+@router.get("/features", response_model=list[PlaceFeatureDTO])
+async def get_features(service: PlaceServiceDep) -> list[PlaceFeatureDTO]:
+    """
+    Справочник характеристик мест
+    """
+    return [PlaceFeatureDTO(id=feature.id, name=feature.name) for feature in await service.get_features()]
+
+
+def _export_response(chunks, name: str, fmt: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@router.get(
+    "/export/visits",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+            "description": "Файл выгрузки"
+        },
+        403: {
+            "model": HTTPErrorModel,
+            "description": "Недостаточно прав"
+        }
+    }
+)
+async def export_visits(
+    service: ExportServiceDep,
+    _admin: AdminDep,
+    fmt: ExportFormat = Query("csv", alias="format")
+) -> StreamingResponse:
+    """
+    Выгрузка всех броней с данными клиента, места и коворкинга в CSV или Parquet<br>
+    Файл отдаётся потоком по мере чтения из базы<br>
+    Возвращает `403` если пользователь не является администратором
+    """
+    return _export_response(service.export_visits(fmt), "visits", fmt)
+
+
+@router.get(
+    "/export/feedbacks",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+            "description": "Файл выгрузки"
+        },
         403: {
             "model": HTTPErrorModel,
             "description": "Недостаточно прав"
         }
     }
 )
-async def get_feedbacks(service: PlaceServiceDep, _admin: AdminDep) -> list[FeedbackDTO]:
+async def export_feedbacks(
+    service: ExportServiceDep,
+    _admin: AdminDep,
+    fmt: ExportFormat = Query("csv", alias="format")
+) -> StreamingResponse:
     """
-    Получение всех отзывов<br>
+    Выгрузка всех отзывов с данными брони, клиента и места в CSV или Parquet<br>
+    Файл отдаётся потоком по мере чтения из базы<br>
     Возвращает `403` если пользователь не является администратором
     """
-    feedbacks = await service.get_all_feedbacks()
-    for i in feedbacks:
-        await i.awaitable_attrs.client
-    return [FeedbackDTO.from_db(i) for i in feedbacks]
+    return _export_response(service.export_feedbacks(fmt), "feedbacks", fmt)
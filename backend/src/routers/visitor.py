@@ -69,7 +69,7 @@ async def delete(visit: VisitDep, client: ClientDep, service: PlaceServiceDep):
     """
     if client.id != visit.client_id and client.access_level.value < AccessLevel.ADMIN.value:
         raise ForbiddenError
-    await service.delete_visit(visit.id)
+    await service.delete_visit(visit)
 
 
 @router.post(
@@ -1,7 +1,35 @@
-from pydantic import BaseModel, EmailStr, Field
+from typing import Literal
 
-__all__ = ("CreateAdminDTO",)
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+from src.enums import AccessLevel
+
+__all__ = ("CreateAdminDTO", "ImportFormat", "ImportClientDTO", "ClientImportResultDTO")
+
+
+ImportFormat = Literal["csv", "jsonl"]
 
 
 class CreateAdminDTO(BaseModel):
     email: EmailStr =  Field(description="email-адрес администратора", examples=["test@mail.ru"], min_length=1)
+
+
+class ImportClientDTO(BaseModel):
+    email: EmailStr
+    name: str = ""
+    access_level: AccessLevel = AccessLevel.USER
+
+    @field_validator("access_level", mode="before")
+    @classmethod
+    def parse_access_level(cls, value):
+        if isinstance(value, str):
+            value = AccessLevel.__members__.get(value.strip().upper(), value)
+        if value == AccessLevel.OWNER:
+            raise ValueError("Owner can not be imported")
+        return value
+
+
+class ClientImportResultDTO(BaseModel):
+    total: int = Field(description="Количество клиентов в файле без повторов email")
+    created: int = Field(description="Количество новых клиентов")
+    invited: int = Field(description="Количество отправленных приглашений")
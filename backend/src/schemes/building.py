@@ -6,7 +6,7 @@ from src.config import settings
 from src.core.utils import undefined
 from .place import PlaceDTO
 
-__all__ = ("CreateBuildingDTO", "BuildingDTO", "UpdateBuildingDTO", "BuildingFloor")
+__all__ = ("CreateBuildingDTO", "BuildingDTO", "UpdateBuildingDTO", "BuildingFloor", "NearbyBuildingDTO", "MapClusterDTO")
 
 
 NameField = Annotated[str, Field(description="Название коворкинга", min_length=1, examples=[""])]
@@ -51,6 +51,17 @@ class BuildingDTO(CreateBuildingDTO):
         return [f"{settings.api_url}/files/{image_id}" for image_id in self.images_id]
 
 
+class NearbyBuildingDTO(BuildingDTO):
+    distance_km: float = Field(description="Расстояние до точки поиска в километрах")
+
+
+class MapClusterDTO(BaseModel):
+    x: float = Field(description="Долгота центра кластера")
+    y: float = Field(description="Широта центра кластера")
+    count: int = Field(description="Количество коворкингов в кластере")
+    building_id: int | None = Field(None, description="id коворкинга, если он в кластере один")
+
+
 class BuildingFloor(BaseModel):
     floor: int
     image_id: str
@@ -1,13 +1,13 @@
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 from src.enums import AccessLevel
 from .place import PlaceDTO
 from .visitor import (VisitorDTO)  # noqa
 
 
-__all__ = ("CreateClientDTO", "ClientDTO", "UpdateClientDTO", "ClientDTOWithVisits", "ClientCurrentVisitDTO")
+__all__ = ("CreateClientDTO", "ClientDTO", "UpdateClientDTO", "ClientDTOWithVisits", "ClientCurrentVisitDTO", "FloorOccupancyDTO")
 
 
 class CreateClientDTO(BaseModel):
@@ -39,3 +39,9 @@ class ClientCurrentVisitDTO(BaseModel):
     visit_till: datetime
     is_feedbacked: bool
     place: PlaceDTO
+
+
+class FloorOccupancyDTO(BaseModel):
+    floor: int
+    visitors_count: int = Field(description="Количество посетителей на этаже сейчас")
+    place_ids: list[int] = Field(description="Занятые сейчас места")
@@ -1,10 +1,18 @@
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel
 
 
-__all__ = ("LastBookingViewForMetrics", "PopularPlaceViewForMetrics", "MetricsDTO")
+__all__ = (
+    "LastBookingViewForMetrics",
+    "PopularPlaceViewForMetrics",
+    "MetricsDTO",
+    "PlaceUtilizationDTO",
+    "FloorUtilizationDTO",
+    "BuildingUtilizationDTO",
+    "UtilizationReportDTO",
+)
 
 
 class LastBookingViewForMetrics(BaseModel):
@@ -33,3 +41,40 @@ class MetricsDTO(BaseModel):
     total_bookings: int
     last_bookings: List[LastBookingViewForMetrics]
     most_popular_places: List[PopularPlaceViewForMetrics]
+
+
+class UtilizationDTO(BaseModel):
+    booked_percent: float
+    visited_percent: float
+
+
+class UtilizationSeriesDTO(UtilizationDTO):
+    booked_series: List[float]
+    visited_series: List[float]
+
+
+class PlaceUtilizationDTO(UtilizationDTO):
+    id: int
+    name: str
+    building_id: int
+    floor: int
+
+
+class FloorUtilizationDTO(UtilizationSeriesDTO):
+    building_id: int
+    floor: int
+
+
+class BuildingUtilizationDTO(UtilizationSeriesDTO):
+    id: int
+    name: str
+
+
+class UtilizationReportDTO(BaseModel):
+    date_from: datetime
+    date_to: datetime
+    granularity: Literal["hour", "day"]
+    slots: List[datetime]
+    buildings: List[BuildingUtilizationDTO]
+    floors: List[FloorUtilizationDTO]
+    places: List[PlaceUtilizationDTO]
@@ -6,7 +6,9 @@ from pydantic import BaseModel, Field, computed_field, model_validator
 from src.config import settings
 
 
-__all__ = ("CreatePlaceDTO", "PlaceDTO", "SearchPlaceRequest", "PlaceVisitDTO", "UpdatePlaceDTO")
+__all__ = (
+    "CreatePlaceDTO", "PlaceDTO", "PlaceFeatureDTO", "RatingDTO", "SearchPlaceRequest", "PlaceVisitDTO", "UpdatePlaceDTO"
+)
 
 from src.core.utils import undefined
 
@@ -40,6 +42,17 @@ class PlaceDTO(CreatePlaceDTO):
         return f"{settings.api_url}/files/{self.image_id}" if self.image_id else None
 
 
+class PlaceFeatureDTO(BaseModel):
+    id: int
+    name: str
+
+
+class RatingDTO(BaseModel):
+    average: Optional[float] = Field(description="Средняя оценка, `null` если отзывов нет")
+    count: int = Field(description="Количество отзывов")
+    histogram: dict[int, int] = Field(description="Количество отзывов с каждой оценкой от 1 до 5")
+
+
 class SearchPlaceRequest(BaseModel):
     start_time: datetime
     end_time: datetime
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 import pytz
 from pydantic import BaseModel, computed_field, model_validator, Field
@@ -6,11 +7,17 @@ from pydantic import BaseModel, computed_field, model_validator, Field
 from .place import PlaceDTO
 
 
-__all__ = ("CreateVisitorDTO", "VisitorDTO", "PlaceVisitDTO", "CreateVisitFeedbackDTO", "FeedbackDTO")
+__all__ = (
+    "VisitStatus", "CreateVisitorDTO", "VisitorDTO", "PlaceVisitDTO", "ClientVisitDTO", "CreateVisitFeedbackDTO", "FeedbackDTO"
+)
 
 from ..models import Feedback, PlaceVisit
 
 
+# upcoming - ещё не начались, active - идут сейчас, past - уже закончились
+VisitStatus = Literal["upcoming", "active", "past"]
+
+
 class CreateVisitorDTO(BaseModel):
     visit_from: datetime
     visit_till: datetime
@@ -45,12 +52,18 @@ class PlaceVisitDTO(CreateVisitorDTO):
     place: PlaceDTO
     is_visited: bool
     is_feedbacked: bool
+    is_no_show: bool = False
 
     @computed_field
     @property
     def is_ended(self) -> bool:
         return self.visit_till < datetime.now(pytz.UTC)
 
+class ClientVisitDTO(PlaceVisitDTO):
+    building_name: str
+    building_address: str
+
+
 class CreateVisitFeedbackDTO(BaseModel):
     rating: int = Field(ge=1, le=5)
     text: str
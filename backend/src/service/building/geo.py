@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+
+from src.config import settings
+from src.core.utils import ClusterGrid, GridIndex
+from src.repo.building import BuildingRepository
+
+
+__all__ = ("BuildingGeoIndex", "building_geo_index")
+
+
+class BuildingGeoIndex:
+    """
+    Индекс координат коворкингов в памяти воркера.
+    Перестраивается, когда меняется версия списка коворкингов, поэтому изменения из других воркеров тоже учитываются
+    """
+
+    def __init__(self, cell_size: float, max_size: int, cluster_max_zoom: int, cells_per_tile: int):
+        self.cell_size = cell_size
+        self.max_size = max_size
+        self.cluster_max_zoom = cluster_max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.ids = np.empty(0, dtype=np.int64)
+        self.grid: GridIndex | None = None
+        self.clusters: ClusterGrid | None = None
+        self._version: tuple | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, repo: BuildingRepository) -> "BuildingGeoIndex | None":
+        """
+        Актуальный индекс, `None` если коворкингов слишком много для хранения в памяти
+        """
+        version = await repo.get_list_version()
+        if version[1] > self.max_size:
+            return None
+        if version != self._version:
+            async with self._lock:
+                if version != self._version:
+                    rows = await repo.get_coordinates()
+                    x = np.array([row.x for row in rows], dtype=np.float64)
+                    y = np.array([row.y for row in rows], dtype=np.float64)
+                    self.ids = np.array([row.id for row in rows], dtype=np.int64)
+                    self.grid = GridIndex(x, y, self.cell_size)
+                    self.clusters = ClusterGrid(x, y, self.cluster_max_zoom - 1, self.cells_per_tile)
+                    self._version = version
+        return self
+
+    def nearby(self, x: float, y: float, radius_km: float, limit: int) -> tuple[list[int], list[float]]:
+        indices, distances = self.grid.query_radius(x, y, radius_km, limit)
+        return self.ids[indices].tolist(), distances.tolist()
+
+    def markers(self, boxes: list[tuple[float, float, float, float]]) -> list[tuple[int, float, float]]:
+        indices = np.concatenate([self.grid.in_box(*box) for box in boxes])
+        return list(zip(self.ids[indices].tolist(), self.grid.x[indices].tolist(), self.grid.y[indices].tolist()))
+
+    def cluster(
+        self,
+        zoom: int,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float
+    ) -> list[tuple[int, float, float, int]]:
+        counts, x, y, first = self.clusters.query(zoom, min_x, min_y, max_x, max_y)
+        return list(zip(counts.tolist(), x.tolist(), y.tolist(), self.ids[first].tolist()))
+
+
+building_geo_index = BuildingGeoIndex(
+    settings.geo_index_cell_size,
+    settings.geo_index_max_buildings,
+    settings.map_cluster_max_zoom,
+    settings.map_cluster_cells_per_tile
+)
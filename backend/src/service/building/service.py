@@ -1,12 +1,16 @@
 from typing import Annotated
 from fastapi import Depends
 
+from src.config import settings
+from src.core.db import after_commit
 from src.core.exc import BadRequestError
-from src.core.utils import undefined
+from src.core.utils import bounding_box, haversine_km, undefined
 from src.models import Building
 from src.repo.building import BuildingRepository, BuildingRepoDep
+from src.service.building.geo import building_geo_index
 from src.service.files import FileStorageService, FileServiceDep
-from src.schemes import CreateBuildingDTO, UpdateBuildingDTO
+from src.service.place.scheme import scheme_cache
+from src.schemes import CreateBuildingDTO, MapClusterDTO, UpdateBuildingDTO
 
 __all__ = ("BuildingService", "BuildingServiceDep")
 
@@ -23,6 +27,78 @@ class BuildingService:
     async def get_all(self, limit: int, offset: int) -> (list[Building], int):
         return await self.repo.find_all(limit, offset)
 
+    async def get_version(self, building_id: int) -> int | None:
+        return await self.repo.get_version(building_id)
+
+    async def get_list_version(self) -> tuple[int, int]:
+        return await self.repo.get_list_version()
+
+    async def search(self, text: str, limit: int) -> list[Building]:
+        return await self.repo.search(text, limit)
+
+    async def get_nearby(self, x: float, y: float, radius_km: float, limit: int) -> list[tuple[Building, float]]:
+        """
+        Ближайшие коворкинги в радиусе `radius_km` от точки, по возрастанию расстояния
+        """
+        index = await building_geo_index.get(self.repo)
+        if index is not None:
+            ids, distances = index.nearby(x, y, radius_km, limit)
+            buildings = {building.id: building for building in await self.repo.get_by_ids(ids)}
+            return [(buildings[i], d) for i, d in zip(ids, distances) if i in buildings]
+
+        candidates = await self.repo.find_in_box(*bounding_box(x, y, radius_km))
+        distances = haversine_km(
+            [building.x for building in candidates],
+            [building.y for building in candidates],
+            x,
+            y
+        )
+        found = sorted(
+            ((building, float(d)) for building, d in zip(candidates, distances) if d <= radius_km),
+            key=lambda item: item[1]
+        )
+        return found[:limit]
+
+    async def get_clusters(
+        self,
+        zoom: int,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float
+    ) -> list[MapClusterDTO]:
+        """
+        Коворкинги в видимой области карты, сгруппированные по ячейкам сетки масштаба `zoom`.
+        Начиная с `map_cluster_max_zoom` возвращаются отдельные коворкинги
+        """
+        boxes = [(min_x, min_y, max_x, max_y)]
+        if min_x > max_x:
+            boxes = [(min_x, min_y, 180.0, max_y), (-180.0, min_y, max_x, max_y)]
+
+        index = await building_geo_index.get(self.repo)
+        if zoom >= settings.map_cluster_max_zoom:
+            if index is not None:
+                markers = index.markers(boxes)
+            else:
+                markers = [(b.id, b.x, b.y) for box in boxes for b in await self.repo.find_in_box(*box)]
+            return [MapClusterDTO(x=x, y=y, count=1, building_id=i) for i, x, y in markers]
+
+        if index is not None:
+            clusters = index.cluster(zoom, min_x, min_y, max_x, max_y)
+        else:
+            rows = await self.repo.cluster_in_box(
+                min_x, min_y, max_x, max_y, (2 ** zoom) * settings.map_cluster_cells_per_tile
+            )
+            clusters = [(row.count, row.x, row.y, row.building_id) for row in rows]
+        return [
+            MapClusterDTO(x=x, y=y, count=count, building_id=building_id if count == 1 else None)
+            for count, x, y, building_id in clusters
+        ]
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> tuple[list[Building], int, str | None]:
+        buildings, next_cursor = await self.repo.find_page(limit, cursor)
+        return buildings, await self.repo.count(), next_cursor
+
     async def insert(self, data: CreateBuildingDTO) -> Building:
         if not all([await self.file_service.is_file_exists(image_id) for image_id in data.images_id]):
             raise BadRequestError("Invalid images")
@@ -30,6 +106,8 @@ class BuildingService:
 
     async def delete(self, building: Building) -> None:
         await self.repo.delete(building)
+        building_id = building.id
+        after_commit(self.repo.session, lambda: scheme_cache.invalidate(building_id))
 
     async def update(self, building: Building, data: UpdateBuildingDTO) -> None:
         for k, v in data.__dict__.items():
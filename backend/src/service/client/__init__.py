@@ -1,2 +1,4 @@
 from .deps import *
-from .service import *
\ No newline at end of file
+from .service import *
+from .occupancy import *
+from .importing import *
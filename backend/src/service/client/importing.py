@@ -0,0 +1,56 @@
+import csv
+import io
+from typing import Any, Iterator
+
+import orjson
+from pydantic import ValidationError
+
+from src.config import settings
+from src.core.exc import BadRequestError
+from src.schemes import ImportClientDTO, ImportFormat
+
+
+__all__ = ("parse_clients",)
+
+
+def _read_csv(text: str) -> Iterator[tuple[int, Any]]:
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "email" not in reader.fieldnames:
+        raise BadRequestError("CSV header should contain email column")
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if value not in (None, "")}
+
+
+def _read_jsonl(text: str) -> Iterator[tuple[int, Any]]:
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            yield line, None
+
+
+def parse_clients(data: bytes, fmt: ImportFormat) -> list[ImportClientDTO]:
+    """
+    Клиенты из CSV с заголовком или JSONL с полями `email`, `name`, `access_level`.
+    Файл с ошибками не загружается целиком, в ответе перечисляются номера первых неверных строк
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BadRequestError("File should be UTF-8 encoded")
+
+    clients, invalid = [], []
+    for line, row in (_read_csv(text) if fmt == "csv" else _read_jsonl(text)):
+        try:
+            clients.append(ImportClientDTO.model_validate(row))
+        except ValidationError:
+            invalid.append(line)
+        if len(clients) > settings.client_import_max_rows:
+            raise BadRequestError(f"File should contain at most {settings.client_import_max_rows} clients")
+    if invalid:
+        raise BadRequestError(f"Invalid clients on lines: {', '.join(map(str, invalid[:20]))}")
+    if not clients:
+        raise BadRequestError("File contains no clients")
+    return clients
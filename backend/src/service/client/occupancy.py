@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import heapq
+import time
+from typing import Any, Callable
+
+import pytz
+
+from src.config import settings
+from src.repo.client import ClientRepository
+from src.schemes import ClientCurrentVisitDTO, FloorOccupancyDTO
+
+
+__all__ = ("OccupancyRegistry", "occupancy_registry")
+
+
+class OccupancyRegistry:
+    """
+    Текущие посещения в памяти воркера, сгруппированные по коворкингу и этажу.
+    Загружается из БД при старте и раз в `sync_interval` секунд, чтобы учесть отметки из других воркеров,
+    между синхронизациями обновляется отметками этого воркера. Закончившиеся посещения отбрасываются при чтении
+    """
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._floors: dict[tuple[int, int], dict[int, ClientCurrentVisitDTO]] = {}
+        self._keys: dict[int, tuple[int, int]] = {}
+        self._expiry: list[tuple[datetime.datetime, int]] = []
+        self._synced_at: float | None = None
+        # Изменения, сделанные во время загрузки, повторяются поверх загруженного состояния
+        self._journal: list[tuple[Callable, tuple[Any, ...]]] | None = None
+        self._lock = asyncio.Lock()
+
+    def _apply(self, operation: Callable, *args: Any) -> None:
+        if self._journal is not None:
+            self._journal.append((operation, args))
+        operation(*args)
+
+    def _put(self, visit: ClientCurrentVisitDTO) -> None:
+        self._remove(visit.visit_id)
+        key = (visit.place.building_id, visit.place.floor)
+        self._floors.setdefault(key, {})[visit.visit_id] = visit
+        self._keys[visit.visit_id] = key
+        heapq.heappush(self._expiry, (visit.visit_till, visit.visit_id))
+
+    def _remove(self, visit_id: int) -> None:
+        key = self._keys.pop(visit_id, None)
+        if key is None:
+            return
+        visits = self._floors[key]
+        del visits[visit_id]
+        if not visits:
+            del self._floors[key]
+
+    def _set_feedbacked(self, visit_id: int) -> None:
+        key = self._keys.get(visit_id)
+        if key is not None:
+            self._floors[key][visit_id].is_feedbacked = True
+
+    def add(self, visit: ClientCurrentVisitDTO) -> None:
+        self._apply(self._put, visit)
+
+    def remove(self, visit_id: int) -> None:
+        self._apply(self._remove, visit_id)
+
+    def set_feedbacked(self, visit_id: int) -> None:
+        self._apply(self._set_feedbacked, visit_id)
+
+    def _expire(self) -> None:
+        now = datetime.datetime.now(pytz.UTC)
+        while self._expiry and self._expiry[0][0] < now:
+            visit_till, visit_id = heapq.heappop(self._expiry)
+            key = self._keys.get(visit_id)
+            # В куче могут остаться записи удалённых или заново добавленных посещений
+            if key is not None and self._floors[key][visit_id].visit_till == visit_till:
+                self._remove(visit_id)
+
+    def _is_stale(self) -> bool:
+        return self._synced_at is None or time.monotonic() - self._synced_at > self.sync_interval
+
+    async def sync(self, repo: ClientRepository, force: bool = True) -> None:
+        """
+        Полная загрузка текущих посещений из БД
+        """
+        async with self._lock:
+            if not force and not self._is_stale():
+                return
+            self._journal = []
+            try:
+                visits = await repo.get_currently_visiting_clients_with_places()
+            finally:
+                journal, self._journal = self._journal, None
+            self._floors, self._keys, self._expiry = {}, {}, []
+            for visit in visits:
+                self._put(visit)
+            for operation, args in journal:
+                operation(*args)
+            self._synced_at = time.monotonic()
+
+    async def _refresh(self, repo: ClientRepository) -> None:
+        if self._is_stale():
+            await self.sync(repo, force=False)
+        self._expire()
+
+    async def get_visits(self, repo: ClientRepository, building_id: int | None = None) -> list[ClientCurrentVisitDTO]:
+        """
+        Текущие посещения, упорядоченные по коворкингу, этажу и брони
+        """
+        await self._refresh(repo)
+        return [
+            visit
+            for key in sorted(self._floors)
+            if building_id is None or key[0] == building_id
+            for _, visit in sorted(self._floors[key].items())
+        ]
+
+    async def get_floors(self, repo: ClientRepository, building_id: int) -> list[FloorOccupancyDTO]:
+        """
+        Количество посетителей и занятые места по этажам коворкинга
+        """
+        await self._refresh(repo)
+        return [
+            FloorOccupancyDTO(
+                floor=floor,
+                visitors_count=len(visits),
+                place_ids=sorted({visit.place.id for visit in visits.values()})
+            )
+            for (building, floor), visits in sorted(self._floors.items())
+            if building == building_id
+        ]
+
+
+occupancy_registry = OccupancyRegistry(settings.occupancy_sync_interval)
@@ -1,13 +1,16 @@
 import hashlib
 from typing import Annotated, List
 
-from fastapi import BackgroundTasks, Depends
+from fastapi import Depends
 
 from src.core.exc import EmailConflictError, UnauthorizedError
 from src.enums import AccessLevel
 from src.models import Client
 from src.repo.client import ClientRepoDep, ClientRepository
-from src.schemes import CreateClientDTO, UpdateClientDTO, ClientCurrentVisitDTO, CreateAdminDTO
+from src.schemes import (ClientCurrentVisitDTO, ClientImportResultDTO, CreateAdminDTO, CreateClientDTO, FloorOccupancyDTO,
+                         ImportFormat, UpdateClientDTO)
+from src.service.client.importing import parse_clients
+from src.service.client.occupancy import occupancy_registry
 from src.service.smtp import SMTPServiceDep, SMTPService
 from src.core.utils.jwt import create_token
 
@@ -44,7 +47,7 @@ class ClientService:
     async def update(self, client: Client, data: UpdateClientDTO):
         client.name = data.name
 
-    async def create_admin(self, admin: CreateAdminDTO, background_tasks: BackgroundTasks):
+    async def create_admin(self, admin: CreateAdminDTO):
         if await self.repo.is_exists_by_email(str(admin.email)):
             await self.repo.set_access_level_by_email(email=str(admin.email), access_level=AccessLevel.ADMIN)
         else:
@@ -54,7 +57,18 @@ class ClientService:
                 name="",
                 access_level=AccessLevel.ADMIN,
             )
-        background_tasks.add_task(self.smtp_service.send_admin_register_email, admin)
+        await self.smtp_service.send_admin_register_email(admin)
+
+    async def import_clients(self, data: bytes, fmt: ImportFormat) -> ClientImportResultDTO:
+        clients = parse_clients(data, fmt)
+        rows = await self.repo.bulk_upsert([(str(client.email), client.name, client.access_level) for client in clients])
+        invited = [row.email for row in rows if row.is_invited]
+        await self.smtp_service.send_invite_emails(invited)
+        return ClientImportResultDTO(
+            total=len(rows),
+            created=sum(row.is_created for row in rows),
+            invited=len(invited)
+        )
 
     async def create_admin_for_tests(self, client: CreateClientDTO) -> Client:
         if await self.repo.is_exists_by_email(str(client.email)):
@@ -67,19 +81,33 @@ class ClientService:
             access_level=AccessLevel.ADMIN,
         )
 
-    async def get_all(self, limit: int = 100, offset: int = 0, order_by: str = "id") -> list[Client]:
-        return await self.repo.find_all(limit=limit, offset=offset, order_by=order_by)
+    async def get_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        order_by: str = "id"
+    ) -> tuple[list[Client], str | None]:
+        return await self.repo.find_page(limit, cursor, order_by=order_by)
 
     async def get_all_admins(self) -> list[Client]:
         return await self.repo.find_all_access_level_filter(
             access_level=AccessLevel.ADMIN
         )
 
+    async def get_admins_page(self, limit: int, cursor: str | None = None) -> tuple[list[Client], str | None]:
+        return await self.repo.find_page(limit, cursor, access_level=AccessLevel.ADMIN)
+
     async def remove_admin(self, admin_id: int) -> None:
         await self.repo.set_access_level_by_id(id=admin_id, access_level=AccessLevel.USER)
 
-    async def get_currently_visiting_clients_with_places(self) -> List[ClientCurrentVisitDTO]:
-        return await self.repo.get_currently_visiting_clients_with_places()
+    async def get_currently_visiting_clients_with_places(
+        self,
+        building_id: int | None = None
+    ) -> List[ClientCurrentVisitDTO]:
+        return await occupancy_registry.get_visits(self.repo, building_id)
+
+    async def get_occupancy(self, building_id: int) -> List[FloorOccupancyDTO]:
+        return await occupancy_registry.get_floors(self.repo, building_id)
 
 
 def create_client_service(repo: ClientRepoDep, smtp_service: SMTPServiceDep) -> ClientService:
@@ -0,0 +1,151 @@
+import csv
+import io
+from typing import Annotated, AsyncIterator, Callable, Literal, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Depends
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.config import settings
+from src.core.db import get_engine
+from src.repo.export import ExportRepository
+
+
+__all__ = ("ExportFormat", "EXPORT_MEDIA_TYPES", "ExportService", "ExportServiceDep", "write_csv", "write_parquet")
+
+
+ExportFormat = Literal["csv", "parquet"]
+
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+VISIT_EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("client_id", pa.int64()),
+    ("client_name", pa.string()),
+    ("client_email", pa.string()),
+    ("building_id", pa.int64()),
+    ("building_name", pa.string()),
+    ("place_id", pa.int64()),
+    ("place_name", pa.string()),
+    ("floor", pa.int32()),
+    ("visit_from", _TIMESTAMP),
+    ("visit_till", _TIMESTAMP),
+    ("created_at", _TIMESTAMP),
+    ("is_visited", pa.bool_()),
+    ("is_feedbacked", pa.bool_()),
+])
+
+FEEDBACK_EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("visit_id", pa.int64()),
+    ("client_id", pa.int64()),
+    ("client_name", pa.string()),
+    ("client_email", pa.string()),
+    ("building_id", pa.int64()),
+    ("building_name", pa.string()),
+    ("place_id", pa.int64()),
+    ("place_name", pa.string()),
+    ("rating", pa.int32()),
+    ("text", pa.string()),
+    ("created_at", _TIMESTAMP),
+])
+
+
+async def write_csv(columns: Sequence[str], batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """
+    Кодирует пачки строк в CSV, каждая пачка отдаётся отдельным куском
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Parquet пишет смещения групп строк в футер, поэтому позиция должна расти и после выдачи данных
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def write_parquet(schema: pa.Schema, batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """
+    Кодирует пачки строк в Parquet, каждая пачка становится отдельной группой строк
+    """
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        async for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.pop()
+    yield sink.pop()
+
+
+class ExportService:
+    """
+    Выгрузка броней и отзывов.
+    Данные читаются курсором на стороне сервера и отдаются по мере чтения, не накапливаясь в памяти
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def _export(
+        self,
+        fmt: ExportFormat,
+        schema: pa.Schema,
+        stream: Callable[[ExportRepository, int], AsyncIterator[Sequence[Row]]]
+    ) -> AsyncIterator[bytes]:
+        # Ответ отдаётся уже после закрытия сессии запроса, поэтому выгрузка открывает свою
+        async with AsyncSession(self.engine, expire_on_commit=False, autoflush=False) as session:
+            batches = stream(ExportRepository(session), settings.export_batch_size)
+            chunks = write_csv(schema.names, batches) if fmt == "csv" else write_parquet(schema, batches)
+            async for chunk in chunks:
+                if chunk:
+                    yield chunk
+
+    def export_visits(self, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        return self._export(fmt, VISIT_EXPORT_SCHEMA, ExportRepository.stream_visits)
+
+    def export_feedbacks(self, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        return self._export(fmt, FEEDBACK_EXPORT_SCHEMA, ExportRepository.stream_feedbacks)
+
+
+def get_export_service(engine: AsyncEngine = Depends(get_engine)) -> ExportService:
+    return ExportService(engine)
+
+
+ExportServiceDep = Annotated[ExportService, Depends(get_export_service)]
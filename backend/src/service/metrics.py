@@ -1,26 +1,56 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Annotated, Any, Dict, List
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, TypeVar
 
+import numpy as np
+import pytz
 from fastapi import Depends
-from sqlalchemy import desc, func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, cast, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.sql import extract
 
-from src.core.db import SessionDep
-from src.models import Building, Client, Place, PlaceVisit
-from src.schemes.metrics import LastBookingViewForMetrics, MetricsDTO, PopularPlaceViewForMetrics
+from src.config import settings
+from src.core.cache import StaleWhileRevalidateCache
+from src.core.db import SessionDep, get_engine
+from src.core.exc import BadRequestError
+from src.core.utils import (DAY_SECONDS, clip_to_open_hours, coverage_by_slots, open_seconds_by_slots,
+                            slot_boundaries)
+from src.models import BookingDailyStats, Building, Client, Place, PlaceStats, PlaceVisit
+from src.repo.client import ClientRepository
+from src.repo.place import PlaceRepository
+from src.schemes.metrics import (BuildingUtilizationDTO, FloorUtilizationDTO, LastBookingViewForMetrics, MetricsDTO,
+                                 PlaceUtilizationDTO, PopularPlaceViewForMetrics, UtilizationReportDTO)
+
+
+T = TypeVar("T")
+
+UTILIZATION_SLOT_SECONDS = {"hour": 3600, "day": DAY_SECONDS}
+UTILIZATION_MAX_SLOTS = 10000
+
+
+def _percent(value: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    result = np.divide(value * 100, capacity, out=np.zeros_like(value, dtype=np.float64), where=capacity > 0)
+    return np.round(np.minimum(result, 100), 2)
 
 
 class MetricsService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, engine: AsyncEngine):
         self.session = session
+        self.engine = engine
+
+    async def _in_new_session(self, func: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        # Отдельная сессия берёт своё соединение из пула, что позволяет выполнять запросы параллельно
+        async with AsyncSession(self.engine, expire_on_commit=False, autoflush=False) as session:
+            return await func(session)
+
+    @staticmethod
+    def _average(total_minutes, count):
+        return func.sum(total_minutes) / func.nullif(func.sum(count), 0)
 
     async def get_average_visit_duration_minutes(self) -> float:
         query = select(
-            func.avg(
-                extract('epoch', PlaceVisit.visit_till - PlaceVisit.visit_from) / 60
-            )
-        ).where(PlaceVisit.is_visited == True)
+            self._average(BookingDailyStats.visited_minutes, BookingDailyStats.visited_count)
+        )
 
         result = await self.session.execute(query)
         avg_minutes = result.scalar()
@@ -28,9 +58,7 @@ class MetricsService:
 
     async def get_average_book_duration_minutes(self) -> float:
         query = select(
-            func.avg(
-                extract('epoch', PlaceVisit.visit_till - PlaceVisit.visit_from) / 60
-            )
+            self._average(BookingDailyStats.booked_minutes, BookingDailyStats.bookings_count)
         )
 
         result = await self.session.execute(query)
@@ -38,21 +66,19 @@ class MetricsService:
         return round(avg_minutes if avg_minutes is not None else 0, 2)
 
     async def get_coworking_count(self) -> int:
-        query = select(func.count()).select_from(Place)
-        result = await self.session.execute(query)
-        return result.scalar() or 0
+        return await PlaceRepository.place_count.count(self.session)
 
     async def get_user_count(self) -> int:
-        query = select(func.count()).select_from(Client)
-        result = await self.session.execute(query)
-        return result.scalar() or 0
+        return await ClientRepository.row_count.count(self.session)
 
     async def get_total_bookings_count(self) -> int:
-        query = select(func.count()).select_from(PlaceVisit)
-        result = await self.session.execute(query)
-        return result.scalar() or 0
+        return await PlaceRepository.visit_count.count(self.session)
 
     async def get_last_five_bookings(self) -> List[LastBookingViewForMetrics]:
+        return await self._get_last_five_bookings(self.session)
+
+    @staticmethod
+    async def _get_last_five_bookings(session: AsyncSession) -> List[LastBookingViewForMetrics]:
         query = select(
             PlaceVisit.id,
             Client.name.label("client_name"),
@@ -71,7 +97,7 @@ class MetricsService:
             desc(PlaceVisit.created_at)
         ).limit(5)
 
-        result = await self.session.execute(query)
+        result = await session.execute(query)
         bookings = []
 
         for booking in result:
@@ -127,22 +153,28 @@ class MetricsService:
         return bookings
 
     async def get_most_popular_places(self, limit: int = 5) -> List[PopularPlaceViewForMetrics]:
+        return await self._get_most_popular_places(self.session, limit)
+
+    @staticmethod
+    async def _get_most_popular_places(session: AsyncSession, limit: int = 5) -> List[PopularPlaceViewForMetrics]:
         query = select(
             Place.id,
             Place.name,
             Building.name.label("building_name"),
-            func.count(PlaceVisit.id).label("visit_count")
+            PlaceStats.bookings_count.label("visit_count")
+        ).select_from(
+            PlaceStats
         ).join(
-            PlaceVisit, Place.id == PlaceVisit.place_id
+            Place, Place.id == PlaceStats.place_id
         ).join(
-            Building, Place.building_id == Building.id
-        ).group_by(
-            Place.id, Building.name
+            Building, Building.id == PlaceStats.building_id
+        ).filter(
+            PlaceStats.bookings_count > 0
         ).order_by(
-            desc("visit_count")
+            PlaceStats.bookings_count.desc()
         ).limit(limit)
 
-        result = await self.session.execute(query)
+        result = await session.execute(query)
         popular_places = []
 
         for place in result:
@@ -155,39 +187,56 @@ class MetricsService:
 
         return popular_places
 
+    async def get_summary_metrics(self) -> Dict[str, Any]:
+        # Количества строк - скалярные подзапросы или закэшированные константы, вся сводка собирается за один запрос
+        query = select(
+            self._average(
+                BookingDailyStats.visited_minutes, BookingDailyStats.visited_count
+            ).label("average_visit_duration_minutes"),
+            self._average(
+                BookingDailyStats.booked_minutes, BookingDailyStats.bookings_count
+            ).label("average_book_duration_minutes"),
+            PlaceRepository.place_count.expression().label("coworking_count"),
+            ClientRepository.row_count.expression().label("user_count"),
+            PlaceRepository.visit_count.expression().label("total_bookings"),
+        ).select_from(BookingDailyStats)
+
+        row = (await self.session.execute(query)).one()
+        PlaceRepository.visit_count.store(row.total_bookings)
+        return {
+            "average_visit_duration_minutes": round(row.average_visit_duration_minutes or 0, 2),
+            "average_book_duration_minutes": round(row.average_book_duration_minutes or 0, 2),
+            "coworking_count": row.coworking_count,
+            "user_count": row.user_count,
+            "total_bookings": row.total_bookings,
+        }
+
     async def get_dashboard_metrics(self) -> MetricsDTO:
+        summary, last_bookings, most_popular_places = await asyncio.gather(
+            self.get_summary_metrics(),
+            self._in_new_session(self._get_last_five_bookings),
+            self._in_new_session(self._get_most_popular_places),
+        )
         return MetricsDTO(
-            average_visit_duration_minutes=await self.get_average_visit_duration_minutes(),
-            average_book_duration_minutes=await self.get_average_book_duration_minutes(),
-            coworking_count=await self.get_coworking_count(),
-            user_count=await self.get_user_count(),
-            total_bookings=await self.get_total_bookings_count(),
-            last_bookings=await self.get_last_five_bookings(),
-            most_popular_places=await self.get_most_popular_places()
+            **summary,
+            last_bookings=last_bookings,
+            most_popular_places=most_popular_places
         )
 
     async def get_booking_statistics_by_time(self, days: int = 30) -> Dict[str, Any]:
-        start_date = datetime.now() - timedelta(days=days)
+        start_date = (datetime.now(pytz.UTC) - timedelta(days=days)).date()
 
-        query_total = select(func.count()).select_from(PlaceVisit).where(
-            PlaceVisit.created_at >= start_date
-        )
-        result_total = await self.session.execute(query_total)
-        total_bookings = result_total.scalar() or 0
-
-        query_completed = select(func.count()).select_from(PlaceVisit).where(
-            PlaceVisit.is_visited == True,
-            PlaceVisit.visit_till >= start_date
-        )
-        result_completed = await self.session.execute(query_completed)
-        completed_visits = result_completed.scalar() or 0
-
-        query_feedback = select(func.count()).select_from(PlaceVisit).where(
-            PlaceVisit.is_feedbacked == True,
-            PlaceVisit.visit_till >= start_date
+        query = select(
+            func.sum(BookingDailyStats.bookings_count).label("total_bookings"),
+            func.sum(BookingDailyStats.visited_count).label("completed_visits"),
+            func.sum(BookingDailyStats.feedback_count).label("with_feedback"),
+        ).where(
+            BookingDailyStats.day >= start_date
         )
-        result_feedback = await self.session.execute(query_feedback)
-        with_feedback = result_feedback.scalar() or 0
+        row = (await self.session.execute(query)).one()
+        total_bookings = row.total_bookings or 0
+        completed_visits = row.completed_visits or 0
+        with_feedback = row.with_feedback or 0
 
         return {
             "period_days": days,
@@ -198,9 +247,168 @@ class MetricsService:
             "feedback_rate": round((with_feedback / completed_visits * 100) if completed_visits > 0 else 0, 2)
         }
 
+    @staticmethod
+    async def _get_visit_intervals(
+        session: AsyncSession,
+        date_from: datetime,
+        date_to: datetime,
+        building_id: int | None
+    ) -> np.ndarray:
+        query = select(
+            PlaceVisit.place_id,
+            cast(extract("epoch", PlaceVisit.visit_from), Float),
+            cast(extract("epoch", PlaceVisit.visit_till), Float),
+            PlaceVisit.is_visited
+        ).where(
+            PlaceVisit.visit_till > date_from,
+            PlaceVisit.visit_from < date_to
+        )
+        if building_id is not None:
+            query = query.join(Place, PlaceVisit.place_id == Place.id).where(Place.building_id == building_id)
+
+        rows = (await session.execute(query)).all()
+        return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+    async def get_utilization(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        granularity: str = "day",
+        building_id: int | None = None
+    ) -> UtilizationReportDTO:
+        date_from = date_from if date_from.tzinfo else date_from.replace(tzinfo=pytz.UTC)
+        date_to = date_to if date_to.tzinfo else date_to.replace(tzinfo=pytz.UTC)
+        if date_from >= date_to:
+            raise BadRequestError("from should be less than to")
+        boundaries = slot_boundaries(date_from.timestamp(), date_to.timestamp(), UTILIZATION_SLOT_SECONDS[granularity])
+        if len(boundaries) - 1 > UTILIZATION_MAX_SLOTS:
+            raise BadRequestError("Too many slots, use a shorter period or a larger granularity")
+
+        buildings_query = select(Building.id, Building.name, Building.open_from, Building.open_till).order_by(Building.id)
+        places_query = select(Place.id, Place.name, Place.building_id, Place.floor).order_by(Place.id)
+        if building_id is not None:
+            buildings_query = buildings_query.where(Building.id == building_id)
+            places_query = places_query.where(Place.building_id == building_id)
+
+        buildings = (await self.session.execute(buildings_query)).all()
+        places = (await self.session.execute(places_query)).all()
+        visits = await self._get_visit_intervals(self.session, date_from, date_to, building_id)
+
+        building_ids = np.array([b.id for b in buildings], dtype=np.int64)
+        open_from = np.array([b.open_from if b.open_from is not None else 0 for b in buildings], dtype=np.float64)
+        open_till = np.array(
+            [b.open_till if b.open_till is not None else DAY_SECONDS for b in buildings],
+            dtype=np.float64
+        )
+        place_ids = np.array([p.id for p in places], dtype=np.int64)
+        place_building = np.searchsorted(building_ids, np.array([p.building_id for p in places], dtype=np.int64))
+        place_floor = np.array([p.floor for p in places], dtype=np.int64)
+
+        floor_keys, place_floor_index = np.unique(
+            np.stack((place_building, place_floor), axis=1).reshape(-1, 2),
+            axis=0,
+            return_inverse=True
+        )
+        place_floor_index = place_floor_index.reshape(-1)
+        floor_building = floor_keys[:, 0]
+        places_per_floor = np.bincount(place_floor_index, minlength=len(floor_keys))
+        places_per_building = np.bincount(place_building, minlength=len(buildings))
+
+        visit_place = np.searchsorted(place_ids, visits[:, 0].astype(np.int64))
+        visit_building = place_building[visit_place]
+        pieces, pieces_start, pieces_end = clip_to_open_hours(
+            np.arange(len(visits)), visits[:, 1], visits[:, 2], open_from[visit_building], open_till[visit_building]
+        )
+        pieces_place = visit_place[pieces]
+        visited = visits[pieces, 3].astype(bool)
+        pieces_floor = place_floor_index[pieces_place]
+
+        open_slots = open_seconds_by_slots(boundaries, open_from, open_till)
+        open_total = open_slots.sum(axis=1)
+
+        lengths = (
+            np.clip(pieces_end, boundaries[0], boundaries[-1]) -
+            np.clip(pieces_start, boundaries[0], boundaries[-1])
+        )
+        place_booked = np.bincount(pieces_place, weights=lengths, minlength=len(places))
+        place_visited = np.bincount(pieces_place[visited], weights=lengths[visited], minlength=len(places))
+        place_capacity = open_total[place_building]
+
+        floor_booked = coverage_by_slots(pieces_floor, pieces_start, pieces_end, len(floor_keys), boundaries)
+        floor_visited = coverage_by_slots(
+            pieces_floor[visited], pieces_start[visited], pieces_end[visited], len(floor_keys), boundaries
+        )
+        floor_capacity = open_slots[floor_building] * places_per_floor[:, None]
+
+        building_booked = np.zeros_like(open_slots)
+        building_visited = np.zeros_like(open_slots)
+        np.add.at(building_booked, floor_building, floor_booked)
+        np.add.at(building_visited, floor_building, floor_visited)
+        building_capacity = open_slots * places_per_building[:, None]
+
+        place_booked_percent = _percent(place_booked, place_capacity)
+        place_visited_percent = _percent(place_visited, place_capacity)
+        floor_booked_series = _percent(floor_booked, floor_capacity)
+        floor_visited_series = _percent(floor_visited, floor_capacity)
+        floor_booked_percent = _percent(floor_booked.sum(axis=1), floor_capacity.sum(axis=1))
+        floor_visited_percent = _percent(floor_visited.sum(axis=1), floor_capacity.sum(axis=1))
+        building_booked_series = _percent(building_booked, building_capacity)
+        building_visited_series = _percent(building_visited, building_capacity)
+        building_booked_percent = _percent(building_booked.sum(axis=1), building_capacity.sum(axis=1))
+        building_visited_percent = _percent(building_visited.sum(axis=1), building_capacity.sum(axis=1))
+
+        return UtilizationReportDTO(
+            date_from=date_from,
+            date_to=date_to,
+            granularity=granularity,
+            slots=[datetime.fromtimestamp(ts, pytz.UTC) for ts in boundaries[:-1]],
+            buildings=[
+                BuildingUtilizationDTO(
+                    id=building.id,
+                    name=building.name,
+                    booked_percent=building_booked_percent[i],
+                    visited_percent=building_visited_percent[i],
+                    booked_series=building_booked_series[i].tolist(),
+                    visited_series=building_visited_series[i].tolist()
+                )
+                for i, building in enumerate(buildings)
+            ],
+            floors=[
+                FloorUtilizationDTO(
+                    building_id=buildings[building_index].id,
+                    floor=floor,
+                    booked_percent=floor_booked_percent[i],
+                    visited_percent=floor_visited_percent[i],
+                    booked_series=floor_booked_series[i].tolist(),
+                    visited_series=floor_visited_series[i].tolist()
+                )
+                for i, (building_index, floor) in enumerate(floor_keys.tolist())
+            ],
+            places=[
+                PlaceUtilizationDTO(
+                    id=place.id,
+                    name=place.name,
+                    building_id=place.building_id,
+                    floor=place.floor,
+                    booked_percent=place_booked_percent[i],
+                    visited_percent=place_visited_percent[i]
+                )
+                for i, place in enumerate(places)
+            ]
+        )
+
+
+async def compute_dashboard_metrics() -> MetricsDTO:
+    engine = get_engine()
+    async with AsyncSession(engine, expire_on_commit=False, autoflush=False) as session:
+        return await MetricsService(session, engine).get_dashboard_metrics()
+
+
+dashboard_metrics_cache = StaleWhileRevalidateCache(compute_dashboard_metrics, ttl=settings.metrics_cache_ttl)
+
 
-async def get_metrics_service(session: SessionDep) -> MetricsService:
-    return MetricsService(session)
+async def get_metrics_service(session: SessionDep, engine: AsyncEngine = Depends(get_engine)) -> MetricsService:
+    return MetricsService(session, engine)
 
 
 MetricsServiceDep = Annotated[MetricsService, Depends(get_metrics_service)]
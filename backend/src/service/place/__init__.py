@@ -1,2 +1,4 @@
 from .service import *
-from .deps import *
\ No newline at end of file
+from .deps import *
+from .scheme import *
+from .events import *
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.events import event_broker
+from src.models import Place, PlaceVisit
+
+
+__all__ = ("VISIT_EVENTS", "building_topic", "publish_visit_event", "publish_release_events")
+
+
+VISIT_EVENTS = ("booking_created", "booking_cancelled", "booking_released", "visited")
+
+
+def building_topic(building_id: int, floor: int | None = None) -> str:
+    if floor is None:
+        return f"building:{building_id}"
+    return f"building:{building_id}:floor:{floor}"
+
+
+def _visit_data(visit_id: int, place_id: int, floor: int, visit_from: datetime, visit_till: datetime) -> dict:
+    return {
+        "visit_id": visit_id,
+        "place_id": place_id,
+        "floor": floor,
+        "visit_from": visit_from,
+        "visit_till": visit_till,
+    }
+
+
+async def publish_visit_event(session: AsyncSession, event: str, visit: PlaceVisit, place: Place) -> None:
+    """
+    Событие брони для подписчиков коворкинга и этажа, доставляется после коммита транзакции
+    """
+    await event_broker.publish(
+        session,
+        [building_topic(place.building_id), building_topic(place.building_id, place.floor)],
+        event,
+        _visit_data(visit.id, place.id, place.floor, visit.visit_from, visit.visit_till)
+    )
+
+
+async def publish_release_events(session: AsyncSession, visits: list[Row]) -> None:
+    """
+    События освобождения мест для броней, укороченных из-за неявки
+    """
+    await event_broker.publish_many(session, [
+        (
+            [building_topic(visit.building_id), building_topic(visit.building_id, visit.floor)],
+            "booking_released",
+            _visit_data(visit.id, visit.place_id, visit.floor, visit.visit_from, visit.visit_till)
+        )
+        for visit in visits
+    ])
@@ -0,0 +1,45 @@
+from functools import cached_property
+
+import msgpack
+import orjson
+
+from src.config import settings
+from src.core.cache import VersionedCache
+from src.core.responses import construct, dump
+from src.models import BuildingFloorImage, Place
+from src.schemes import BuildingFloor, PlaceDTO
+
+
+__all__ = ("SchemeSnapshot", "scheme_cache", "build_scheme")
+
+
+class SchemeSnapshot:
+    """
+    Сериализованная схема коворкинга и её ETag, MessagePack собирается при первом запросе
+    """
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+
+    @cached_property
+    def msgpack(self) -> bytes:
+        return msgpack.packb(orjson.loads(self.body))
+
+
+# Схемы меняются редко, а читаются всеми пользователями и планшетами, поэтому хранятся готовыми байтами
+scheme_cache: VersionedCache[int, SchemeSnapshot] = VersionedCache(
+    ttl=settings.scheme_cache_ttl,
+    max_size=settings.scheme_cache_max_size
+)
+
+
+def build_scheme(floors: list[tuple[BuildingFloorImage, list[Place]]]) -> bytes:
+    return orjson.dumps(dump({
+        floor.floor: BuildingFloor.model_construct(
+            floor=floor.floor,
+            image_id=floor.image_id,
+            places=[construct(PlaceDTO, place) for place in places]
+        )
+        for floor, places in floors
+    }, dict[int, BuildingFloor]))
@@ -3,15 +3,25 @@ from typing import Annotated
 
 import pytz
 from fastapi import Depends
+from sqlalchemy import Row
 from sqlalchemy.exc import IntegrityError
 
+from src.config import settings
+from src.core.db import after_commit
+from src.core.etag import make_etag
+from src.core.responses import construct
 from src.core.exc import BadRequestError, ConflictError, NotFoundError
 from src.core.utils import get_seconds_from_begin_day, undefined
-from src.models import BuildingFloorImage, Feedback, Place, PlaceVisit, Building
+from src.models import (MAX_PLACE_FEATURES, RATINGS, BuildingFloorImage, Feedback, Place, PlaceFeature, PlaceVisit,
+                        Building)
 from src.repo.place import PlaceRepoDep, PlaceRepository
-from src.schemes import CreateVisitorDTO, CreatePlaceDTO, UpdatePlaceDTO, CreateVisitFeedbackDTO, UpdateSchemeDTO
+from src.schemes import (ClientCurrentVisitDTO, CreateVisitorDTO, CreatePlaceDTO, PlaceDTO, RatingDTO, UpdatePlaceDTO,
+                         CreateVisitFeedbackDTO, UpdateSchemeDTO, VisitStatus)
 from src.schemes.scheme import CreateSchemeDTO
+from src.service.client.occupancy import occupancy_registry
 from src.service.files import FileServiceDep, FileStorageService
+from src.service.place.events import publish_visit_event
+from src.service.place.scheme import SchemeSnapshot, build_scheme, scheme_cache
 
 
 class PlaceService:
@@ -26,9 +36,83 @@ class PlaceService:
     async def get_all_by_building_id(self, building_id: int) -> list[Place]:
         return await self.repo.search_by_building_id(building_id)
 
+    async def get_features(self) -> list[PlaceFeature]:
+        return await self.repo.get_features()
+
+    async def check_features(self, features: list[str]) -> None:
+        """
+        Каждой характеристике нужен свой бит маски, а номера не переиспользуются,
+        поэтому справочник не может вырасти больше `MAX_PLACE_FEATURES`
+        """
+        new = set(features) - set(await self.repo.get_feature_bits(features))
+        if new and await self.repo.count_features() + len(new) > MAX_PLACE_FEATURES:
+            raise ConflictError(f"Too many distinct place features, at most {MAX_PLACE_FEATURES} are supported")
+
+    async def search_by_features(
+        self,
+        building_id: int,
+        floor: int | None,
+        required: list[str],
+        excluded: list[str]
+    ) -> list[Place]:
+        """
+        Места с каждой характеристикой из `required` и без характеристик из `excluded`
+        """
+        bits = await self.repo.get_feature_bits(required + excluded)
+        # Характеристики, которых нет в справочнике, нет ни у одного места
+        if any(name not in bits for name in required):
+            return []
+        required_mask = sum({bits[name] for name in required})
+        excluded_mask = sum({bits[name] for name in excluded if name in bits})
+        return await self.repo.search_by_features(required_mask, excluded_mask, building_id, floor)
+
+    async def get_floors_with_places(
+        self,
+        building_id: int,
+        floor: int | None = None
+    ) -> list[tuple[BuildingFloorImage, list[Place]]]:
+        return await self.repo.get_floors_with_places(building_id, floor)
+
+    async def render_visits_by_building_id(self, building_id: int) -> bytes:
+        return await self.repo.render_visits_by_building_id(building_id)
+
+    async def get_rating(self, place_id: int | None = None, building_id: int | None = None) -> RatingDTO:
+        row = await self.repo.stats.get_rating(place_id=place_id, building_id=building_id)
+        return RatingDTO(
+            average=round(row.rating_sum / row.feedback_count, 2) if row.feedback_count else None,
+            count=row.feedback_count,
+            histogram={rating: getattr(row, f"rating_{rating}") for rating in RATINGS}
+        )
+
     async def get_visits_by_building_id(self, building_id: int) -> list[PlaceVisit]:
         return await self.repo.get_visits_by_building_id(building_id)
 
+    async def get_scheme_version(self, building_id: int) -> tuple | None:
+        return await self.repo.get_scheme_version(building_id)
+
+    async def get_scheme(self, building_id: int) -> SchemeSnapshot | None:
+        """
+        Схема этажей коворкинга из кэша, `None` если коворкинга нет
+        """
+        async def get_version():
+            version = await self.repo.get_scheme_version(building_id)
+            return tuple(version) if version is not None else None
+
+        async def load(version: tuple) -> SchemeSnapshot:
+            if settings.render_json_in_db:
+                body = await self.repo.render_scheme(building_id)
+            else:
+                body = build_scheme(await self.repo.get_floors_with_places(building_id))
+            return SchemeSnapshot(make_etag("scheme", building_id, *version), body)
+
+        return await scheme_cache.get(building_id, get_version, load)
+
+    def _invalidate_scheme(self, building_id: int) -> None:
+        """
+        Сброс схемы в кэше воркера после коммита: до коммита читатель загрузил бы в кэш старую схему
+        """
+        after_commit(self.repo.session, lambda: scheme_cache.invalidate(building_id))
+
     async def create_scheme(self, building_id: int, data: CreateSchemeDTO):
         if await self.is_place_floor_exists(building_id, data.floor):
             raise ConflictError("Floor already exists")
@@ -42,17 +126,21 @@ class PlaceService:
             ))
         except IntegrityError:
             raise NotFoundError("Building not found")
+        self._invalidate_scheme(building_id)
 
     async def create_place(self, building_id: int, floor: int, data: CreatePlaceDTO) -> Place:
         if not await self.is_place_floor_exists(building_id, floor):
             raise NotFoundError("Floor not found")
         if data.image_id and not await self.file_service.is_file_exists(data.image_id):
             raise BadRequestError(f"File {data.image_id} does not exist")
-        return await self.repo.insert_place(Place(
+        await self.check_features(data.features)
+        place = await self.repo.insert_place(Place(
             **data.model_dump(),
             floor=floor,
             building_id=building_id
         ))
+        self._invalidate_scheme(building_id)
+        return place
 
     async def is_place_floor_exists(self, building_id: int, floor: int) -> bool:
         return await self.repo.is_place_floor_exists(building_id, floor)
@@ -61,6 +149,7 @@ class PlaceService:
         if not await self.is_place_floor_exists(building_id, floor):
             raise NotFoundError("Floor not found")
         await self.repo.delete_floor(building_id, floor)
+        self._invalidate_scheme(building_id)
 
     async def update_floor(self, building: Building, floor: int, data: UpdateSchemeDTO) -> None:
         if not self.is_place_floor_exists(building.id, floor):
@@ -71,6 +160,7 @@ class PlaceService:
         if data.image_id and not self.file_service.is_file_exists(data.image_id):
             raise BadRequestError(f"File {data.image_id} does not exist")
         await self.repo.update_places_floor(building.id, floor, data.floor, data.image_id)
+        self._invalidate_scheme(building.id)
 
     async def insert_visit(self, visitor_id: int, place: Place, data: CreateVisitorDTO) -> PlaceVisit:
         await place.awaitable_attrs.building
@@ -82,45 +172,89 @@ class PlaceService:
             raise BadRequestError("period should be in open range")
         if not await self.repo.is_unable_to_visit(place.id, data.visit_from, data.visit_till):
             raise BadRequestError("place is busy on this time")
-        return await self.repo.insert_visit(place.id, visitor_id, data.visit_from, data.visit_till)
+        visit = await self.repo.insert_visit(place.id, visitor_id, data.visit_from, data.visit_till)
+        await publish_visit_event(self.repo.session, "booking_created", visit, place)
+        return visit
 
-    async def delete_visit(self, visit_id: int) -> None:
-        return await self.repo.delete_visit(visit_id)
+    async def delete_visit(self, visit: PlaceVisit) -> None:
+        place = await visit.awaitable_attrs.place
+        await self.repo.delete_visit(visit.id)
+        await publish_visit_event(self.repo.session, "booking_cancelled", visit, place)
+        after_commit(self.repo.session, lambda: occupancy_registry.remove(visit.id))
 
-    async def get_visits_by_client_id(self, client_id: int) -> list[PlaceVisit]:
-        return await self.repo.get_visits_by_client_id(client_id)
+    async def get_visits_page_by_client_id(
+        self,
+        client_id: int,
+        limit: int,
+        cursor: str | None = None,
+        status: VisitStatus | None = None
+    ) -> tuple[list[PlaceVisit], str | None]:
+        return await self.repo.find_visits_page_by_client_id(client_id, limit, cursor, status)
 
     async def mark_visit(self, visit: PlaceVisit) -> None:
         if datetime.datetime.now(pytz.UTC) < visit.visit_from.astimezone(pytz.UTC):
             raise BadRequestError("Visit is not started")
-        visit.is_visited = True
+        await self.repo.mark_visit(visit)
+        client, place = await visit.awaitable_attrs.client, await visit.awaitable_attrs.place
+        current = ClientCurrentVisitDTO(
+            id=client.id,
+            name=client.name,
+            visit_id=visit.id,
+            visit_from=visit.visit_from,
+            visit_till=visit.visit_till,
+            is_feedbacked=visit.is_feedbacked,
+            place=construct(PlaceDTO, place)
+        )
+        await publish_visit_event(self.repo.session, "visited", visit, place)
+        after_commit(self.repo.session, lambda: occupancy_registry.add(current))
 
     async def insert_feedback(self, visit: PlaceVisit, data: CreateVisitFeedbackDTO) -> None:
         if not visit.is_visited:
             raise BadRequestError("Visit is not visited")
         if visit.is_feedbacked:
             raise BadRequestError("Visit is already feedbacked")
-        await self.repo.insert_feedback(Feedback(
+        await self.repo.insert_feedback(visit, Feedback(
             **data.model_dump(),
             visit_id=visit.id
         ))
         visit.is_feedbacked = True
+        after_commit(self.repo.session, lambda: occupancy_registry.set_feedbacked(visit.id))
 
     async def update(self, place: Place, data: UpdatePlaceDTO) -> None:
+        if data.features is not undefined:
+            await self.check_features(data.features)
         for k, v in data.__dict__.items():
             if v is not undefined:
                 if k == "image_id" and not await self.file_service.is_file_exists(v):
                     raise BadRequestError(f"File {v} does not exist")
                 setattr(place, k, v)
+        self._invalidate_scheme(place.building_id)
 
     async def delete(self, place: Place) -> None:
         await self.repo.delete(place)
+        self._invalidate_scheme(place.building_id)
 
-    async def get_all_feedbacks(self) -> list[Feedback]:
-        return await self.repo.get_all_feedbacks()
-
-    async def get_all_feedbacks_by_building_id(self, building_id: int) -> list[Feedback]:
-        return await self.repo.get_all_feedbacks_by_building_id(building_id)
+    async def get_feedbacks_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        building_id: int | None = None,
+        place_id: int | None = None,
+        rating: int | None = None,
+        date_from: datetime.datetime | None = None,
+        date_to: datetime.datetime | None = None
+    ) -> tuple[list[Row], str | None]:
+        if date_from is not None and date_to is not None and date_from >= date_to:
+            raise BadRequestError("date_from should be less than date_to")
+        return await self.repo.find_feedbacks_page(
+            limit,
+            cursor,
+            building_id=building_id,
+            place_id=place_id,
+            rating=rating,
+            date_from=date_from,
+            date_to=date_to
+        )
 
     async def refuse_feedback(self, visit: PlaceVisit):
         if not visit.is_visited:
@@ -128,6 +262,7 @@ class PlaceService:
         if visit.is_feedbacked:
             raise BadRequestError("Visit is already feedbacked")
         visit.is_feedbacked = True
+        after_commit(self.repo.session, lambda: occupancy_registry.set_feedbacked(visit.id))
 
 
 async def create_place_service(repo: PlaceRepoDep, file_service: FileServiceDep) -> PlaceService:
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+import pytz
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.core.db import LeaderLock, get_engine
+from src.repo.outbox import EmailOutboxRepository
+from src.repo.place import PlaceRepository
+from src.repo.scheduler import SchedulerRepository
+from src.service.place.events import publish_release_events
+from src.service.smtp import SMTPService
+
+
+__all__ = ("BookingScheduler", "booking_scheduler")
+
+
+logger = logging.getLogger(__name__)
+
+# Насколько далеко в прошлое ищутся неотмеченные брони, более старые считаются закрытыми
+NO_SHOW_LOOKBACK = timedelta(days=1)
+
+Finder = Callable[[SchedulerRepository], Awaitable[list[Row]]]
+Handler = Callable[[SchedulerRepository, SMTPService, list[Row]], Awaitable[None]]
+
+
+class BookingScheduler:
+    """
+    Напоминания о бронях, которые начнутся в ближайшие `reminder_lead` минут, отметка неявок -
+    броней, не отмеченных спустя `no_show_after` минут после начала, и освобождение мест неявок
+    спустя `release_after` минут после начала, если `release_after` задан.
+    Работает только в воркере, захватившем advisory-блокировку `lock_key`. Брони обрабатываются пачками,
+    каждая бронь помечается (`reminded_at`, `is_no_show`) в одной транзакции с письмами, поэтому после перезапуска
+    письма не повторяются, а бронь, созданная незадолго до начала, всё равно получает напоминание
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        reminder_lead: int,
+        no_show_after: int,
+        release_after: int | None,
+        lock_key: int
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.reminder_lead = timedelta(minutes=reminder_lead)
+        self.no_show_after = timedelta(minutes=no_show_after)
+        self.release_after = timedelta(minutes=release_after) if release_after is not None else None
+        self.lock = LeaderLock(lock_key)
+        self._task: asyncio.Task | None = None
+
+    async def _process(self, find: Finder, handle: Handler) -> int:
+        """
+        Обработка найденных броней пачками, каждая в своей транзакции.
+        `handle` помечает брони, поэтому следующая пачка их уже не находит
+        """
+        total = 0
+        while True:
+            async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+                repo = SchedulerRepository(session)
+                visits = await find(repo)
+                if visits:
+                    await handle(repo, SMTPService(EmailOutboxRepository(session)), visits)
+                await session.commit()
+            total += len(visits)
+            if len(visits) < self.batch_size:
+                return total
+
+    @staticmethod
+    async def _remind(repo: SchedulerRepository, smtp: SMTPService, visits: list[Row]) -> None:
+        await repo.set_reminded([visit.id for visit in visits])
+        await smtp.send_visit_reminders(visits)
+
+    @staticmethod
+    async def _flag_no_shows(repo: SchedulerRepository, smtp: SMTPService, visits: list[Row]) -> None:
+        await repo.flag_no_shows([visit.id for visit in visits])
+        # Письмо имеет смысл, только пока бронь не закончилась и место можно освободить
+        now = datetime.now(pytz.UTC)
+        await smtp.send_no_show_emails([visit for visit in visits if visit.visit_till > now])
+
+    async def release_no_shows(self, now: datetime) -> int:
+        """
+        Укорачивание броней неявок до текущего момента пачками, каждая в своей транзакции.
+        Изменения статистики и события для подписчиков коворкинга коммитятся вместе с пачкой
+        """
+        total = 0
+        while True:
+            async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+                released = await PlaceRepository(session).release_no_shows(
+                    now - self.release_after,
+                    now,
+                    self.batch_size
+                )
+                await publish_release_events(session, released)
+                await session.commit()
+            total += len(released)
+            if len(released) < self.batch_size:
+                return total
+
+    async def run_once(self) -> tuple[int, int, int]:
+        """
+        Один проход всех задач, возвращает количество напоминаний, неявок и освобождённых броней
+        """
+        now = datetime.now(pytz.UTC)
+        reminded = await self._process(
+            lambda repo: repo.find_unreminded(now, now + self.reminder_lead, self.batch_size),
+            self._remind
+        )
+        no_show_till = now - self.no_show_after
+        no_shows = await self._process(
+            lambda repo: repo.find_no_shows(no_show_till - NO_SHOW_LOOKBACK, no_show_till, self.batch_size),
+            self._flag_no_shows
+        )
+        released = await self.release_no_shows(now) if self.release_after is not None else 0
+        if reminded or no_shows or released:
+            logger.info(
+                "Sent %d visit reminders, flagged %d no-shows, released %d bookings",
+                reminded, no_shows, released
+            )
+        return reminded, no_shows, released
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.lock.acquire(get_engine()):
+                    await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Booking scheduler run failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.lock.release()
+
+
+booking_scheduler = BookingScheduler(
+    settings.scheduler_interval,
+    settings.scheduler_batch_size,
+    settings.reminder_lead_minutes,
+    settings.no_show_after_minutes,
+    settings.no_show_release_after_minutes,
+    settings.scheduler_lock_key
+)
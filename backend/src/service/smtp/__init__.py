@@ -1 +1,2 @@
-from .service import *
\ No newline at end of file
+from .service import *
+from .dispatcher import *
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from email.mime.text import MIMEText
+
+import aiosmtplib
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.core.db import get_engine
+from src.models import EmailOutbox
+from src.repo.outbox import EmailOutboxRepository
+
+
+__all__ = ("EmailDispatcher", "email_dispatcher")
+
+
+logger = logging.getLogger(__name__)
+
+
+def _create_email_message(message: EmailOutbox) -> MIMEText:
+    msg = MIMEText(message.body, "html")
+    msg["Subject"] = message.subject
+    msg["From"] = settings.smtp_user
+    msg["To"] = message.receiver
+    return msg
+
+
+class EmailDispatcher:
+    """
+    Фоновая отправка писем из `email_outbox` пачками через одно SMTP-соединение воркера.
+    Соединение переиспользуется между пачками и переоткрывается после ошибки или простоя дольше `idle_timeout`.
+    Неудачные письма повторяются с экспоненциальной задержкой и отбрасываются после `max_attempts` попыток
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+        backoff: float,
+        max_backoff: float,
+        lease: float,
+        idle_timeout: float
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = timedelta(seconds=lease)
+        self.idle_timeout = idle_timeout
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._used_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        """
+        Запуск отправки без ожидания `poll_interval`, вызывается после коммита новых писем
+        """
+        self._wakeup.set()
+
+    def retry_in(self, attempts: int) -> timedelta | None:
+        if attempts >= self.max_attempts:
+            return None
+        return timedelta(seconds=min(self.backoff * 2 ** (attempts - 1), self.max_backoff))
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and (
+            not self._smtp.is_connected or time.monotonic() - self._used_at > self.idle_timeout
+        ):
+            await self._disconnect()
+        if self._smtp is None:
+            smtp = aiosmtplib.SMTP(hostname=settings.smtp_server, port=settings.smtp_port, start_tls=True)
+            await smtp.connect()
+            try:
+                await smtp.login(settings.smtp_user, settings.smtp_password)
+            except aiosmtplib.SMTPException:
+                smtp.close()
+                raise
+            self._smtp = smtp
+        return self._smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    async def _send(self, messages: list[EmailOutbox]) -> tuple[list[int], list[tuple[EmailOutbox, str]]]:
+        sent, failed = [], []
+        for index, message in enumerate(messages):
+            try:
+                smtp = await self._connect()
+            except (aiosmtplib.SMTPException, OSError) as err:
+                # Без соединения остальные письма пачки тоже не отправить
+                failed.extend((rest, repr(err)) for rest in messages[index:])
+                break
+            try:
+                await smtp.send_message(_create_email_message(message))
+                self._used_at = time.monotonic()
+                sent.append(message.id)
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as err:
+                failed.append((message, repr(err)))
+            except (aiosmtplib.SMTPException, OSError) as err:
+                await self._disconnect()
+                failed.append((message, repr(err)))
+        return sent, failed
+
+    async def dispatch_batch(self) -> int:
+        """
+        Отправка одной пачки, возвращает количество взятых писем
+        """
+        async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+            messages = await EmailOutboxRepository(session).claim(self.batch_size, self.lease)
+            await session.commit()
+        if not messages:
+            return 0
+
+        sent, failed = await self._send(messages)
+        async with AsyncSession(get_engine(), expire_on_commit=False, autoflush=False) as session:
+            repo = EmailOutboxRepository(session)
+            await repo.mark_sent(sent)
+            for message, error in failed:
+                await repo.mark_failed(message.id, error, self.retry_in(message.attempts))
+            await session.commit()
+        if failed:
+            logger.warning("Failed to send %d of %d emails", len(failed), len(messages))
+        return len(messages)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                count = await self.dispatch_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email dispatch failed")
+                count = 0
+            if count < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+
+email_dispatcher = EmailDispatcher(
+    settings.email_outbox_batch_size,
+    settings.email_outbox_poll_interval,
+    settings.email_outbox_max_attempts,
+    settings.email_outbox_backoff,
+    settings.email_outbox_max_backoff,
+    settings.email_outbox_lease,
+    settings.smtp_idle_timeout
+)
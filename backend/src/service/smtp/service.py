@@ -1,47 +1,97 @@
-import smtplib
-from email.mime.text import MIMEText
+from datetime import datetime
 from typing import Annotated
 
+import pytz
 from fastapi.params import Depends
-from pydantic import EmailStr
+from sqlalchemy import Row
 
 from src.config import settings
+from src.core.db import SessionDep, after_commit
+from src.repo.outbox import EmailOutboxRepository
 from src.schemes.admin import CreateAdminDTO
+from src.service.smtp.dispatcher import email_dispatcher
 
 
 __all__ = ("SMTPService", "SMTPServiceDep")
 
 
+def _format_time(value: datetime) -> str:
+    return value.astimezone(pytz.UTC).strftime("%d.%m.%Y %H:%M UTC")
+
+
 class SMTPService:
+    """
+    Письма записываются в `email_outbox` в транзакции запроса и отправляются фоновым диспетчером,
+    поэтому запрос не ждёт SMTP, а письмо не теряется при падении воркера
+    """
+
+    def __init__(self, outbox: EmailOutboxRepository):
+        self.outbox = outbox
+
+    async def _enqueue(self, messages: list[tuple[str, str, str]]) -> None:
+        await self.outbox.enqueue(messages)
+        after_commit(self.outbox.session, email_dispatcher.wake)
+
     async def send_admin_register_email(self, admin: CreateAdminDTO):
-        msg = self.__create_email_message(
-            receiver=admin.email,
-            subject="Приглашение в BookIT",
-            text=f"""\
+        await self._enqueue([(
+            str(admin.email),
+            "Приглашение в BookIT",
+            f"""\
             Привет!<br><br>
             Тебя назначили администратором в сервисе BookIT.<br><br>
             <a href="{settings.host_url}/register?email={admin.email}">
             Нажми здесь, чтобы зарегистрироваться</a>.
             """,  # TODO: добавить base_url на котором захосчено приложение
-        )
-        self.__send_email_message(msg)
+        )])
+
+    async def send_invite_emails(self, emails: list[str]):
+        await self._enqueue([
+            (
+                email,
+                "Приглашение в BookIT",
+                f"""\
+                Привет!<br><br>
+                Тебя пригласили в сервис бронирования BookIT.<br><br>
+                <a href="{settings.host_url}/register?email={email}">
+                Нажми здесь, чтобы зарегистрироваться</a>.
+                """,
+            )
+            for email in emails
+        ])
+
+    async def send_visit_reminders(self, visits: list[Row]):
+        await self._enqueue([
+            (
+                visit.email,
+                "Напоминание о брони в BookIT",
+                f"""\
+                Привет, {visit.client_name}!<br><br>
+                Напоминаем о брони места {visit.place_name} в коворкинге {visit.building_name}
+                ({visit.building_address}) с {_format_time(visit.visit_from)} до {_format_time(visit.visit_till)}.<br><br>
+                Если планы изменились, отмени бронь, чтобы место мог занять кто-то другой.
+                """,
+            )
+            for visit in visits
+        ])
 
-    @staticmethod
-    def __create_email_message(receiver: EmailStr, subject: str, text: str) -> MIMEText:
-        msg = MIMEText(text, "html")
-        msg["Subject"] = subject
-        msg["From"] = settings.smtp_user
-        msg["To"] = receiver
-        return msg
+    async def send_no_show_emails(self, visits: list[Row]):
+        await self._enqueue([
+            (
+                visit.email,
+                "Бронь в BookIT не отмечена",
+                f"""\
+                Привет, {visit.client_name}!<br><br>
+                Бронь места {visit.place_name} в коворкинге {visit.building_name} с {_format_time(visit.visit_from)}
+                не отмечена: похоже, ты не пришёл.<br><br>
+                Если бронь больше не нужна, отмени её, чтобы освободить место.
+                """,
+            )
+            for visit in visits
+        ])
 
-    @staticmethod
-    def __send_email_message(msg: MIMEText):
-        with smtplib.SMTP(settings.smtp_server, settings.smtp_port) as server:
-            server.starttls()
-            server.login(settings.smtp_user, settings.smtp_password)
-            server.send_message(msg)
 
-        print("Письмо отправлено успешно!")
+def create_smtp_service(session: SessionDep) -> SMTPService:
+    return SMTPService(EmailOutboxRepository(session))
 
 
-SMTPServiceDep = Annotated[SMTPService, Depends(lambda: SMTPService())]
+SMTPServiceDep = Annotated[SMTPService, Depends(create_smtp_service)]
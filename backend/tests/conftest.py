@@ -19,6 +19,7 @@ from src.main import app
 from src.models import Building, Client, Place
 from src.repo.building import BuildingRepository
 from src.repo.client import ClientRepository
+from src.repo.outbox import EmailOutboxRepository
 from src.repo.place import PlaceRepository
 from src.schemes import CreateClientDTO
 from src.service.application_settings import ApplicationSettingsService
@@ -116,8 +117,8 @@ def place_repo(db_session):
 
 
 @pytest.fixture(scope="function")
-def smtp_service():
-    return SMTPService()
+def smtp_service(db_session):
+    return SMTPService(EmailOutboxRepository(db_session))
 
 
 @pytest.fixture(scope="function")
@@ -1,5 +1,6 @@
 import pytest
 
+from src.config import settings
 from src.schemes import CreateClientDTO
 from tests.conftest import create_admin_client, create_client, create_fake_client_data, create_fake_clients_batch
 
@@ -47,6 +48,45 @@ async def test_valid_bulk(client_service, smtp_service, batch_size):
 
     await client_service.create_admin_for_tests(CreateClientDTO(**admin_client))
 
-    fetched_clients = await client_service.get_all(limit=len(all_clients))
+    fetched_clients, _ = await client_service.get_page(limit=len(all_clients))
 
     assert len(fetched_clients) >= len(all_clients)
+
+
+async def test_get_currently_visiting(test_client):
+    admin_response = await create_admin_client(test_client)
+    response = await test_client.get(
+        "/clients/currently_visiting",
+        headers={"Authorization": admin_response["token"]}
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+    client_response = await create_client(test_client)
+    response = await test_client.get(
+        "/clients/currently_visiting",
+        headers={"Authorization": client_response["token"]}
+    )
+    assert response.status_code == 403
+
+
+async def test_get_all_admins(test_client):
+    response = await test_client.post(
+        "/auth/login",
+        json={"email": settings.super_user_email, "password": settings.super_user_password}
+    )
+    headers = {"Authorization": response.json()["token"]}
+    for _ in range(101):
+        await create_admin_client(test_client)
+
+    # Без limit и cursor возвращаются все администраторы
+    response = await test_client.get("/admin", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 101
+    assert "X-Next-Cursor" not in response.headers
+
+    response = await test_client.get("/admin", params={"limit": 100}, headers=headers)
+    assert len(response.json()) == 100
+    response = await test_client.get("/admin", params={"cursor": response.headers["X-Next-Cursor"]}, headers=headers)
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
@@ -1,4 +1,12 @@
-from src.models import Building, Place
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.core.exc import ConflictError
+from src.models import MAX_PLACE_FEATURES, Building, BuildingFloorImage, Feedback, Place
+from src.service.place import PlaceService
+from src.service.place.scheme import build_scheme
 
 
 async def test_get_by_id(place_repo, test_place_model):
@@ -83,6 +91,7 @@ async def test_insert_place(place_repo, db_session):
     result = await place_repo.get_by_id(place.id)
     assert result is not None
     assert place.id == result.id
+    assert type(result.size) is int
 
 # async def test_insert_visit(place_repo, place_id: int, client_id: int, start: datetime, end: datetime) -> PlaceVisit:
 #     ...
@@ -118,3 +127,128 @@ async def test_insert_place(place_repo, db_session):
 #
 # async def test_delete(place_repo, place: Place) -> None:
 #     ...
+
+
+async def test_search_by_features(place_repo, db_session):
+    building = Building(
+        name="Test Building",
+        description="A test building",
+        address="123 Test Street",
+        images_id=["1"],
+        x=0,
+        y=0,
+    )
+    db_session.add(building)
+    await db_session.flush()
+
+    features = [["monitor", "window"], ["monitor"], ["window", "socket"], ["monitor", "window", "socket"]]
+    places = await place_repo.bulk_insert([
+        Place(building_id=building.id, name=str(i), floor=i % 2, features=f) for i, f in enumerate(features)
+    ])
+
+    bits = await place_repo.get_feature_bits(["monitor", "window", "socket"])
+    assert sorted(feature.name for feature in await place_repo.get_features()) == ["monitor", "socket", "window"]
+
+    found = await place_repo.search_by_features(bits["monitor"] | bits["window"], bits["socket"], building.id)
+    assert [place.id for place in found] == [places[0].id]
+
+    found = await place_repo.search_by_features(bits["window"], 0, building.id, floor=1)
+    assert [place.id for place in found] == [places[3].id]
+
+
+async def test_check_features_limit(place_repo, test_place_model):
+    service = PlaceService(place_repo, None)
+    names = [f"feature {i}" for i in range(MAX_PLACE_FEATURES)]
+    await service.check_features(names)
+    test_place_model.features = names
+    await place_repo.session.flush()
+
+    await service.check_features(names[:3])
+    with pytest.raises(ConflictError):
+        await service.check_features([*names[:3], "one more"])
+
+
+async def test_get_floors_with_places(place_repo, db_session):
+    building = Building(
+        name="Test Building",
+        description="A test building",
+        address="123 Test Street",
+        images_id=["1"],
+        x=0,
+        y=0,
+    )
+    db_session.add(building)
+    await db_session.flush()
+    db_session.add_all([
+        BuildingFloorImage(building_id=building.id, floor=1, image_id="1"),
+        BuildingFloorImage(building_id=building.id, floor=2, image_id="2"),
+    ])
+    places = await place_repo.bulk_insert([
+        Place(building_id=building.id, name=str(i), floor=1, features=[]) for i in range(3)
+    ])
+
+    floors = await place_repo.get_floors_with_places(building.id)
+    assert [(floor.floor, [place.id for place in floor_places]) for floor, floor_places in floors] == [
+        (1, [place.id for place in places]),
+        (2, []),
+    ]
+    assert [floor.floor for floor, _ in await place_repo.get_floors_with_places(building.id, floor=2)] == [2]
+
+
+async def test_render_scheme_matches_dto(place_repo, db_session):
+    building = Building(
+        name="Test Building",
+        description="A test building",
+        address="123 Test Street",
+        images_id=["1"],
+        x=0,
+        y=0,
+    )
+    db_session.add(building)
+    await db_session.flush()
+    db_session.add(BuildingFloorImage(building_id=building.id, floor=1, image_id="1"))
+    await place_repo.bulk_insert([
+        Place(building_id=building.id, name="A", floor=1, features=["monitor"], image_id="img"),
+        Place(building_id=building.id, name="B", floor=1, features=[], x=1.5, y=2.5),
+    ])
+
+    rendered = await place_repo.render_scheme(building.id)
+    expected = build_scheme(await place_repo.get_floors_with_places(building.id))
+    assert json.loads(rendered) == json.loads(expected)
+
+
+async def test_find_feedbacks_page(place_repo, db_session, test_place_model, test_client_model):
+    start = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+    for rating in (5, 3, 5, 4):
+        end = start + timedelta(hours=1)
+        visit = await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, end)
+        await place_repo.insert_feedback(visit, Feedback(visit_id=visit.id, rating=rating, text=str(rating)))
+
+    feedbacks, cursor = await place_repo.find_feedbacks_page(limit=3, building_id=test_place_model.building_id)
+    assert [row.rating for row in feedbacks] == [4, 5, 3]
+    assert all(row.client_name == test_client_model.name for row in feedbacks)
+
+    feedbacks, cursor = await place_repo.find_feedbacks_page(limit=3, cursor=cursor)
+    assert [row.rating for row in feedbacks] == [5]
+    assert cursor is None
+
+    feedbacks, _ = await place_repo.find_feedbacks_page(limit=10, place_id=test_place_model.id, rating=5)
+    assert len(feedbacks) == 2
+
+
+async def test_find_visits_page_by_client_id(place_repo, test_client_model, test_place_model):
+    now = datetime.now(timezone.utc)
+    past, active, upcoming = [
+        await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+        for start in (now - timedelta(days=1), now - timedelta(minutes=30), now + timedelta(days=1))
+    ]
+
+    page, cursor = await place_repo.find_visits_page_by_client_id(test_client_model.id, 2)
+    assert [visit.id for visit in page] == [upcoming.id, active.id]
+    assert page[0].place.building.name == "Test Building"
+    page, cursor = await place_repo.find_visits_page_by_client_id(test_client_model.id, 2, cursor)
+    assert [visit.id for visit in page] == [past.id] and cursor is None
+
+    for status, visit in (("past", past), ("active", active), ("upcoming", upcoming)):
+        page, _ = await place_repo.find_visits_page_by_client_id(test_client_model.id, 10, status=status)
+        assert [v.id for v in page] == [visit.id]
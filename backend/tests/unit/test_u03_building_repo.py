@@ -1,6 +1,6 @@
 import pytest
 
-from src.models import Building
+from src.models import Building, Place
 
 
 @pytest.fixture
@@ -94,3 +94,49 @@ async def test_find_all(building_repo, test_buildings_batch):
     buildings, count = await building_repo.find_all(limit=2, offset=2)
     assert len(buildings) == 2
     assert count == 5
+
+
+async def test_find_page(building_repo, test_buildings_batch):
+    ids = []
+    cursor = None
+    while True:
+        buildings, cursor = await building_repo.find_page(limit=2, cursor=cursor)
+        ids.extend(building.id for building in buildings)
+        if cursor is None:
+            break
+
+    assert ids == sorted(building.id for building in test_buildings_batch)
+
+
+async def test_search(building_repo, db_session):
+    db_session.add_all([
+        Building(name="Точка кипения", description="Коворкинг у метро", address="улица Ленина, 5",
+                 images_id=[], x=0, y=0),
+        Building(name="Рабочее место", description="Тихие переговорные", address="Садовая улица, 12",
+                 images_id=[], x=0, y=0),
+    ])
+    await db_session.flush()
+
+    assert [b.name for b in await building_repo.search("коворкинги", 10)] == ["Точка кипения"]
+    assert [b.name for b in await building_repo.search("садов", 10)] == ["Рабочее место"]
+    assert [b.name for b in await building_repo.search("Точка кепения", 10)] == ["Точка кипения"]
+    assert await building_repo.search("?!", 10) == []
+
+
+async def test_versions(building_repo, place_repo, db_session, test_building_model):
+    building_version = await building_repo.get_version(test_building_model.id)
+    list_version, count = await building_repo.get_list_version()
+
+    place = Place(building_id=test_building_model.id, name="A1", floor=0, features=[], size=1, rotate=0)
+    await place_repo.insert_place(place)
+    assert await building_repo.get_version(test_building_model.id) > building_version
+    assert await building_repo.get_list_version() == (list_version, count)
+    building_version = await building_repo.get_version(test_building_model.id)
+
+    test_building_model.name = "Renamed"
+    await db_session.flush()
+    assert await building_repo.get_version(test_building_model.id) > building_version
+    assert (await building_repo.get_list_version())[0] > list_version
+    assert tuple(await place_repo.get_scheme_version(test_building_model.id)) == (
+        await building_repo.get_version(test_building_model.id),
+    )
@@ -1,3 +1,9 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from src.core.exc import BadRequestError
 from src.enums import AccessLevel
 
 
@@ -31,10 +37,10 @@ async def test_insert(client_repo, test_client_model):
     assert result is not None
 
 
-async def test_find_all(client_repo, test_client_model):
-    result = await client_repo.find_all()
-    assert result is not None
-    assert len(result) == 1
+async def test_find_page_single(client_repo, test_client_model):
+    result, cursor = await client_repo.find_page(limit=100)
+    assert [client.id for client in result] == [test_client_model.id]
+    assert cursor is None
 
 
 async def test_find_all_access_level_filter_found(client_repo, test_client_model):
@@ -53,3 +59,69 @@ async def test_set_access_level(client_repo, test_client_model):
     result = await client_repo.get_by_id(test_client_model.id)
     assert result is not None
     assert result.access_level == AccessLevel.OWNER
+
+
+async def test_find_page(client_repo, test_client_model):
+    for i in range(4):
+        await client_repo.insert(email=f"user{i}@example.com", hashed_password=None, name=f"User {i}")
+
+    clients, cursor = await client_repo.find_page(limit=3, order_by="-name")
+    assert [client.name for client in clients][:2] == ["User 3", "User 2"]
+    assert cursor is not None
+    cursor_for_desc = cursor
+
+    rest, cursor = await client_repo.find_page(limit=3, cursor=cursor, order_by="-name")
+    assert cursor is None
+    assert len(clients) + len(rest) == 5
+    assert not {client.id for client in clients} & {client.id for client in rest}
+
+    # Курсор действителен только для той же сортировки
+    with pytest.raises(BadRequestError):
+        await client_repo.find_page(limit=3, cursor=cursor_for_desc, order_by="name")
+    with pytest.raises(BadRequestError):
+        await client_repo.find_page(limit=3, order_by="password")
+
+    clients, cursor = await client_repo.find_page(limit=3, order_by="email")
+    rest, _ = await client_repo.find_page(limit=3, cursor=cursor, order_by="email")
+    assert [client.email for client in clients + rest] == sorted(client.email for client in clients + rest)
+
+
+async def test_get_currently_visiting(client_repo, place_repo, test_client_model, test_place_model):
+    start = datetime.now(pytz.UTC) - timedelta(minutes=5)
+    visit = await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+    await place_repo.insert_visit(
+        test_place_model.id,
+        test_client_model.id,
+        start + timedelta(hours=2),
+        start + timedelta(hours=3)
+    )
+    assert await client_repo.get_currently_visiting_clients_with_places() == []
+
+    await place_repo.mark_visit(visit)
+    visits = await client_repo.get_currently_visiting_clients_with_places()
+    assert [v.visit_id for v in visits] == [visit.id]
+    assert visits[0].name == test_client_model.name
+    assert visits[0].place.floor == test_place_model.floor
+
+
+async def test_bulk_upsert(client_repo, test_client_model):
+    rows = await client_repo.bulk_upsert([
+        ("new@example.com", "First", AccessLevel.USER),
+        (test_client_model.email, "Renamed", AccessLevel.ADMIN),
+        ("new@example.com", "Second", AccessLevel.USER),
+    ])
+    result = {row.email: (row.is_created, row.is_invited) for row in rows}
+    assert result == {"new@example.com": (True, True), test_client_model.email: (False, False)}
+
+    client = await client_repo.get_by_email("new@example.com")
+    assert client.name == "Second"
+    await client_repo.session.refresh(test_client_model)
+    assert test_client_model.access_level == AccessLevel.ADMIN
+    assert test_client_model.password == "hashed_password"
+    assert test_client_model.name == "Renamed"
+
+    # Файл без имён не стирает имена существующих клиентов
+    await client_repo.bulk_upsert([(test_client_model.email, "", AccessLevel.USER)])
+    await client_repo.session.refresh(test_client_model)
+    assert test_client_model.name == "Renamed"
+
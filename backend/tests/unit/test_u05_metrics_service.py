@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from src.models import Feedback
+from src.service.metrics import MetricsService
+from src.service.place import PlaceService
+
+
+async def test_dashboard_metrics_empty(db_session, db_engine):
+    service = MetricsService(db_session, db_engine)
+    metrics = await service.get_dashboard_metrics()
+    assert metrics.total_bookings == 0
+    assert metrics.average_book_duration_minutes == 0
+    assert metrics.last_bookings == []
+    assert metrics.most_popular_places == []
+
+
+async def test_dashboard_metrics(db_session, db_engine, place_repo, test_client_model, test_place_model):
+    start = datetime.now(pytz.UTC)
+    visit = await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+    await place_repo.mark_visit(visit)
+    await place_repo.insert_visit(
+        test_place_model.id,
+        test_client_model.id,
+        start + timedelta(hours=2),
+        start + timedelta(hours=5)
+    )
+    await db_session.commit()
+
+    service = MetricsService(db_session, db_engine)
+    metrics = await service.get_dashboard_metrics()
+    assert metrics.total_bookings == 2
+    assert metrics.coworking_count == 1
+    assert metrics.user_count == 1
+    assert metrics.average_visit_duration_minutes == 60
+    assert metrics.average_book_duration_minutes == 120
+    assert len(metrics.last_bookings) == 2
+    assert metrics.most_popular_places[0].visit_count == 2
+
+
+async def test_booking_stats_backfill(db_session, db_engine, place_repo, test_client_model, test_place_model):
+    start = datetime.now(pytz.UTC)
+    visit = await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+    await place_repo.mark_visit(visit)
+    await place_repo.stats.backfill()
+    await db_session.commit()
+
+    stats = await MetricsService(db_session, db_engine).get_booking_statistics_by_time()
+    assert stats["total_bookings"] == 1
+    assert stats["completed_visits"] == 1
+    assert stats["with_feedback"] == 0
+
+
+async def test_booking_stats_delete_visit(db_session, db_engine, place_repo, test_client_model, test_place_model):
+    start = datetime.now(pytz.UTC)
+    visit = await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+    await place_repo.delete_visit(visit.id)
+    await db_session.commit()
+
+    metrics = await MetricsService(db_session, db_engine).get_dashboard_metrics()
+    assert metrics.total_bookings == 0
+    assert metrics.most_popular_places == []
+
+
+async def test_place_rating(db_session, place_repo, test_client_model, test_place_model):
+    start = datetime.now(pytz.UTC)
+    for rating in (5, 4):
+        visit = await place_repo.insert_visit(
+            test_place_model.id,
+            test_client_model.id,
+            start,
+            start + timedelta(hours=1)
+        )
+        await place_repo.insert_feedback(visit, Feedback(visit_id=visit.id, rating=rating, text="test"))
+    await place_repo.delete_visit(visit.id)
+    await db_session.commit()
+
+    service = PlaceService(place_repo, None)
+    rating = await service.get_rating(place_id=test_place_model.id)
+    assert rating.count == 1
+    assert rating.average == 5
+    assert rating.histogram == {1: 0, 2: 0, 3: 0, 4: 0, 5: 1}
+    assert await service.get_rating(building_id=test_place_model.building_id) == rating
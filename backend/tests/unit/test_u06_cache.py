@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import StaleWhileRevalidateCache, VersionedCache
+from src.core.db import after_commit
+from src.service.place import PlaceService
+from src.service.place.scheme import scheme_cache
+
+
+async def test_cache_single_flight():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    cache = StaleWhileRevalidateCache(loader, ttl=60)
+    results = await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    assert calls == 1
+    assert all(value == 1 for value, _ in results)
+
+
+async def test_cache_stale_while_revalidate():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    cache = StaleWhileRevalidateCache(loader, ttl=0)
+    value, _ = await cache.get()
+    assert value == 1
+
+    value, _ = await cache.get()
+    assert value == 1  # устаревшее значение, обновление запущено в фоне
+    await asyncio.sleep(0)
+    value, _ = await cache.get()
+    assert value == 2
+
+
+async def test_versioned_cache_reloads_on_version_change():
+    version = 1
+    loads = []
+
+    async def get_version():
+        return version
+
+    async def loader(v):
+        loads.append(v)
+        return f"value-{v}"
+
+    cache = VersionedCache(ttl=0, max_size=2)
+    assert await cache.get("a", get_version, loader) == "value-1"
+    assert await cache.get("a", get_version, loader) == "value-1"
+    assert loads == [1]  # версия не изменилась, значение не загружается заново
+
+    version = 2
+    assert await cache.get("a", get_version, loader) == "value-2"
+
+    version = None
+    assert await cache.get("a", get_version, loader) is None
+
+
+async def test_versioned_cache_invalidate():
+    loads = 0
+
+    async def get_version():
+        return 1
+
+    async def loader(_):
+        nonlocal loads
+        loads += 1
+        return loads
+
+    cache = VersionedCache(ttl=60, max_size=2)
+    assert await cache.get("a", get_version, loader) == 1
+    assert await cache.get("a", get_version, loader) == 1
+    cache.invalidate("a")
+    assert await cache.get("a", get_version, loader) == 2
+
+    await cache.get("b", get_version, loader)
+    await cache.get("c", get_version, loader)
+    assert await cache.get("a", get_version, loader) == 5  # вытеснен как давно не использованный
+
+
+async def test_scheme_invalidated_after_commit():
+    async def get_version():
+        return 1
+
+    async def loader(_):
+        return "scheme"
+
+    session = AsyncSession()
+    service = PlaceService(SimpleNamespace(session=session), None)
+    await scheme_cache.get(-1, get_version, loader)
+
+    service._invalidate_scheme(-1)
+    await session.rollback()
+    assert -1 in scheme_cache._entries
+
+    service._invalidate_scheme(-1)
+    assert -1 in scheme_cache._entries
+    await session.commit()
+    assert -1 not in scheme_cache._entries
+
+
+async def test_after_commit_dropped_on_rollback():
+    calls = []
+    session = AsyncSession()
+
+    after_commit(session, lambda: calls.append("rolled back"))
+    await session.rollback()
+    await session.commit()
+    assert calls == []
+
+    after_commit(session, lambda: calls.append("first"))
+    after_commit(session, lambda: calls.append("second"))
+    await session.commit()
+    await session.commit()
+    assert calls == ["first", "second"]
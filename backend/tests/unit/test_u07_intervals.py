@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.core.utils import DAY_SECONDS, clip_to_open_hours, coverage_by_slots, open_seconds_by_slots, slot_boundaries
+
+
+def test_slot_boundaries():
+    boundaries = slot_boundaries(1000.0, 3 * 3600 + 5, 3600)
+    assert boundaries.tolist() == [1000.0, 3600.0, 7200.0, 10800.0, 10805.0]
+
+
+def test_clip_to_open_hours():
+    hour = 3600
+    group = np.array([0, 1])
+    start = np.array([7 * hour, 20 * hour], dtype=np.float64)
+    end = np.array([10 * hour, 26 * hour], dtype=np.float64)
+    open_from = np.array([8 * hour, 0], dtype=np.float64)
+    open_till = np.array([18 * hour, DAY_SECONDS], dtype=np.float64)
+
+    groups, starts, ends = clip_to_open_hours(group, start, end, open_from, open_till)
+    lengths = np.bincount(groups, weights=ends - starts)
+    assert lengths.tolist() == [2 * hour, 6 * hour]
+
+
+def test_clip_to_open_hours_multi_day():
+    hour = 3600
+    # С 12:00 первого дня до 09:00 четвёртого, открыто с 08:00 до 18:00
+    group = np.array([3])
+    start = np.array([12 * hour], dtype=np.float64)
+    end = np.array([3 * DAY_SECONDS + 9 * hour], dtype=np.float64)
+    open_from = np.array([8 * hour], dtype=np.float64)
+    open_till = np.array([18 * hour], dtype=np.float64)
+
+    groups, starts, ends = clip_to_open_hours(group, start, end, open_from, open_till)
+    assert set(groups.tolist()) == {3}
+    assert (ends - starts).sum() == (6 + 10 + 10 + 1) * hour
+    # Каждая непустая часть лежит внутри одного дня
+    nonempty = ends > starts
+    assert np.all(np.floor(starts[nonempty] / DAY_SECONDS) == np.floor((ends[nonempty] - 1) / DAY_SECONDS))
+
+
+def test_open_seconds_by_slots():
+    boundaries = slot_boundaries(0.0, DAY_SECONDS, 6 * 3600)
+    result = open_seconds_by_slots(boundaries, np.array([8 * 3600.0]), np.array([18 * 3600.0]))
+    assert (result / 3600).tolist() == [[0, 4, 6, 0]]
+
+
+def test_coverage_by_slots_matches_naive():
+    rng = np.random.default_rng(0)
+    boundaries = slot_boundaries(0.0, 2 * DAY_SECONDS, 3600)
+    group = rng.integers(0, 5, 300)
+    start = rng.uniform(0, 2 * DAY_SECONDS, 300)
+    end = start + rng.uniform(0, 12 * 3600, 300)
+
+    expected = np.zeros((5, len(boundaries) - 1))
+    for g, s, e in zip(group, start, end):
+        for k in range(len(boundaries) - 1):
+            expected[g, k] += max(0.0, min(e, boundaries[k + 1]) - max(s, boundaries[k]))
+
+    assert np.allclose(coverage_by_slots(group, start, end, 5, boundaries), expected)
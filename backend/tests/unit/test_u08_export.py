@@ -0,0 +1,50 @@
+import csv
+import io
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytz
+
+from src.service.export import write_csv, write_parquet
+
+
+SCHEMA = pa.schema([("id", pa.int64()), ("name", pa.string()), ("created_at", pa.timestamp("us", tz="UTC"))])
+ROWS = [
+    (1, "Иван", datetime(2025, 3, 1, 10, tzinfo=pytz.UTC)),
+    (2, "Мария, \"VIP\"", datetime(2025, 3, 1, 11, tzinfo=pytz.UTC)),
+    (3, "Пётр", datetime(2025, 3, 2, 9, tzinfo=pytz.UTC)),
+]
+
+
+async def batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+async def collect(chunks) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_write_csv():
+    chunks = await collect(write_csv(SCHEMA.names, batches(ROWS, 2)))
+    assert len(chunks) == 2
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "name", "created_at"]
+    assert [row[1] for row in rows[1:]] == ["Иван", "Мария, \"VIP\"", "Пётр"]
+
+
+async def test_write_csv_empty():
+    chunks = await collect(write_csv(SCHEMA.names, batches([], 2)))
+    assert b"".join(chunks).decode().strip() == "id,name,created_at"
+
+
+async def test_write_parquet():
+    chunks = await collect(write_parquet(SCHEMA, batches(ROWS, 2)))
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+
+    assert parquet.metadata.num_row_groups == 2
+    table = parquet.read()
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.column("created_at").to_pylist()[2] == ROWS[2][2]
@@ -0,0 +1,70 @@
+from sqlalchemy import literal, select
+
+from src.models import Building, Client, Place
+from src.repo.counting import CachedRowCount, CounterRowCount, EstimatedRowCount, QueryRowCount, RowCount
+
+
+class FixedRowCount(RowCount):
+
+    def __init__(self, value: int):
+        super().__init__(Place)
+        self.value = value
+        self.calls = 0
+
+    def expression(self):
+        return literal(self.value)
+
+    async def count(self, session) -> int:
+        self.calls += 1
+        return self.value
+
+
+async def test_counter_row_count(building_repo, client_repo, db_session):
+    building_count = CounterRowCount(Building)
+    assert await building_count.count(db_session) == 0
+
+    for i in range(3):
+        await building_repo.insert(Building(
+            name=f"Building {i}",
+            description="A test building",
+            address="123 Test Street",
+            images_id=["1"],
+            x=0,
+            y=0,
+        ))
+    await client_repo.insert(email="user@example.com", hashed_password=None, name="Test User")
+    await db_session.commit()
+
+    buildings, total = await building_repo.find_all(limit=2, offset=0)
+    assert len(buildings) == 2
+    assert total == 3
+    assert await CounterRowCount(Client).count(db_session) == 1
+
+    await building_repo.delete(buildings[0])
+    await db_session.commit()
+    assert await building_count.count(db_session) == 2
+    assert await building_count.count(db_session) == await QueryRowCount(Building).count(db_session)
+
+
+async def test_estimated_row_count_falls_back_below_threshold(db_session):
+    fallback = FixedRowCount(7)
+    estimated = EstimatedRowCount(Place, threshold=1000, fallback=fallback)
+    assert await estimated.count(db_session) == 7
+    assert fallback.calls == 1
+    assert await db_session.scalar(select(estimated.expression())) == 7
+
+
+async def test_cached_row_count():
+    inner = FixedRowCount(5)
+    cached = CachedRowCount(inner, ttl=60)
+
+    assert await cached.count(None) == 5
+    inner.value = 6
+    assert await cached.count(None) == 5
+    assert inner.calls == 1
+    assert cached.expression().value == 5
+
+    cached.invalidate()
+    assert cached.expression().value == 6
+    cached.store(7)
+    assert await cached.count(None) == 7 and inner.calls == 1
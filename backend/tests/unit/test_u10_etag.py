@@ -0,0 +1,33 @@
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.core.etag import ConditionalRequest, make_etag
+
+
+def make_request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_make_etag_is_weak_and_stable():
+    etag = make_etag("building", 1, "2025-03-01T10:00:00+00:00")
+    assert etag.startswith('W/"')
+    assert etag == make_etag("building", 1, "2025-03-01T10:00:00+00:00")
+    assert etag != make_etag("building", 2, "2025-03-01T10:00:00+00:00")
+
+
+def test_check_sets_etag_when_modified():
+    response = Response()
+    assert ConditionalRequest(make_request(), response).check("settings", 1) is None
+    assert response.headers["ETag"] == make_etag("settings", 1)
+
+
+def test_check_returns_not_modified():
+    etag = make_etag("settings", 1)
+    for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        result = ConditionalRequest(make_request(header), Response()).check("settings", 1)
+        assert result is not None
+        assert result.status_code == 304
+        assert result.headers["ETag"] == etag
+
+    assert ConditionalRequest(make_request('"other"'), Response()).check("settings", 1) is None
@@ -0,0 +1,87 @@
+import numpy as np
+
+from src.core.utils import ClusterGrid, GridIndex, bounding_box, haversine_km, mercator
+
+
+def test_haversine_km():
+    # Москва - Санкт-Петербург
+    assert abs(float(haversine_km(37.6173, 55.7558, 30.3351, 59.9343)) - 634) < 5
+    assert float(haversine_km(10.0, 10.0, 10.0, 10.0)) == 0
+
+
+def test_bounding_box_contains_circle():
+    min_x, min_y, max_x, max_y = bounding_box(37.6, 55.7, 50)
+    assert haversine_km(min_x, 55.7, 37.6, 55.7) >= 49.9
+    assert haversine_km(37.6, min_y, 37.6, 55.7) >= 49.9
+    assert bounding_box(179.9, 0, 100)[0] == -180
+    assert bounding_box(0, 89.9, 100)[3] == 90
+
+
+def test_grid_index_matches_naive():
+    rng = np.random.default_rng(7)
+    x = rng.uniform(37, 38.5, 2000)
+    y = rng.uniform(55, 56.5, 2000)
+    index = GridIndex(x, y, 0.1)
+
+    for qx, qy, radius in ((37.6, 55.75, 5), (38.4, 56.4, 30), (36.0, 55.0, 1)):
+        indices, distances = index.query_radius(qx, qy, radius, limit=20)
+        naive = haversine_km(x, y, qx, qy)
+        expected = np.argsort(naive, kind="stable")
+        expected = expected[naive[expected] <= radius][:20]
+        assert indices.tolist() == expected.tolist()
+        assert np.allclose(distances, naive[expected])
+
+
+def test_grid_index_empty():
+    index = GridIndex(np.empty(0), np.empty(0), 0.1)
+    indices, distances = index.query_radius(37.6, 55.75, 10, limit=5)
+    assert len(indices) == 0
+
+
+def test_cluster_grid():
+    rng = np.random.default_rng(3)
+    x = rng.uniform(37, 38, 300)
+    y = rng.uniform(55, 56, 300)
+    grid = ClusterGrid(x, y, max_zoom=14, cells_per_tile=4)
+
+    previous = 0
+    for zoom in range(15):
+        counts, mean_x, mean_y, first = grid.query(zoom, 36.9, 54.9, 38.1, 56.1)
+        assert counts.sum() == 300
+        assert len(counts) >= previous
+        previous = len(counts)
+    assert np.all((mean_x >= 37) & (mean_x <= 38))
+
+    counts, *_ = grid.query(10, 37.2, 55.2, 37.4, 55.4)
+    inside = ((x >= 37.2) & (x <= 37.4) & (y >= 55.2) & (y <= 55.4)).sum()
+    assert counts.sum() == inside
+
+    counts, *_ = grid.query(3, 170, 50, -170, 60)
+    assert len(counts) == 0
+
+
+def test_cluster_grid_matches_filtered_points():
+    rng = np.random.default_rng(5)
+    x = np.concatenate([rng.uniform(37, 38, 500), rng.uniform(178, 180, 50), rng.uniform(-180, -178, 50)])
+    y = np.concatenate([rng.uniform(55, 56, 500), rng.uniform(50, 60, 100)])
+    grid = ClusterGrid(x, y, max_zoom=12, cells_per_tile=4)
+
+    for zoom, box in ((6, (37.3, 55.2, 37.8, 55.7)), (9, (37.51, 55.63, 37.62, 55.71)), (2, (179, 52, -179, 58))):
+        min_x, min_y, max_x, max_y = box
+        in_x = (x >= min_x) & (x <= max_x) if min_x <= max_x else (x >= min_x) | (x <= max_x)
+        inside = np.flatnonzero(in_x & (y >= min_y) & (y <= max_y))
+        # Кластеризация отобранных точек по той же сетке, как в `cluster_in_box`
+        size = grid.grid_size(zoom)
+        mx, my = mercator(x[inside], y[inside])
+        keys = ClusterGrid._cell(mx, size) * size + ClusterGrid._cell(my, size)
+        expected = {
+            key: (len(points), x[points].mean(), y[points].mean(), points.min())
+            for key in np.unique(keys)
+            for points in [inside[keys == key]]
+        }
+
+        counts, mean_x, mean_y, first = grid.query(zoom, *box)
+        assert sorted(zip(counts.tolist(), first.tolist())) == sorted((c, f) for c, _, _, f in expected.values())
+        for cx, cy, f in zip(mean_x, mean_y, first):
+            _, ex, ey, _ = next(value for value in expected.values() if value[3] == f)
+            assert np.isclose(cx, ex) and np.isclose(cy, ey)
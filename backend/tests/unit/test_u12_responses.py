@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import msgpack
+import orjson
+from starlette.requests import Request
+
+from src.core.responses import ResponseEncoder, construct
+from src.schemes import FeedbackDTO, PlaceDTO
+
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def _place(**values) -> SimpleNamespace:
+    fields = dict(name="A", features=["monitor"], size=1, rotate=0, x=None, y=None, image_id=None, id=1,
+                  building_id=2, floor=3)
+    return SimpleNamespace(**{**fields, **values})
+
+
+def test_construct_keeps_computed_fields():
+    dto = construct(PlaceDTO, _place(image_id="img"))
+    assert dto.image_url.endswith("/files/img")
+    assert dto.model_dump() == PlaceDTO(**vars(_place(image_id="img"))).model_dump()
+
+
+def test_encoder_negotiates_format():
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    feedback = SimpleNamespace(id=1, text="ok", rating=5, created_at=created_at)
+    value = [construct(FeedbackDTO, feedback, client_name="Иван")]
+
+    response = ResponseEncoder(_request("application/json"))(value, list[FeedbackDTO])
+    assert response.media_type == "application/json"
+    assert orjson.loads(response.body)[0]["client_name"] == "Иван"
+
+    response = ResponseEncoder(_request("application/msgpack"))(value, list[FeedbackDTO])
+    assert response.media_type == "application/msgpack"
+    assert msgpack.unpackb(response.body) == orjson.loads(
+        ResponseEncoder(_request("*/*"))(value, list[FeedbackDTO]).body
+    )
+    assert response.headers["vary"] == "Accept"
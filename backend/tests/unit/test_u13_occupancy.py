@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytz
+from starlette.routing import Match
+
+from src.main import app
+from src.schemes import ClientCurrentVisitDTO, PlaceDTO
+from src.service.client import OccupancyRegistry
+
+
+def make_visit(visit_id: int, building_id: int, floor: int, minutes: int = 60) -> ClientCurrentVisitDTO:
+    now = datetime.now(pytz.UTC)
+    return ClientCurrentVisitDTO(
+        id=1,
+        name="Test User",
+        visit_id=visit_id,
+        visit_from=now - timedelta(minutes=5),
+        visit_till=now + timedelta(minutes=minutes),
+        is_feedbacked=False,
+        place=PlaceDTO(id=visit_id * 10, name="place", building_id=building_id, floor=floor)
+    )
+
+
+class FakeRepo:
+    def __init__(self, visits: list[ClientCurrentVisitDTO], delay: float = 0):
+        self.visits = visits
+        self.delay = delay
+        self.calls = 0
+
+    async def get_currently_visiting_clients_with_places(self) -> list[ClientCurrentVisitDTO]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return list(self.visits)
+
+
+async def test_occupancy_grouping():
+    registry = OccupancyRegistry(sync_interval=60)
+    repo = FakeRepo([make_visit(3, 2, 1), make_visit(1, 1, 2), make_visit(2, 1, 1)])
+    await registry.sync(repo)
+    registry.add(make_visit(4, 1, 2))
+    registry.remove(1)
+
+    assert [v.visit_id for v in await registry.get_visits(repo)] == [2, 4, 3]
+    assert [v.visit_id for v in await registry.get_visits(repo, building_id=2)] == [3]
+    floors = await registry.get_floors(repo, 1)
+    assert [(f.floor, f.visitors_count, f.place_ids) for f in floors] == [(1, 1, [20]), (2, 1, [40])]
+    assert repo.calls == 1
+
+
+async def test_occupancy_expiry():
+    registry = OccupancyRegistry(sync_interval=60)
+    repo = FakeRepo([])
+    await registry.sync(repo)
+    registry.add(make_visit(1, 1, 1, minutes=-1))
+    registry.add(make_visit(2, 1, 1))
+
+    assert [v.visit_id for v in await registry.get_visits(repo)] == [2]
+
+
+async def test_occupancy_changes_during_sync():
+    registry = OccupancyRegistry(sync_interval=60)
+    repo = FakeRepo([make_visit(1, 1, 1)], delay=0.01)
+    sync = asyncio.create_task(registry.sync(repo))
+    await asyncio.sleep(0)
+    registry.add(make_visit(2, 1, 1))
+    registry.set_feedbacked(2)
+    await sync
+
+    visits = await registry.get_visits(repo)
+    assert [(v.visit_id, v.is_feedbacked) for v in visits] == [(1, False), (2, True)]
+    assert repo.calls == 1
+
+
+def test_currently_visiting_route():
+    scope = {"type": "http", "path": "/clients/currently_visiting", "method": "GET"}
+    route = next(route for route in app.router.routes if route.matches(scope)[0] == Match.FULL)
+    assert route.name == "get_currently_visiting_clients_with_places"
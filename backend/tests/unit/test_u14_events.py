@@ -0,0 +1,45 @@
+import asyncio
+
+import orjson
+
+from src.core.events import EventBroker
+from src.service.place import building_topic
+
+
+def make_payload(topics: list[str], event: str, data: dict) -> str:
+    return orjson.dumps({"topics": topics, "event": event, "data": data}).decode()
+
+
+async def test_dispatch_by_topic():
+    broker = EventBroker("events", queue_size=10, heartbeat_interval=60, reconnect_delay=1)
+    async with broker.subscribe(building_topic(1)) as building, broker.subscribe(building_topic(1, 2)) as floor:
+        broker.dispatch(make_payload([building_topic(1), building_topic(1, 2)], "visited", {"visit_id": 1}))
+        broker.dispatch(make_payload([building_topic(1), building_topic(1, 3)], "visited", {"visit_id": 2}))
+
+        assert [building.queue.get_nowait()[1]["visit_id"] for _ in range(building.queue.qsize())] == [1, 2]
+        assert [floor.queue.get_nowait()[1]["visit_id"] for _ in range(floor.queue.qsize())] == [1]
+    assert not broker._subscriptions
+
+
+async def test_stream_frames():
+    broker = EventBroker("events", queue_size=10, heartbeat_interval=0.01, reconnect_delay=1)
+    stream = broker.stream(building_topic(1))
+    assert await anext(stream) == b"retry: 1000\n\n"
+    assert await anext(stream) == b": ping\n\n"
+
+    broker.dispatch(make_payload([building_topic(1)], "booking_created", {"visit_id": 1}))
+    assert await anext(stream) == b'event: booking_created\ndata: {"visit_id":1}\n\n'
+    await stream.aclose()
+    assert not broker._subscriptions
+
+
+async def test_stream_overflow_closes():
+    broker = EventBroker("events", queue_size=2, heartbeat_interval=60, reconnect_delay=1)
+    stream = broker.stream(building_topic(1))
+    await anext(stream)
+    for visit_id in range(3):
+        broker.dispatch(make_payload([building_topic(1)], "visited", {"visit_id": visit_id}))
+
+    assert [frame async for frame in stream] == []
+    await asyncio.sleep(0)
+    assert not broker._subscriptions
@@ -0,0 +1,31 @@
+import pytest
+
+from src.core.exc import BadRequestError
+from src.enums import AccessLevel
+from src.service.client import parse_clients
+
+
+def test_parse_csv():
+    data = "﻿email,name,access_level\na@example.com,Anna,admin\nb@example.com,,\n".encode()
+    clients = parse_clients(data, "csv")
+    assert [(c.email, c.name, c.access_level) for c in clients] == [
+        ("a@example.com", "Anna", AccessLevel.ADMIN),
+        ("b@example.com", "", AccessLevel.USER),
+    ]
+
+
+def test_parse_jsonl():
+    data = b'{"email": "a@example.com", "name": "Anna"}\n\n{"email": "b@example.com", "access_level": "USER"}\n'
+    assert [c.email for c in parse_clients(data, "jsonl")] == ["a@example.com", "b@example.com"]
+
+
+@pytest.mark.parametrize("fmt, data", [
+    ("csv", b"name\nAnna\n"),
+    ("csv", b"email,access_level\na@example.com,OWNER\n"),
+    ("csv", b"email\nnot-an-email\n"),
+    ("jsonl", b'{"email": "a@example.com"}\n{broken\n'),
+    ("jsonl", b""),
+])
+def test_parse_invalid(fmt, data):
+    with pytest.raises(BadRequestError):
+        parse_clients(data, fmt)
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from src.repo.outbox import EmailOutboxRepository
+from src.service.smtp import EmailDispatcher
+
+
+def test_retry_backoff():
+    dispatcher = EmailDispatcher(10, 1, max_attempts=4, backoff=30, max_backoff=90, lease=60, idle_timeout=60)
+    assert [dispatcher.retry_in(attempts) for attempts in range(1, 5)] == [
+        timedelta(seconds=30), timedelta(seconds=60), timedelta(seconds=90), None
+    ]
+
+
+async def test_outbox_claim(db_session):
+    repo = EmailOutboxRepository(db_session)
+    await repo.enqueue([("a@example.com", "subject", "body"), ("b@example.com", "subject", "body")])
+
+    claimed = await repo.claim(10, timedelta(minutes=5))
+    assert sorted(message.receiver for message in claimed) == ["a@example.com", "b@example.com"]
+    assert all(message.attempts == 1 for message in claimed)
+    assert await repo.claim(10, timedelta(minutes=5)) == []
+
+    first, second = claimed
+    await repo.mark_sent([first.id])
+    await repo.mark_failed(second.id, "error", timedelta(0))
+    retried = await repo.claim(10, timedelta(minutes=5))
+    assert [message.id for message in retried] == [second.id]
+    assert retried[0].attempts == 2
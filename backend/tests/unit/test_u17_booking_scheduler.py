@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from src.models import BookingDailyStats, EmailOutbox, PlaceVisit
+from src.repo.scheduler import SchedulerRepository
+from src.service.scheduler import BookingScheduler
+
+
+async def test_find_unreminded(db_session, place_repo, test_client_model, test_place_model):
+    repo = SchedulerRepository(db_session)
+    now = datetime.now(timezone.utc)
+    first, second, later = [
+        await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, start + timedelta(hours=1))
+        for start in (now + timedelta(minutes=10), now + timedelta(minutes=10), now + timedelta(hours=3))
+    ]
+
+    visits = await repo.find_unreminded(now, now + timedelta(hours=1), 1)
+    assert [visit.id for visit in visits] == [first.id]
+    assert visits[0].email == "test@example.com" and visits[0].building_name == "Test Building"
+
+    await repo.set_reminded([visit.id for visit in visits])
+    assert [visit.id for visit in await repo.find_unreminded(now, now + timedelta(hours=1), 10)] == [second.id]
+    assert later.id not in [visit.id for visit in await repo.find_unreminded(now, now + timedelta(hours=2), 10)]
+
+    # Бронь, созданная после напоминаний о более поздних бронях, тоже находится
+    await repo.set_reminded([second.id, later.id])
+    late = await place_repo.insert_visit(
+        test_place_model.id, test_client_model.id, now + timedelta(minutes=5), now + timedelta(hours=1)
+    )
+    assert [visit.id for visit in await repo.find_unreminded(now, now + timedelta(hours=4), 10)] == [late.id]
+
+
+async def test_scheduler_run_once(db_engine, db_session, place_repo, test_client_model, test_place_model, monkeypatch):
+    monkeypatch.setattr("src.core.db.engine.engine", db_engine)
+    now = datetime.now(timezone.utc)
+    upcoming = await place_repo.insert_visit(
+        test_place_model.id, test_client_model.id, now + timedelta(minutes=30), now + timedelta(hours=2)
+    )
+    missed = await place_repo.insert_visit(
+        test_place_model.id, test_client_model.id, now - timedelta(hours=1), now + timedelta(hours=1)
+    )
+    await db_session.commit()
+
+    scheduler = BookingScheduler(60, 1, reminder_lead=60, no_show_after=30, release_after=None, lock_key=1)
+    assert await scheduler.run_once() == (1, 1, 0)
+    # Брони помечены, повторный проход ничего не отправляет
+    assert await scheduler.run_once() == (0, 0, 0)
+
+    late = await place_repo.insert_visit(
+        test_place_model.id, test_client_model.id, now + timedelta(minutes=10), now + timedelta(minutes=20)
+    )
+    await db_session.commit()
+    assert await scheduler.run_once() == (1, 0, 0)
+
+    db_session.expire_all()
+    assert (await db_session.get(PlaceVisit, missed.id)).is_no_show
+    assert not (await db_session.get(PlaceVisit, upcoming.id)).is_no_show
+    assert (await db_session.get(PlaceVisit, late.id)).reminded_at is not None
+    subjects = sorted(await db_session.scalars(select(EmailOutbox.subject)))
+    assert subjects == ["Бронь в BookIT не отмечена", "Напоминание о брони в BookIT", "Напоминание о брони в BookIT"]
+
+
+async def test_release_no_shows(db_session, place_repo, test_client_model, test_place_model):
+    now = datetime.now(timezone.utc)
+    missed, late, visited = [
+        await place_repo.insert_visit(test_place_model.id, test_client_model.id, start, now + timedelta(hours=2))
+        for start in (now - timedelta(hours=2), now - timedelta(minutes=10), now - timedelta(hours=2))
+    ]
+    await place_repo.mark_visit(visited)
+    await db_session.flush()
+
+    released = await place_repo.release_no_shows(now - timedelta(hours=1), now, 10)
+    assert [visit.id for visit in released] == [missed.id]
+    assert released[0].visit_till == now and released[0].building_id == test_place_model.building_id
+    assert await place_repo.release_no_shows(now - timedelta(hours=1), now, 10) == []
+
+    booked_minutes = await db_session.scalar(
+        select(func.sum(BookingDailyStats.booked_minutes)).filter(BookingDailyStats.place_id == test_place_model.id)
+    )
+    # Брони на 4 часа, 2 часа 10 минут и 4 часа, у первой освобождены 2 часа
+    assert round(booked_minutes) == 120 + 130 + 240